@@ -1,28 +1,73 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, Request, request, jsonify, render_template, send_from_directory
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge, UnsupportedMediaType
 import os
-import cv2
-import numpy as np
+import sys
 from werkzeug.utils import secure_filename
 import logging
+import queue
+import threading
 import base64  # Added for base64 encoding
 
+# The assessment engine and upload validation are shared with Final/app.py. Final/ goes
+# first on the path so its ergonomic_assessment is imported rather than the script of
+# the same name next to this file. This app runs the "accurate" tier unless
+# ERGONOMICS_MODEL_TIER picks another one.
+FINAL_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Final"))
+sys.path.insert(0, FINAL_DIR)
+os.environ.setdefault("ERGONOMICS_MODEL_TIER", "accurate")
+
 # Updated import to use the correct class name
-from ergonomic_assessment import AdvancedErgonomicAssessment, save_result_image
+from ergonomic_assessment import AssessmentPool, save_result_image, encode_result_image
+from upload_validation import ImageUploadBuffer
+
+# Uploads are capped at MAX_UPLOAD_MB and checked while they stream in, so a file that
+# isn't an image of sensible dimensions is refused before it is buffered or assessed
+MAX_UPLOAD_MB = int(os.environ.get('ERGONOMICS_MAX_UPLOAD_MB', 20))
+MAX_IMAGE_PIXELS = int(os.environ.get('ERGONOMICS_MAX_IMAGE_PIXELS', 50_000_000))
+
+class AssessmentRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint == 'upload_file':
+            return ImageUploadBuffer(max_bytes=MAX_UPLOAD_MB * 1024 * 1024, max_pixels=MAX_IMAGE_PIXELS)
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
 
 app = Flask(__name__)
+app.request_class = AssessmentRequest
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_MB * 1024 * 1024
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Configure upload and results folder
-UPLOAD_FOLDER = 'uploads'
+# Configure results folder (uploads are analyzed in memory and never written to disk)
 RESULTS_FOLDER = 'results'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(RESULTS_FOLDER, exist_ok=True)
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['RESULTS_FOLDER'] = RESULTS_FOLDER
 
+# Pre-warmed assessment engines, created once at startup and shared by all requests
+POOL_SIZE = int(os.environ.get('ERGONOMICS_POOL_SIZE', 2))
+POOL_CHECKOUT_TIMEOUT = 30  # Seconds a request waits for a free engine before giving up
+assessment_pool = None
+
+_services_lock = threading.Lock()
+
+def start_services():
+    """Build the engine pool, once per server process.
+
+    Nothing heavy happens at import, so importing this module (the Werkzeug reloader,
+    tools, tests) doesn't load the models.
+    """
+    global assessment_pool
+    with _services_lock:
+        if assessment_pool is None:
+            assessment_pool = AssessmentPool(POOL_SIZE)
+            logger.info(f"Assessment pool ready with {POOL_SIZE} engines")
+
+def create_app():
+    """App factory for WSGI servers, e.g. gunicorn 'app:create_app()'."""
+    start_services()
+    return app
+
 @app.route('/')
 def index():
     """Render the homepage."""
@@ -39,28 +84,32 @@ def upload_file():
     if file.filename == '':
         logger.error("No selected file")
         return jsonify({'error': 'No selected file'}), 400
+    file.stream.finish()
 
-    # Save uploaded image with secure filename
+    # Keep the upload in memory; the engine decodes it straight from these bytes
     filename = secure_filename(file.filename)
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    file.save(filepath)
-    logger.info(f"Saved uploaded file to: {filepath}")
+    image_data = file.read()
+    logger.info(f"Received upload {filename} ({len(image_data)} bytes)")
     
     try:
-        # Initialize the ergonomic assessment
-        assessment = AdvancedErgonomicAssessment()
-        
-        # Process the image
-        logger.info(f"Processing image: {filepath}")
-        result_image, recommendations, response_data = assessment.process_image(filepath)
+        # Process the image with an engine from the pool
+        logger.info(f"Processing image: {filename}")
+        with assessment_pool.checkout(timeout=POOL_CHECKOUT_TIMEOUT) as assessment:
+            result_image, recommendations, response_data = assessment.process_image(image_data)
         
         if result_image is None:
             logger.error(f"Failed to process image: {recommendations}")
             return jsonify({'error': recommendations}), 500
         
+        # Encode the result once; the same JPEG bytes are saved and sent inline
+        result_jpeg = encode_result_image(result_image)
+        if result_jpeg is None:
+            logger.error("Failed to encode result image")
+            return jsonify({'error': 'Failed to save result image'}), 500
+        
         # Save the result image
         result_path = os.path.join(app.config['RESULTS_FOLDER'], f"assessed_{filename}")
-        result_filename = save_result_image(result_image, result_path)
+        result_filename = save_result_image(result_jpeg, result_path)
         
         if not result_filename:
             logger.error(f"Failed to save result image to: {result_path}")
@@ -68,25 +117,19 @@ def upload_file():
             
         logger.info(f"Result image saved as: {result_path}")
         
-        # Encode the result image as base64 for direct display in browser
-        _, buffer = cv2.imencode('.jpg', result_image)
-        image_data = base64.b64encode(buffer).decode('utf-8')
-        
         # Add both the URL path and base64 encoded image to the response
         response_data['result_path'] = f'/results/{result_filename}'
-        response_data['image_data'] = f'data:image/jpeg;base64,{image_data}'
+        response_data['image_data'] = f'data:image/jpeg;base64,{base64.b64encode(result_jpeg).decode("utf-8")}'
         
         return jsonify(response_data)
         
+    except queue.Empty:
+        logger.error("No assessment engine became free in time")
+        return jsonify({'error': 'Server is busy, please try again shortly'}), 503
+        
     except Exception as e:
         logger.exception(f"Error processing image: {str(e)}")
         return jsonify({'error': f'Error processing image: {str(e)}'}), 500
-    
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(filepath):
-            os.remove(filepath)
-            logger.info(f"Removed temporary file: {filepath}")
 
 @app.route('/results/<filename>')
 def send_result(filename):
@@ -131,6 +174,14 @@ def list_results():
         logger.exception(f"Error listing result files: {str(e)}")
         return jsonify({'error': f'Error listing files: {str(e)}'}), 500
 
+@app.errorhandler(BadRequest)
+@app.errorhandler(RequestEntityTooLarge)
+@app.errorhandler(UnsupportedMediaType)
+def reject_request(error):
+    """Answer refused requests (invalid or oversized uploads among them) with a JSON error."""
+    logger.warning(f"Rejected {request.path}: {error.description}")
+    return jsonify({'error': error.description}), error.code
+
 @app.after_request
 def add_header(response):
     """Add headers to prevent caching for development."""
@@ -140,6 +191,7 @@ def add_header(response):
     return response
 
 if __name__ == '__main__':
-    logger.info(f"Starting application with UPLOAD_FOLDER: {os.path.abspath(UPLOAD_FOLDER)}")
     logger.info(f"Starting application with RESULTS_FOLDER: {os.path.abspath(RESULTS_FOLDER)}")
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    start_services()
+    # The reloader would import this module again in a child process and load every model twice
+    app.run(debug=True, use_reloader=False, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -1,15 +1,47 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, Request, request, jsonify, render_template, send_from_directory
+from werkzeug.exceptions import BadRequest, NotFound, RequestEntityTooLarge, UnsupportedMediaType
 import os
-import cv2
-import numpy as np
 from werkzeug.utils import secure_filename
 import logging
+import queue
+import re
+import hashlib
+import time
+import atexit
+import tempfile
+import threading
 
 # Updated import to use the correct class name
-from ergonomic_assessment import AdvancedErgonomicAssessment, save_result_image
+from ergonomic_assessment import (AssessmentPool, load_object_model, get_tier, MODEL_TIERS, DEFAULT_TIER,
+                                  ANALYSIS_STAGES, REFERENCES_VERSION, DETECTOR_RUNTIME, DETECTOR_VARIANT,
+                                  encode_result_image)
+from detection_batcher import BatchingDetector
+from component_profiler import build_costs
+from result_cache import ResultCache, make_key, start_sweeper
+from job_queue import JobStore, QueueFull, start_workers
+from feature_store import FeatureStore, assessment_row
+from video_assessment import process_video
+from upload_validation import ImageUploadBuffer
 from flask_cors import CORS  # Add at the top
 
+# Request bodies are capped at MAX_UPLOAD_MB (MAX_VIDEO_MB for /video). Images sent to the
+# assessment endpoints are checked while they stream in (see upload_validation.py): a body
+# that isn't a JPEG, PNG, WebP or BMP of sensible dimensions is refused after its first
+# bytes, before it is buffered in full or reaches an engine.
+MAX_UPLOAD_MB = int(os.environ.get('ERGONOMICS_MAX_UPLOAD_MB', 20))
+MAX_VIDEO_MB = int(os.environ.get('ERGONOMICS_MAX_VIDEO_MB', 200))
+MAX_IMAGE_PIXELS = int(os.environ.get('ERGONOMICS_MAX_IMAGE_PIXELS', 50_000_000))
+IMAGE_UPLOAD_ENDPOINTS = ('upload_file', 'submit_job')
+
+class AssessmentRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint in IMAGE_UPLOAD_ENDPOINTS:
+            return ImageUploadBuffer(max_bytes=MAX_UPLOAD_MB * 1024 * 1024, max_pixels=MAX_IMAGE_PIXELS)
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
 app = Flask(__name__)
+app.request_class = AssessmentRequest
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_MB * 1024 * 1024
 CORS(app)  # Add this right after creating the Flask app
 
 
@@ -17,118 +49,354 @@ CORS(app)  # Add this right after creating the Flask app
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Configure upload and results folder
-UPLOAD_FOLDER = 'uploads'
+# Configure results folder (uploads are analyzed in memory and never written to disk)
 RESULTS_FOLDER = 'results'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(RESULTS_FOLDER, exist_ok=True)
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['RESULTS_FOLDER'] = RESULTS_FOLDER
 
-@app.route('/')
-def index():
-    """Render the homepage."""
-    return render_template('index.html')  # Flask automatically looks inside /templates
+# Pre-warmed assessment engines, created once at startup and shared by all requests
+POOL_SIZE = int(os.environ.get('ERGONOMICS_POOL_SIZE', 2))
+POOL_CHECKOUT_TIMEOUT = 30  # Seconds a request waits for a free engine before giving up
 
-@app.route('/upload', methods=['POST'])
-def upload_file():
-    """Handle file upload and analysis."""
+# Model tiers /upload can serve (see MODEL_TIERS in ergonomic_assessment.py); each one gets
+# its own engines. The first tier is used when a request doesn't ask for one.
+SERVED_TIERS = [get_tier(t.strip())[0] for t in os.environ.get('ERGONOMICS_TIERS', DEFAULT_TIER).split(',') if t.strip()]
+
+# Object detection requests from all engines are batched together (see detection_batcher.py),
+# with one detector per EfficientDet variant so tiers sharing a variant also share batches.
+# With the TFLite runtime each engine runs its own interpreter instead.
+MAX_BATCH_SIZE = int(os.environ.get('ERGONOMICS_MAX_BATCH_SIZE', 4))
+MAX_QUEUE_DELAY_MS = float(os.environ.get('ERGONOMICS_MAX_QUEUE_DELAY_MS', 5))
+object_detectors = {}
+assessment_pools = {}
+
+# Assessments are cached by image content, tier, reference values and detector runtime; the
+# rendered images live in the results folder next to the cached responses, so /results
+# serves them directly.
+# File names are the cache keys, so a name always means the same image and browsers may
+# keep it forever. A background sweep bounds the folder by size and by time since last use.
+RESULT_CACHE_MAX_MB = int(os.environ.get('ERGONOMICS_RESULT_CACHE_MB', 500))
+RESULT_MAX_AGE_DAYS = float(os.environ.get('ERGONOMICS_RESULT_MAX_AGE_DAYS', 30))
+RESULT_SWEEP_INTERVAL = int(os.environ.get('ERGONOMICS_RESULT_SWEEP_SECONDS', 300))
+RESULT_IMAGE_PATTERN = re.compile(r'^[0-9a-f]{32}\.jpg$')
+result_cache = ResultCache(RESULTS_FOLDER, max_bytes=RESULT_CACHE_MAX_MB * 1024 * 1024,
+                           max_age=RESULT_MAX_AGE_DAYS * 86400 if RESULT_MAX_AGE_DAYS > 0 else None)
+
+# Raw measurements of every assessment, by user and time, for trend analysis and
+# threshold tuning without re-processing images (see feature_store.py)
+FEATURE_STORE_FOLDER = os.environ.get('ERGONOMICS_FEATURE_STORE', 'features')
+feature_store = FeatureStore(FEATURE_STORE_FOLDER)
+atexit.register(feature_store.flush)
+
+# Asynchronous assessments (/jobs): queued in SQLite and processed by separate worker
+# processes with their own models, so slow inferences don't tie up request threads
+JOB_DB_PATH = os.environ.get('ERGONOMICS_JOB_DB', 'jobs.db')
+JOB_WORKERS = int(os.environ.get('ERGONOMICS_JOB_WORKERS', 1))
+MAX_QUEUE_DEPTH = int(os.environ.get('ERGONOMICS_MAX_QUEUE_DEPTH', 50))  # Queued jobs before /jobs answers 429
+MAX_JOB_WAIT = 30  # Longest long-poll a client can ask for, in seconds
+job_store = JobStore(JOB_DB_PATH)
+job_workers = []
+
+_services_lock = threading.Lock()
+_services_started = False
+
+def start_services():
+    """Load the models and start the background work (cache sweeper, job workers), once per server process.
+
+    Nothing heavy happens at import, so importing this module (the Werkzeug reloader,
+    tools, tests) doesn't load models or spawn a second set of workers on the job queue.
+    """
+    global _services_started
+    with _services_lock:
+        if _services_started:
+            return
+        _services_started = True
+
+        for tier in SERVED_TIERS:
+            settings = MODEL_TIERS[tier]
+            if DETECTOR_RUNTIME == 'saved_model' and settings['detector'] not in object_detectors:
+                object_detectors[settings['detector']] = BatchingDetector(
+                    load_object_model(tier), max_batch_size=MAX_BATCH_SIZE,
+                    max_queue_delay=MAX_QUEUE_DELAY_MS / 1000, input_size=settings['detector_input_size'])
+            assessment_pools[tier] = AssessmentPool(POOL_SIZE, detector=object_detectors.get(settings['detector']), tier=tier)
+            logger.info(f"Assessment pool for tier '{tier}' ready with {POOL_SIZE} engines ({DETECTOR_RUNTIME} detector)")
+
+        start_sweeper(result_cache, RESULT_SWEEP_INTERVAL)
+
+        job_workers.extend(start_workers(JOB_WORKERS, JOB_DB_PATH, SERVED_TIERS, RESULTS_FOLDER,
+                                         RESULT_CACHE_MAX_MB * 1024 * 1024, FEATURE_STORE_FOLDER))
+        atexit.register(lambda: [worker.terminate() for worker in job_workers])
+        logger.info(f"Started {JOB_WORKERS} job worker processes")
+
+def create_app():
+    """App factory for WSGI servers, e.g. gunicorn 'app:create_app()'."""
+    start_services()
+    return app
+
+# Uploaded clips (/video) are sampled down to this many frames per second and cut off
+# after MAX_VIDEO_SECONDS of video, so one request can't hold an engine for long
+VIDEO_SAMPLE_FPS = float(os.environ.get('ERGONOMICS_VIDEO_FPS', 5))
+MAX_VIDEO_SECONDS = float(os.environ.get('ERGONOMICS_MAX_VIDEO_SECONDS', 120))
+
+def parse_assessment_request():
+    """Read the uploaded image, tier and stages from the form; returns (upload, error response)."""
     if 'file' not in request.files:
         logger.error("No file part in the request")
-        return jsonify({'error': 'No file uploaded'}), 400
+        return None, (jsonify({'error': 'No file uploaded'}), 400)
     
     file = request.files['file']
     if file.filename == '':
         logger.error("No selected file")
-        return jsonify({'error': 'No selected file'}), 400
+        return None, (jsonify({'error': 'No selected file'}), 400)
+    image = file.stream.finish()
+
+    tier = request.form.get('tier') or SERVED_TIERS[0]
+    if tier not in assessment_pools:
+        logger.error(f"Requested model tier not served: {tier}")
+        return None, (jsonify({'error': f"Model tier '{tier}' is not available", 'available_tiers': SERVED_TIERS}), 400)
 
-    # Save uploaded image with secure filename
+    # Optional comma-separated subset of analysis stages, e.g. "lighting,glare" for a quick check
+    stages = None
+    if request.form.get('stages'):
+        stages = [stage.strip() for stage in request.form['stages'].split(',') if stage.strip()]
+        if not stages:
+            # An empty selection would run nothing and report a well set up workspace
+            logger.error(f"No analysis stages in {request.form['stages']!r}")
+            return None, (jsonify({'error': 'No stages given', 'available_stages': list(ANALYSIS_STAGES)}), 400)
+        unknown = [stage for stage in stages if stage not in ANALYSIS_STAGES]
+        if unknown:
+            logger.error(f"Unknown analysis stages requested: {unknown}")
+            return None, (jsonify({'error': f"Unknown stages: {', '.join(unknown)}", 'available_stages': list(ANALYSIS_STAGES)}), 400)
+
+    # overlay=1 returns the boxes, landmarks and text as shapes for the client to draw,
+    # so the server skips rendering and encoding a result image
+    overlay = request.form.get('overlay', '').lower() in ('1', 'true', 'yes')
+
+    # Keep the upload in memory; the engine decodes it straight from these bytes
     filename = secure_filename(file.filename)
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    file.save(filepath)
-    logger.info(f"Saved uploaded file to: {filepath}")
+    image_data = file.read()
+    logger.info(f"Received upload {filename} ({len(image_data)} bytes, {image.format} {image.size[0]}x{image.size[1]})")
+    cache_key = make_key(hashlib.sha256(image_data).hexdigest(), tier, REFERENCES_VERSION, stages, overlay,
+                         DETECTOR_VARIANT)
+    return {'filename': filename, 'image_data': image_data, 'tier': tier, 'stages': stages, 'overlay': overlay,
+            'cache_key': cache_key, 'user_id': request.form.get('user_id')}, None
+
+@app.route('/')
+def index():
+    """Render the homepage."""
+    return render_template('index.html')  # Flask automatically looks inside /templates
+
+@app.route('/upload', methods=['POST'])
+def upload_file():
+    """Handle file upload and analysis."""
+    upload, error_response = parse_assessment_request()
+    if error_response:
+        return error_response
+    filename, tier, stages, cache_key = upload['filename'], upload['tier'], upload['stages'], upload['cache_key']
     
     try:
-        # Initialize the ergonomic assessment
-        assessment = AdvancedErgonomicAssessment()
+        # Re-uploads and client retries of the same image are answered from the cache
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Returning cached assessment {cache_key} for {filename}")
+            cached['cached'] = True
+            return jsonify(cached)
         
-        # Process the image
-        logger.info(f"Processing image: {filepath}")
-        result_image, recommendations, response_data = assessment.process_image(filepath)
+        # Process the image with an engine from the pool
+        logger.info(f"Processing image: {filename} (tier: {tier})")
+        with assessment_pools[tier].checkout(timeout=POOL_CHECKOUT_TIMEOUT) as assessment:
+            result_image, recommendations, response_data = assessment.process_image(
+                upload['image_data'], stages, render=not upload['overlay'],
+                on_features=lambda analysis: feature_store.append(upload['user_id'], assessment_row(analysis)))
         
-        if result_image is None:
+        if response_data is None:
             logger.error(f"Failed to process image: {recommendations}")
             return jsonify({'error': recommendations}), 500
         
-        # Save the result image
-        result_path = os.path.join(app.config['RESULTS_FOLDER'], f"assessed_{filename}")
-        result_filename = save_result_image(result_image, result_path)
+        if upload['overlay']:
+            result_cache.put(cache_key, response_data)
+            response_data['cached'] = False
+            return jsonify(response_data)
         
-        if not result_filename:
-            logger.error(f"Failed to save result image to: {result_path}")
+        # Save the result image together with the response in the cache
+        image_bytes = encode_result_image(result_image)
+        if image_bytes is None:
+            logger.error("Failed to encode result image")
             return jsonify({'error': 'Failed to save result image'}), 500
-            
-        logger.info(f"Result image saved as: {result_path}")
-        
-        # Add the path to the response data
-        result_url = f'/results/{result_filename}'
+        result_url = f'/results/{cache_key}.jpg'
         response_data['result_path'] = result_url
+        result_cache.put(cache_key, response_data, image_bytes)
         logger.info(f"Result URL: {result_url}")
         
+        response_data['cached'] = False
         return jsonify(response_data)
         
+    except queue.Empty:
+        logger.error("No assessment engine became free in time")
+        return jsonify({'error': 'Server is busy, please try again shortly'}), 503
+        
     except Exception as e:
         logger.exception(f"Error processing image: {str(e)}")
         return jsonify({'error': f'Error processing image: {str(e)}'}), 500
-    
+
+@app.route('/video', methods=['POST'])
+def upload_video():
+    """Assess an uploaded clip: detector on keyframes, pose every sampled frame, issues aggregated over the clip."""
+    request.max_content_length = MAX_VIDEO_MB * 1024 * 1024
+    if 'file' not in request.files or request.files['file'].filename == '':
+        logger.error("No video in the request")
+        return jsonify({'error': 'No file uploaded'}), 400
+    tier = request.form.get('tier') or SERVED_TIERS[0]
+    if tier not in assessment_pools:
+        return jsonify({'error': f"Model tier '{tier}' is not available", 'available_tiers': SERVED_TIERS}), 400
+
+    # OpenCV reads videos from files, so the clip is spooled to a temporary one. It is
+    # closed before OpenCV opens it (Windows can't open a file twice) and removed after.
+    suffix = os.path.splitext(secure_filename(request.files['file'].filename))[1] or '.mp4'
+    clip = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+    try:
+        with clip:
+            request.files['file'].save(clip)
+        with assessment_pools[tier].checkout(timeout=POOL_CHECKOUT_TIMEOUT) as assessment:
+            summary = process_video(clip.name, engine=assessment, fps=VIDEO_SAMPLE_FPS, max_seconds=MAX_VIDEO_SECONDS)
+    except queue.Empty:
+        logger.error("No assessment engine became free in time")
+        return jsonify({'error': 'Server is busy, please try again shortly'}), 503
+    except ValueError as e:
+        logger.error(f"Unreadable video: {e}")
+        return jsonify({'error': 'Could not read video'}), 400
+    except Exception as e:
+        logger.exception(f"Error processing video: {str(e)}")
+        return jsonify({'error': f'Error processing video: {str(e)}'}), 500
     finally:
-        # Clean up the temporary file
-        if os.path.exists(filepath):
-            os.remove(filepath)
-            logger.info(f"Removed temporary file: {filepath}")
+        os.remove(clip.name)
+
+    summary['model_tier'] = tier
+    logger.info(f"Assessed {summary['frames']} frames, detector on {summary.get('keyframes', 0)}")
+    return jsonify(summary)
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue an image for assessment and return its job id right away (202), or the cached result (200)."""
+    upload, error_response = parse_assessment_request()
+    if error_response:
+        return error_response
+
+    cached = result_cache.get(upload['cache_key'])
+    if cached is not None:
+        cached['cached'] = True
+        job_id = job_store.add_finished(upload['tier'], upload['stages'], upload['cache_key'], cached)
+        logger.info(f"Job {job_id} answered from the result cache")
+        return jsonify({'job_id': job_id, 'status': 'done', 'result': cached}), 200
+
+    try:
+        job_id = job_store.submit(upload['image_data'], upload['tier'], upload['stages'], upload['cache_key'],
+                                  max_depth=MAX_QUEUE_DEPTH, overlay=upload['overlay'], user_id=upload['user_id'])
+    except QueueFull as e:
+        logger.warning(f"Rejecting job, queue is full: {e}")
+        response = jsonify({'error': 'Server is busy, please try again shortly'})
+        response.headers['Retry-After'] = '10'
+        return response, 429
+
+    logger.info(f"Queued job {job_id} for {upload['filename']} (tier: {upload['tier']})")
+    return jsonify({'job_id': job_id, 'status': 'queued', 'status_url': f'/jobs/{job_id}'}), 202
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Job status and, once done, its result. ?wait=N long-polls up to N seconds for the job to finish."""
+    wait = min(request.args.get('wait', 0, type=float), MAX_JOB_WAIT)
+    deadline = time.time() + wait
+    while True:
+        job = job_store.get(job_id)
+        if job is None:
+            return jsonify({'error': f'Unknown job: {job_id}'}), 404
+        if job['status'] in ('done', 'failed') or time.time() >= deadline:
+            return jsonify(job)
+        time.sleep(0.25)
+
+@app.route('/debug/jobs')
+def job_queue_stats():
+    """Debug endpoint with job counts by status and the worker processes' state."""
+    return jsonify({
+        'counts': job_store.depth(),
+        'max_queue_depth': MAX_QUEUE_DEPTH,
+        'workers': [{'pid': worker.pid, 'running': worker.poll() is None} for worker in job_workers]
+    })
+
 @app.route('/results/<filename>')
 def send_result(filename):
-    """Serve result images."""
+    """Serve a result image; names are content addresses, so responses are cacheable for good."""
+    if not RESULT_IMAGE_PATTERN.match(filename):
+        return jsonify({'error': 'Result not found'}), 404
     try:
-        logger.info(f"Request for result image: {filename}")
-        return send_from_directory(
-            app.config['RESULTS_FOLDER'],
-            filename,
-            mimetype='image/jpeg'  # or 'image/png' depending on your format
-        )
-    
+        response = send_from_directory(app.config['RESULTS_FOLDER'], filename, mimetype='image/jpeg',
+                                       max_age=365 * 86400)
+    except NotFound:
+        # Swept from the cache; the client has to upload the image again
+        return jsonify({'error': 'Result not found'}), 404
     except Exception as e:
         logger.exception(f"Error serving result image: {str(e)}")
         return jsonify({'error': f'Error serving image: {str(e)}'}), 500
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
 @app.route('/debug/results')
 def list_results():
-    """Debug endpoint to list available result images."""
-    try:
-        files = os.listdir(app.config['RESULTS_FOLDER'])
-        file_info = []
-        
-        for file in files:
-            file_path = os.path.join(app.config['RESULTS_FOLDER'], file)
-            file_info.append({
-                'name': file,
-                'size': os.path.getsize(file_path),
-                'path': file_path,
-                'url': f'/results/{file}'
-            })
-            
-        return jsonify({
-            'results_folder': os.path.abspath(app.config['RESULTS_FOLDER']),
-            'files': file_info
-        })
-        
-    except Exception as e:
-        logger.exception(f"Error listing result files: {str(e)}")
-        return jsonify({'error': f'Error listing files: {str(e)}'}), 500
+    """Debug endpoint listing cached results, most recently used first, a page at a time (?offset=&limit=)."""
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    total, entries = result_cache.entries(offset, limit)
+    for entry in entries:
+        entry['url'] = f"/results/{entry['key']}.jpg" if entry.pop('has_image') else None
+    return jsonify({
+        'results_folder': os.path.abspath(app.config['RESULTS_FOLDER']),
+        'total': total,
+        'offset': offset,
+        'limit': limit,
+        'results': entries
+    })
+
+@app.route('/tiers')
+def list_tiers():
+    """List the model tiers this server accepts in the /upload 'tier' field."""
+    return jsonify({
+        'default': SERVED_TIERS[0],
+        'tiers': {tier: MODEL_TIERS[tier] for tier in SERVED_TIERS}
+    })
+
+@app.route('/debug/detector-stats')
+def detector_stats():
+    """Debug endpoint reporting batching throughput and latency for tuning the batch knobs."""
+    return jsonify({name: detector.stats() for name, detector in object_detectors.items()})
+
+@app.route('/debug/result-cache')
+def result_cache_stats():
+    """Debug endpoint with the result cache's size, entry count, bounds and last sweep."""
+    return jsonify(result_cache.stats())
+
+@app.route('/debug/feature-store')
+def feature_store_stats():
+    """Debug endpoint with the number of stored assessments (this process's buffer included)."""
+    return jsonify(feature_store.stats())
+
+@app.route('/debug/component-costs')
+def component_costs():
+    """Debug endpoint with the one-time build cost of each loaded component; per-image costs are in each /upload response's 'profile'."""
+    return jsonify(build_costs)
+
+@app.errorhandler(BadRequest)
+@app.errorhandler(RequestEntityTooLarge)
+@app.errorhandler(UnsupportedMediaType)
+def reject_request(error):
+    """Answer refused requests (invalid or oversized uploads among them) with a JSON error, like the routes do."""
+    logger.warning(f"Rejected {request.path}: {error.description}")
+    return jsonify({'error': error.description}), error.code
 
 @app.after_request
 def add_header(response):
-    """Add headers to prevent caching for development."""
+    """Prevent caching of API responses; result images set their own long-lived headers."""
+    if 'immutable' in response.headers.get('Cache-Control', ''):
+        return response
     response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, post-check=0, pre-check=0, max-age=0'
     response.headers['Pragma'] = 'no-cache'
     response.headers['Expires'] = '-1'
@@ -136,9 +404,11 @@ def add_header(response):
 
 if __name__ == '__main__':
     # Verify folders exist and are writable
-    for folder in [UPLOAD_FOLDER, RESULTS_FOLDER]:
+    for folder in [RESULTS_FOLDER]:
         os.makedirs(folder, exist_ok=True)
         if not os.access(folder, os.W_OK):
             logger.error(f"Cannot write to {folder} directory")
     
-    app.run(debug=True, host='0.0.0.0', port=5001)  # Changed to 0.0.0.0
\ No newline at end of file
+    start_services()
+    # The reloader would import this module again in a child process and load every model twice
+    app.run(debug=True, use_reloader=False, host='0.0.0.0', port=5001)  # Changed to 0.0.0.0
\ No newline at end of file
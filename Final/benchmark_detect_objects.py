@@ -0,0 +1,77 @@
+import argparse
+import timeit
+
+import numpy as np
+import tensorflow as tf
+
+from ergonomic_assessment import filter_detections, EQUIPMENT_CATEGORY_INDEX
+
+
+def legacy_filter_detections(detections, height, width, category_index):
+    """The previous per-detection loop, kept here only as the benchmark baseline."""
+    detected_objects = {}
+    num_detections = int(detections["num_detections"].numpy()[0])
+
+    for i in range(num_detections):
+        class_id = int(detections["detection_classes"].numpy()[0][i])
+        confidence = float(detections["detection_scores"].numpy()[0][i])
+
+        if confidence > 0.5 and class_id in category_index:
+            obj_class = category_index[class_id]
+            bbox = detections["detection_boxes"].numpy()[0][i]
+
+            y_min = int(bbox[0] * height)
+            x_min = int(bbox[1] * width)
+            y_max = int(bbox[2] * height)
+            x_max = int(bbox[3] * width)
+
+            if obj_class not in detected_objects or detected_objects[obj_class]["confidence"] < confidence:
+                detected_objects[obj_class] = {
+                    "confidence": confidence,
+                    "bbox": [x_min, y_min, x_max, y_max],
+                    "center": [(x_min + x_max) // 2, (y_min + y_max) // 2],
+                    "dimensions": [x_max - x_min, y_max - y_min]
+                }
+
+    return detected_objects
+
+
+def make_detections(num_detections=100, seed=0):
+    """Fake model output shaped like EfficientDet's: 100 detections sorted by score."""
+    rng = np.random.default_rng(seed)
+    class_ids = np.array(list(EQUIPMENT_CATEGORY_INDEX) + [2, 3, 44, 47, 85])
+    y_min, x_min = rng.uniform(0, 0.6, (2, num_detections))
+    boxes = np.stack([y_min, x_min, y_min + rng.uniform(0.05, 0.4, num_detections),
+                      x_min + rng.uniform(0.05, 0.4, num_detections)], axis=1)
+    return {
+        "num_detections": tf.constant([float(num_detections)]),
+        "detection_classes": tf.constant(rng.choice(class_ids, num_detections).astype(np.float32)[np.newaxis]),
+        "detection_scores": tf.constant(np.sort(rng.uniform(0, 1, num_detections)).astype(np.float32)[::-1][np.newaxis]),
+        "detection_boxes": tf.constant(boxes.astype(np.float32)[np.newaxis]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare detection post-processing implementations.")
+    parser.add_argument("--detections", type=int, default=100, help="Detections in the fake model output")
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per measurement")
+    args = parser.parse_args()
+
+    detections = make_detections(args.detections)
+    height, width = 3024, 4032  # 12 MP phone photo
+
+    legacy = legacy_filter_detections(detections, height, width, EQUIPMENT_CATEGORY_INDEX)
+    vectorized = filter_detections(detections, height, width, EQUIPMENT_CATEGORY_INDEX)
+    assert legacy == vectorized, "Vectorized post-processing does not match the legacy loop"
+
+    results = {}
+    for name, func in [("legacy loop", legacy_filter_detections), ("vectorized", filter_detections)]:
+        seconds = min(timeit.repeat(lambda: func(detections, height, width, EQUIPMENT_CATEGORY_INDEX),
+                                    number=args.repeat, repeat=5))
+        results[name] = seconds / args.repeat
+        print(f"{name:12s} {results[name] * 1e6:10.1f} µs per image")
+    print(f"Speedup: {results['legacy loop'] / results['vectorized']:.1f}x on {args.detections} detections")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from ergonomic_assessment import EQUIPMENT_CATEGORY_INDEX, filter_detections, get_tier, load_object_model, tf
+from image_pyramid import ImagePyramid
+from tflite_detector import QUANTIZATIONS, TFLiteDetector, tflite_path
+
+
+def load_images(image_folder, input_size):
+    """RGB images from the folder, downscaled to the detector's input size as the engine does."""
+    images = []
+    for name in sorted(os.listdir(image_folder)):
+        if name.lower().endswith(('.jpg', '.jpeg', '.png')):
+            pyramid = ImagePyramid.read(os.path.join(image_folder, name), input_size)
+            if pyramid is not None:
+                images.append(cv2.cvtColor(pyramid.level(input_size), cv2.COLOR_BGR2RGB))
+    return images
+
+
+def run_detector(detect, images):
+    """Detect objects in every image; returns latencies in ms and the filtered detections."""
+    detect(images[0])  # Warm up
+    latencies, results = [], []
+    for image in images:
+        start = time.perf_counter()
+        detections = detect(image)
+        latencies.append((time.perf_counter() - start) * 1000)
+        height, width = image.shape[:2]
+        results.append(filter_detections(detections, height, width, EQUIPMENT_CATEGORY_INDEX))
+    return np.array(latencies), results
+
+
+def box_iou(a, b):
+    x_min, y_min = max(a[0], b[0]), max(a[1], b[1])
+    x_max, y_max = min(a[2], b[2]), min(a[3], b[3])
+    intersection = max(0, x_max - x_min) * max(0, y_max - y_min)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def agreement(results, reference):
+    """Mean Jaccard of the detected classes and mean IoU of the boxes of classes both found."""
+    jaccard, ious = [], []
+    for found, expected in zip(results, reference):
+        union = set(found) | set(expected)
+        jaccard.append(len(set(found) & set(expected)) / len(union) if union else 1.0)
+        ious.extend(box_iou(found[name]["bbox"], expected[name]["bbox"]) for name in set(found) & set(expected))
+    return float(np.mean(jaccard)), float(np.mean(ious)) if ious else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare latency and agreement of TFLite exports with the SavedModel.")
+    parser.add_argument("image_folder", help="Folder of validation images")
+    parser.add_argument("--tier", help="Model tier whose detector to compare")
+    parser.add_argument("--quantizations", default=",".join(QUANTIZATIONS),
+                        help="Comma-separated TFLite exports to compare (missing ones are skipped)")
+    parser.add_argument("--threads", type=int, help="TFLite interpreter threads")
+    args = parser.parse_args()
+
+    tier, settings = get_tier(args.tier)
+    model_name, input_size = settings["detector"], settings["detector_input_size"]
+    images = load_images(args.image_folder, input_size)
+    if not images:
+        print(f"No images found in {args.image_folder}")
+        return
+
+    model = load_object_model(tier)
+    rows = [("saved_model", *run_detector(lambda image: model(tf.convert_to_tensor(image)[tf.newaxis, ...]), images))]
+    for quantization in (q.strip() for q in args.quantizations.split(",") if q.strip()):
+        if not os.path.exists(tflite_path(model_name, quantization, input_size)):
+            print(f"Skipping {quantization}: not exported (python tflite_detector.py --tier {tier} --quantization {quantization})")
+            continue
+        detector = TFLiteDetector.load(model_name, input_size, quantization, args.threads)
+        rows.append((f"tflite {quantization}", *run_detector(detector, images)))
+
+    reference = rows[0][2]
+    print(f"\n{len(images)} images, {model_name} at {input_size}px, agreement measured against the SavedModel")
+    print(f"{'runtime':>16} {'mean ms':>9} {'p95 ms':>9} {'img/s':>7} {'classes':>8} {'box IoU':>8}")
+    for name, latencies, results in rows:
+        classes, iou = agreement(results, reference)
+        print(f"{name:>16} {latencies.mean():>9.1f} {np.percentile(latencies, 95):>9.1f} "
+              f"{1000 / latencies.mean():>7.2f} {classes:>8.2f} {iou:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
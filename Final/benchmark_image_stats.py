@@ -0,0 +1,94 @@
+import argparse
+import timeit
+
+import cv2
+import numpy as np
+
+from image_stats import luminance_planes, brightness_stats, glare_regions, LUMINANCE_MAX_SIZE
+
+
+def legacy_analyze_lighting(image):
+    """The previous full-resolution HSV implementation, kept here only as the benchmark baseline."""
+    v = cv2.split(cv2.cvtColor(image, cv2.COLOR_BGR2HSV))[2]
+    height, width = v.shape
+    quadrants = [
+        v[0:height//2, 0:width//2],
+        v[0:height//2, width//2:width],
+        v[height//2:height, 0:width//2],
+        v[height//2:height, width//2:width]
+    ]
+    quadrant_brightness = [np.mean(q) for q in quadrants]
+    return {
+        "avg_brightness": np.mean(v),
+        "min_brightness": np.min(v),
+        "max_brightness": np.max(v),
+        "std_brightness": np.std(v),
+        "quadrant_brightness": quadrant_brightness,
+        "brightness_variance": np.var(quadrant_brightness)
+    }
+
+
+def legacy_detect_glare(image):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    _, thresh = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY)
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    glare_areas = [contour for contour in contours if cv2.contourArea(contour) > 50]
+    return len(glare_areas) > 0, glare_areas
+
+
+def fused(image, max_size):
+    value, glare_mask = luminance_planes(image, max_size)
+    lighting_info, _ = brightness_stats(value)
+    return lighting_info, glare_regions(glare_mask)
+
+
+def make_image(height=3024, width=4032, seed=0):
+    """Synthetic 12 MP desk photo: smooth lighting gradient, texture, two glare patches and a specular highlight."""
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(60, 180, width, dtype=np.float32)[np.newaxis, :] + \
+        np.linspace(-30, 30, height, dtype=np.float32)[:, np.newaxis]
+    image = gradient[..., np.newaxis] * np.array([0.9, 1.0, 1.1], dtype=np.float32)
+    image += rng.normal(0, 8, (height // 8, width // 8, 3)).astype(np.float32).repeat(8, 0).repeat(8, 1)
+    image = np.clip(image, 0, 255).astype(np.uint8)
+    cv2.rectangle(image, (1200, 800), (1700, 1100), (255, 255, 255), -1)
+    cv2.circle(image, (3000, 2000), 120, (250, 252, 255), -1)
+    # A lamp's reflection on a glossy screen: above the area threshold at full resolution,
+    # but only a couple of pixels across once the image is shrunk to the luminance plane
+    cv2.circle(image, (600, 2400), 6, (255, 255, 255), -1)
+    return image
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the fused lighting/glare kernel with the legacy passes.")
+    parser.add_argument("images", nargs="*", help="Images to compare on (default: a synthetic 12 MP photo)")
+    parser.add_argument("--max-size", type=int, default=LUMINANCE_MAX_SIZE, help="Long side of the luminance plane")
+    parser.add_argument("--repeat", type=int, default=5, help="Calls per measurement")
+    args = parser.parse_args()
+
+    images = [cv2.imread(path) for path in args.images] or [make_image()]
+    for i, image in enumerate(images):
+        if image is None:
+            print(f"Could not read {args.images[i]}")
+            continue
+        legacy_lighting, (legacy_glare, legacy_areas) = legacy_analyze_lighting(image), legacy_detect_glare(image)
+        lighting, (glare, areas) = fused(image, args.max_size)
+
+        print(f"\nImage {i + 1}: {image.shape[1]}x{image.shape[0]}")
+        for key in ["avg_brightness", "std_brightness", "brightness_variance", "min_brightness", "max_brightness"]:
+            print(f"  {key:20s} legacy {float(legacy_lighting[key]):9.2f}  fused {lighting[key]:9.2f}")
+        print(f"  {'quadrants':20s} max difference "
+              f"{np.max(np.abs(np.subtract(legacy_lighting['quadrant_brightness'], lighting['quadrant_brightness']))):.2f}")
+        legacy_area = sum(cv2.contourArea(c) for c in legacy_areas)
+        fused_area = sum(cv2.contourArea(c) for c in areas)
+        print(f"  {'glare':20s} legacy {legacy_glare} ({len(legacy_areas)} areas, {legacy_area:.0f} px)  "
+              f"fused {glare} ({len(areas)} areas, {fused_area:.0f} px)")
+
+        legacy_time = min(timeit.repeat(lambda: (legacy_analyze_lighting(image), legacy_detect_glare(image)),
+                                        number=args.repeat, repeat=3)) / args.repeat
+        fused_time = min(timeit.repeat(lambda: fused(image, args.max_size), number=args.repeat, repeat=3)) / args.repeat
+        print(f"  legacy {legacy_time * 1000:.1f} ms, fused {fused_time * 1000:.1f} ms "
+              f"({legacy_time / fused_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""How long a fresh worker takes to become ready: imports, model loading and first inference.
+
+Run it as its own process so nothing is imported or loaded beforehand:
+
+    python benchmark_startup.py --tier standard [--image photo.jpg]
+"""
+import argparse
+import json
+import sys
+import time
+
+import cv2
+import numpy as np
+
+HEAVY_MODULES = ("tensorflow", "mediapipe", "matplotlib", "tkinter", "scipy")
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def sample_image():
+    """A synthetic 1280x960 JPEG, used when no image is given."""
+    rng = np.random.default_rng(0)
+    image = cv2.GaussianBlur(rng.integers(0, 256, (960, 1280, 3), dtype=np.uint8), (15, 15), 0)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure worker start-up: import, model load and first inference.")
+    parser.add_argument("--tier", help="Model tier to load (default: ERGONOMICS_MODEL_TIER or 'standard')")
+    parser.add_argument("--image", help="Image to run the first inferences on (default: a synthetic one)")
+    parser.add_argument("--json", action="store_true", help="Print the timings as JSON")
+    args = parser.parse_args()
+
+    timings = {}
+    ergonomic_assessment, timings["import ergonomic_assessment"] = timed(lambda: __import__("ergonomic_assessment"))
+    loaded_at_import = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    engine = ergonomic_assessment.AdvancedErgonomicAssessment(tier=args.tier)
+    _, timings["import tensorflow"] = timed(lambda: ergonomic_assessment.tf.__version__)
+    _, timings["import mediapipe"] = timed(lambda: ergonomic_assessment.mp_pose.Pose)
+    _, timings["load detector"] = timed(lambda: engine.object_model)
+    _, timings["build pose graph"] = timed(lambda: engine.pose)
+
+    image = args.image or sample_image()
+    result, timings["first inference"] = timed(lambda: engine.process_image(image))
+    if result[2] is None:
+        print(f"Inference failed: {result[1]}")
+        return
+    _, timings["second inference"] = timed(lambda: engine.process_image(image))
+    timings["total until ready"] = sum(ms for step, ms in timings.items() if step != "second inference")
+
+    if args.json:
+        print(json.dumps({"tier": engine.tier, "loaded_at_import": loaded_at_import,
+                          "timings_ms": {step: round(ms, 1) for step, ms in timings.items()}}, indent=2))
+        return
+    print(f"Start-up of a '{engine.tier}' worker")
+    print(f"Heavy modules loaded by the import itself: {', '.join(loaded_at_import) or 'none'}")
+    for step, ms in timings.items():
+        print(f"{step:>28} {ms:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
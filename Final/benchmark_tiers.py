@@ -0,0 +1,79 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from ergonomic_assessment import AdvancedErgonomicAssessment, MODEL_TIERS
+
+
+def load_image_paths(image_folder):
+    return [os.path.join(image_folder, name) for name in sorted(os.listdir(image_folder))
+            if name.lower().endswith(('.jpg', '.jpeg', '.png'))]
+
+
+def run_tier(tier, image_paths):
+    """Analyze every image with one tier; returns latencies and what was found per image."""
+    engine = AdvancedErgonomicAssessment(tier=tier)
+    engine.warmup()
+
+    latencies, outcomes = [], []
+    for path in image_paths:
+        start = time.perf_counter()
+        pyramid, detected_objects, pose_landmarks, posture_measurements, lighting_info, glare_info = engine.analyze_image(path)
+        if pyramid is None:
+            latencies.append(np.nan)
+            outcomes.append(None)
+            continue
+        _, issues = engine.evaluate_ergonomics(detected_objects, posture_measurements, lighting_info, glare_info)
+        latencies.append(time.perf_counter() - start)
+        outcomes.append({
+            "objects": set(detected_objects),
+            "posture_detected": pose_landmarks is not None,
+            "issues": set(issues),
+        })
+    engine.pose.close()
+    return np.array(latencies) * 1000, outcomes
+
+
+def agreement(outcomes, reference):
+    """Mean object-set Jaccard, pose agreement and exact issue agreement against the reference tier."""
+    pairs = [(a, b) for a, b in zip(outcomes, reference) if a is not None and b is not None]
+    if not pairs:
+        return 0.0, 0.0, 0.0
+    jaccard = [len(a["objects"] & b["objects"]) / len(a["objects"] | b["objects"])
+               if a["objects"] | b["objects"] else 1.0 for a, b in pairs]
+    pose = [a["posture_detected"] == b["posture_detected"] for a, b in pairs]
+    issues = [a["issues"] == b["issues"] for a, b in pairs]
+    return float(np.mean(jaccard)), float(np.mean(pose)), float(np.mean(issues))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare latency and detection agreement of the model tiers.")
+    parser.add_argument("image_folder", help="Folder of sample images")
+    parser.add_argument("--tiers", default=",".join(MODEL_TIERS), help="Comma-separated tiers to benchmark")
+    parser.add_argument("--reference", default="accurate", help="Tier the others are compared against")
+    args = parser.parse_args()
+
+    image_paths = load_image_paths(args.image_folder)
+    if not image_paths:
+        print(f"No images found in {args.image_folder}")
+        return
+
+    tiers = [t.strip() for t in args.tiers.split(",") if t.strip()]
+    if args.reference not in tiers:
+        tiers.append(args.reference)
+    results = {tier: run_tier(tier, image_paths) for tier in tiers}
+    reference = results[args.reference][1]
+
+    print(f"\n{len(image_paths)} images, agreement measured against '{args.reference}'")
+    print(f"{'tier':>10} {'mean ms':>9} {'p95 ms':>9} {'objects':>8} {'pose':>6} {'issues':>7}")
+    for tier in tiers:
+        latencies, outcomes = results[tier]
+        objects, pose, issues = agreement(outcomes, reference)
+        print(f"{tier:>10} {np.nanmean(latencies):>9.1f} {np.nanpercentile(latencies, 95):>9.1f} "
+              f"{objects:>8.2f} {pose:>6.2f} {issues:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ import numpy as np
 from scipy.spatial import distance as dist
 from collections import deque
 from plyer import notification  # For desktop notifications
+from landmark_filter import OneEuroFilter
 
 # Initialize MediaPipe Face Mesh with optimized settings
 mp_face_mesh = mp.solutions.face_mesh
@@ -37,18 +38,25 @@ SLOW_BLINK_THRESHOLD = 10         # Below this → fatigue
 FAST_BLINK_THRESHOLD = 25         # Above this → stress
 NOTIFICATION_INTERVAL = 3600     # Notify every hour (3600 seconds) instead of 20 seconds
 EAR_THRESHOLD_ADJUSTMENT = 0.78   # Less strict threshold to catch fast blinks
+LANDMARK_FILTER_MIN_CUTOFF = 1.5  # Hz - steadies the drawn eye contours and the glasses check
+LANDMARK_FILTER_BETA = 30
+# The EAR is computed from the raw landmarks and filtered on its own: filtering the
+# landmarks at the cutoff that steadies the contours lags the eyelids enough to stretch
+# blinks past BLINK_DURATION_MAX_FRAMES.
+EAR_FILTER_MIN_CUTOFF = 5.0       # Hz
+EAR_FILTER_BETA = 0.5             # Per EAR unit per second
 
 # Variables
 blink_count = 0
 blink_frames = 0                  # Count frames during a blink instead of time
 last_notification_time = time.time()
 blinks_in_window = deque(maxlen=60)  # Track blinks over last 60 seconds
-ear_buffer = deque(maxlen=5)      # Reduced buffer size for faster response
 frame_counter = 0
 glasses_detected = False
 calibration_frames = 30
 ear_history = []
-prev_ear = None
+landmark_filter = OneEuroFilter(min_cutoff=LANDMARK_FILTER_MIN_CUTOFF, beta=LANDMARK_FILTER_BETA)
+ear_filter = OneEuroFilter(min_cutoff=EAR_FILTER_MIN_CUTOFF, beta=EAR_FILTER_BETA)
 in_blink = False
 debug_mode = True  # Enable debugging info
 
@@ -250,12 +258,11 @@ while cap.isOpened():
             # Display head tilt information
             tilt_text = f"Pitch: {head_rotation['pitch']:.2f}, Yaw: {head_rotation['yaw']:.2f}"
             
-            # Convert normalized coordinates to pixel coordinates
-            landmarks = []
-            for i in range(len(face_landmarks.landmark)):
-                x = int(face_landmarks.landmark[i].x * frame_width)
-                y = int(face_landmarks.landmark[i].y * frame_height)
-                landmarks.append((x, y))
+            # Convert normalized coordinates to pixel coordinates; the filtered copy (all landmarks
+            # in one call) is for drawing and the glasses check, the EAR uses the raw points
+            raw_points = np.array([(lm.x, lm.y) for lm in face_landmarks.landmark])
+            raw_landmarks = raw_points * (frame_width, frame_height)
+            landmarks = landmark_filter(raw_points, current_time) * (frame_width, frame_height)
             
             # Check if user is wearing glasses
             left_glasses = detect_glasses(landmarks, LEFT_EYE_CONTOUR)
@@ -263,15 +270,9 @@ while cap.isOpened():
             glasses_detected = left_glasses or right_glasses
             
             # Calculate EAR for both eyes with head tilt compensation
-            left_ear = calculate_ear(LEFT_EYE, landmarks, head_rotation)
-            right_ear = calculate_ear(RIGHT_EYE, landmarks, head_rotation)
-            avg_ear = (left_ear + right_ear) / 2
-            
-            # Fast response smoothing - basic averaging
-            if prev_ear is not None:
-                # Weighted average favoring new value for faster response
-                avg_ear = 0.7 * avg_ear + 0.3 * prev_ear
-            prev_ear = avg_ear
+            left_ear = calculate_ear(LEFT_EYE, raw_landmarks, head_rotation)
+            right_ear = calculate_ear(RIGHT_EYE, raw_landmarks, head_rotation)
+            avg_ear = float(ear_filter((left_ear + right_ear) / 2, current_time))
             
             # Calibration phase
             if frame_counter <= calibration_frames:
@@ -325,13 +326,12 @@ while cap.isOpened():
                 
                 # Draw eye landmarks
                 for i in LEFT_EYE + RIGHT_EYE:
-                    cv2.circle(frame, landmarks[i], 2, eye_color, -1)
+                    cv2.circle(frame, (int(landmarks[i][0]), int(landmarks[i][1])), 2, eye_color, -1)
                 
                 # Draw eye contours
                 for eye in [LEFT_EYE_CONTOUR, RIGHT_EYE_CONTOUR]:
-                    for i in range(len(eye)-1):
-                        cv2.line(frame, landmarks[eye[i]], landmarks[eye[i+1]], eye_color, 1)
-                    cv2.line(frame, landmarks[eye[-1]], landmarks[eye[0]], eye_color, 1)
+                    contour = landmarks[eye].astype(np.int32)
+                    cv2.polylines(frame, [contour], True, eye_color, 1)
 
     # Calculate BPM over last 60 seconds
     blinks_in_window = [t for t in blinks_in_window if time.time() - t <= 60]
@@ -0,0 +1,62 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:  # Memory figures are left out without psutil
+    psutil = None
+
+_process = psutil.Process(os.getpid()) if psutil is not None else None
+
+# One-time cost of every component built so far in this process (model loads, pose graphs,
+# the face cascade), keyed by component name
+build_costs = {}
+_build_costs_lock = threading.Lock()
+
+
+def _rss_mb():
+    return _process.memory_info().rss / (1024 * 1024) if _process is not None else None
+
+
+def _measurement(start, rss_before):
+    rss_after = _rss_mb()
+    return {
+        "ms": round((time.perf_counter() - start) * 1000, 2),
+        # Resident memory is process-wide, so concurrent requests show up in each other's figures
+        "rss_delta_mb": round(rss_after - rss_before, 2) if rss_after is not None else None,
+    }
+
+
+@contextmanager
+def measure_build(name):
+    """Record how long building a component took and how much resident memory it added."""
+    rss_before, start = _rss_mb(), time.perf_counter()
+    yield
+    measurement = _measurement(start, rss_before)
+    with _build_costs_lock:
+        build_costs[name] = measurement
+    print(f"Built {name} in {measurement['ms']:.0f} ms")
+
+
+class ComponentProfiler:
+    """Time and memory spent in each pipeline component while assessing one image."""
+
+    def __init__(self):
+        self.components = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def measure(self, name):
+        rss_before, start = _rss_mb(), time.perf_counter()
+        try:
+            yield
+        finally:
+            self.components[name] = _measurement(start, rss_before)
+
+    def report(self):
+        return {
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 2),
+            "components": self.components,
+        }
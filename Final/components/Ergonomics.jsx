@@ -1,10 +1,54 @@
 import { useState } from 'react';
 import axios from 'axios';
 import { motion } from 'framer-motion';
+import { useAuth } from '../contexts/authContext';
 
 const API_BASE_URL = 'http://localhost:5001'; // Update if your Flask server is hosted elsewhere
 
+// Draws the server's overlay shapes (in original-image pixels) on top of the uploaded photo
+function OverlayImage({ src, imageSize, overlay }) {
+  const [width, height] = imageSize;
+  return (
+    <div className="relative w-full">
+      <img src={src} alt="Analysis Result" className="w-full h-auto block" />
+      <svg
+        className="absolute inset-0 w-full h-full"
+        viewBox={`0 0 ${width} ${height}`}
+        preserveAspectRatio="none"
+      >
+        {overlay.glare_areas.map((points, i) => (
+          <polygon key={`glare-${i}`} points={points.map((p) => p.join(',')).join(' ')}
+            fill="none" stroke="#ff00ff" strokeWidth={width / 400} />
+        ))}
+        {overlay.connections.map(([a, b], i) => (
+          <line key={`bone-${i}`}
+            x1={overlay.landmarks[a][0]} y1={overlay.landmarks[a][1]}
+            x2={overlay.landmarks[b][0]} y2={overlay.landmarks[b][1]}
+            stroke="#ffffff" strokeWidth={width / 400} />
+        ))}
+        {overlay.landmarks.map(([x, y, visibility], i) => visibility > 0.5 && (
+          <circle key={`landmark-${i}`} cx={x} cy={y} r={width / 250} fill="#ff6a00" />
+        ))}
+        {overlay.boxes.map((box) => {
+          const [xMin, yMin, xMax, yMax] = box.bbox;
+          const color = box.inferred ? '#ff0000' : '#00ff00';
+          return (
+            <g key={box.label}>
+              <rect x={xMin} y={yMin} width={xMax - xMin} height={yMax - yMin}
+                fill="none" stroke={color} strokeWidth={width / (box.inferred ? 800 : 400)} />
+              <text x={xMin} y={yMin - width / 200} fill={color} fontSize={width / 60}>
+                {`${box.label} (${box.confidence.toFixed(2)})`}
+              </text>
+            </g>
+          );
+        })}
+      </svg>
+    </div>
+  );
+}
+
 function Ergonomics() {
+  const { currentUser } = useAuth();
   const [selectedFile, setSelectedFile] = useState(null);
   const [imagePreview, setImagePreview] = useState(null);
   const [analysisResult, setAnalysisResult] = useState(null);
@@ -47,31 +91,44 @@ function Ergonomics() {
     try {
       const formData = new FormData();
       formData.append('file', selectedFile);
+      // Ask for overlay shapes and draw them on the local preview instead of downloading a rendered image
+      formData.append('overlay', '1');
+      // Lets the server keep this user's measurements for trends over time
+      if (currentUser?.uid) {
+        formData.append('user_id', currentUser.uid);
+      }
 
-      // Step 1: Upload and process the image
-      const response = await axios.post(`${API_BASE_URL}/upload`, formData, {
+      // Step 1: Queue the image for analysis
+      const submitted = await axios.post(`${API_BASE_URL}/jobs`, formData, {
         headers: {
           'Content-Type': 'multipart/form-data'
         },
         timeout: 30000
       });
 
-      if (response.data.error) {
-        throw new Error(response.data.error);
+      // Step 2: Long-poll the job until the server has finished it
+      let job = submitted.data;
+      const deadline = Date.now() + 120000;
+      while (job.status === 'queued' || job.status === 'running') {
+        if (Date.now() > deadline) {
+          throw new Error('Request timed out. The analysis is taking too long.');
+        }
+        const poll = await axios.get(`${API_BASE_URL}/jobs/${job.job_id}`, {
+          params: { wait: 25 },
+          timeout: 35000
+        });
+        job = poll.data;
       }
 
-      // Step 2: Verify the result image exists
-      const resultUrl = `${API_BASE_URL}${response.data.result_path}`;
-      const imgCheck = await fetch(resultUrl);
-      
-      if (!imgCheck.ok) {
-        throw new Error('Result image not found on server');
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Error analyzing image. Please try again.');
       }
+      const response = { data: job.result };
 
-      // Step 3: Set the result with full URL
+      // Step 3: Show the result drawn over the uploaded image
       setAnalysisResult({
         ...response.data,
-        image_data: resultUrl
+        image_data: imagePreview
       });
 
     } catch (err) {
@@ -194,7 +251,13 @@ function Ergonomics() {
 
             {/* Result image with loading state */}
             <div className="border rounded overflow-hidden max-h-64 bg-gray-100 flex items-center justify-center">
-              {analysisResult.image_data ? (
+              {analysisResult.image_data && analysisResult.overlay ? (
+                <OverlayImage
+                  src={analysisResult.image_data}
+                  imageSize={analysisResult.image_size}
+                  overlay={analysisResult.overlay}
+                />
+              ) : analysisResult.image_data ? (
                 <img
                   src={analysisResult.image_data}
                   alt="Analysis Result"
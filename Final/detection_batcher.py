@@ -0,0 +1,219 @@
+import argparse
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from lazy_import import LazyModule
+from tflite_detector import letterbox
+
+# Imported on first use, so importing the server doesn't load TensorFlow
+tf = LazyModule("tensorflow")
+
+
+class _DetectionRequest:
+    def __init__(self, image_rgb):
+        self.image_rgb = image_rgb
+        self.submitted = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BatchingDetector:
+    """Collects concurrent detection requests and runs them through the model together.
+
+    The first request waits at most `max_queue_delay` seconds for others to arrive
+    (or until `max_batch_size` requests are queued). A batch of one is passed to the
+    model unchanged; larger batches are letterboxed into `input_size` squares, run as
+    a single [N, input_size, input_size, 3] call, and the boxes are mapped back to
+    each original image. Results keep the model's output format (tensors with a
+    leading batch dimension of 1), so callers can't tell whether they were batched.
+
+    Exported TF2 Object Detection API models usually only accept batch size 1; if the
+    model rejects a batch the detector falls back to running the images one by one.
+    """
+
+    def __init__(self, model, max_batch_size=4, max_queue_delay=0.005, input_size=512):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_queue_delay = max_queue_delay
+        self.input_size = input_size
+        self.batching_supported = max_batch_size > 1
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __call__(self, image_rgb):
+        """Detect objects in one RGB image; blocks until its batch has been processed."""
+        request = _DetectionRequest(image_rgb)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def close(self):
+        """Stop the batching thread once the requests already queued have been served."""
+        self._queue.put(None)
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._started = time.perf_counter()
+            self._batches = 0
+            self._images = 0
+            self._latencies = []
+
+    def stats(self):
+        """Throughput, batch size and latency figures since the last reset."""
+        with self._stats_lock:
+            elapsed = time.perf_counter() - self._started
+            latencies = np.array(self._latencies) * 1000
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_queue_delay_ms": self.max_queue_delay * 1000,
+                "batching_supported": self.batching_supported,
+                "batches": self._batches,
+                "images": self._images,
+                "avg_batch_size": self._images / self._batches if self._batches else 0.0,
+                "images_per_second": self._images / elapsed if elapsed > 0 else 0.0,
+                "latency_ms_p50": float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+                "latency_ms_p95": float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+            }
+
+    def _collect_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_queue_delay
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                # Put the stop marker back so the loop exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run_single(self, request):
+        input_tensor = tf.convert_to_tensor(request.image_rgb)[tf.newaxis, ...]
+        request.result = self.model(input_tensor)
+
+    def _run_batch(self, batch):
+        canvases, scales = zip(*(letterbox(r.image_rgb, self.input_size) for r in batch))
+        detections = self.model(tf.convert_to_tensor(np.stack(canvases)))
+
+        for i, request in enumerate(batch):
+            height, width = request.image_rgb.shape[:2]
+            # Boxes are normalized to the padded canvas; rescale them to the original image
+            y_factor = self.input_size / (height * scales[i])
+            x_factor = self.input_size / (width * scales[i])
+            boxes = detections["detection_boxes"][i:i + 1] * tf.constant([y_factor, x_factor, y_factor, x_factor],
+                                                                         dtype=tf.float32)
+            result = {key: value[i:i + 1] for key, value in detections.items()}
+            result["detection_boxes"] = tf.clip_by_value(boxes, 0.0, 1.0)
+            request.result = result
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            if batch is None:
+                return
+            try:
+                if len(batch) == 1 or not self.batching_supported:
+                    for request in batch:
+                        self._run_single(request)
+                else:
+                    try:
+                        self._run_batch(batch)
+                    except (tf.errors.InvalidArgumentError, ValueError) as e:
+                        print(f"Detector does not accept batches ({type(e).__name__}), running images one at a time")
+                        self.batching_supported = False
+                        for request in batch:
+                            self._run_single(request)
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+
+            finished = time.perf_counter()
+            with self._stats_lock:
+                self._batches += 1
+                self._images += len(batch)
+                self._latencies.extend(finished - r.submitted for r in batch)
+                # Keep the latency history bounded on long-running servers
+                del self._latencies[:-10000]
+            for request in batch:
+                request.done.set()
+
+
+def benchmark(image_folder, concurrency=8, batch_sizes=(1, 2, 4, 8), delays_ms=(2, 5, 10), rounds=3):
+    """Measure throughput and latency of each batch size / queue delay setting on local images."""
+    from ergonomic_assessment import load_object_model
+
+    images = []
+    for name in sorted(os.listdir(image_folder)):
+        if name.lower().endswith(('.jpg', '.jpeg', '.png')):
+            image = cv2.imread(os.path.join(image_folder, name))
+            if image is not None:
+                images.append(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    if not images:
+        print(f"No images found in {image_folder}")
+        return
+
+    model = load_object_model()
+    print(f"{'batch':>5} {'delay ms':>8} {'img/s':>8} {'avg batch':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for max_batch_size in batch_sizes:
+        for delay_ms in delays_ms:
+            detector = BatchingDetector(model, max_batch_size=max_batch_size, max_queue_delay=delay_ms / 1000)
+            detector(images[0])  # Warm up this configuration
+            detector.reset_stats()
+
+            work = queue.Queue()
+            for _ in range(rounds):
+                for image in images:
+                    work.put(image)
+
+            def client():
+                while True:
+                    try:
+                        image = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    detector(image)
+
+            clients = [threading.Thread(target=client) for _ in range(concurrency)]
+            for thread in clients:
+                thread.start()
+            for thread in clients:
+                thread.join()
+
+            stats = detector.stats()
+            detector.close()
+            print(f"{max_batch_size:>5} {delay_ms:>8} {stats['images_per_second']:>8.2f} {stats['avg_batch_size']:>9.2f} "
+                  f"{stats['latency_ms_p50']:>8.1f} {stats['latency_ms_p95']:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batched object detection settings.")
+    parser.add_argument("image_folder", help="Folder of sample images")
+    parser.add_argument("--concurrency", type=int, default=8, help="Simulated concurrent uploads")
+    parser.add_argument("--batch-sizes", default="1,2,4,8", help="Comma-separated max batch sizes to try")
+    parser.add_argument("--delays", default="2,5,10", help="Comma-separated max queue delays (ms) to try")
+    parser.add_argument("--rounds", type=int, default=3, help="Passes over the image folder per setting")
+    args = parser.parse_args()
+    benchmark(args.image_folder, args.concurrency,
+              [int(b) for b in args.batch_sizes.split(",")],
+              [float(d) for d in args.delays.split(",")],
+              args.rounds)
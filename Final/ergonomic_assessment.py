@@ -1,130 +1,323 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
 import os
+import queue
+import sys
+import threading
+import time
 import traceback
+from contextlib import contextmanager
 import cv2
 import numpy as np
-import tensorflow as tf
-from tkinter import Tk, filedialog
-import mediapipe as mp
-import matplotlib.pyplot as plt
-from PIL import Image
-import tarfile
-import urllib.request
-from scipy.spatial import distance
-
-# MediaPipe setup
-mp_drawing = mp.solutions.drawing_utils
-mp_pose = mp.solutions.pose
-mp_drawing_styles = mp.solutions.drawing_styles
-
-# Model details for object detection
-MODEL_NAME = "efficientdet_d0_coco17_tpu-32"
-MODEL_DIR = f"models/{MODEL_NAME}/saved_model"
-MODEL_TAR_URL = f"http://download.tensorflow.org/models/object_detection/tf2/20200711/{MODEL_NAME}.tar.gz"
+
+from component_profiler import ComponentProfiler, measure_build
+from stage_graph import Stage, select_stages, run_stages
+from image_stats import luminance_planes, brightness_stats, glare_regions, GLARE_MAX_SIZE, LUMINANCE_MAX_SIZE
+from image_pyramid import ImagePyramid
+from overlay import draw_text_panel, overlay_primitives
+from lazy_import import LazyModule
+from model_bundle import ensure_bundle
+from tflite_detector import TFLiteDetector
+from ergonomic_rules import extract_features, evaluate_record, record_to_dict
+
+# TensorFlow and MediaPipe are imported on first use, so callers only load what they run
+tf = LazyModule("tensorflow")
+mp_drawing = LazyModule("mediapipe.python.solutions.drawing_utils")
+mp_pose = LazyModule("mediapipe.python.solutions.pose")
+mp_drawing_styles = LazyModule("mediapipe.python.solutions.drawing_styles")
+
+# Model tiers trading accuracy for latency. The detector variant dominates the cost
+# (EfficientDet-D7 needs roughly 20x the compute of D0); the pose model complexity,
+# segmentation and the input resolution cap (long side in pixels, None = no extra cap)
+# make up the rest. detector_input_size is the detector's native input resolution, so
+# the detector is never fed more pixels than it uses.
+# Segmentation stays off in every tier: nothing reads the mask, it only costs time.
+MODEL_TIERS = {
+    "fast": {
+        "detector": "efficientdet_d0_coco17_tpu-32",
+        "detector_input_size": 512,
+        "model_complexity": 0,
+        "enable_segmentation": False,
+        "max_image_size": 640,
+    },
+    "standard": {
+        "detector": "efficientdet_d0_coco17_tpu-32",
+        "detector_input_size": 512,
+        "model_complexity": 2,
+        "enable_segmentation": False,
+        "max_image_size": None,
+    },
+    "accurate": {
+        "detector": "efficientdet_d7_coco17_tpu-32",
+        "detector_input_size": 1536,
+        "model_complexity": 2,
+        "enable_segmentation": False,
+        "max_image_size": None,
+    },
+}
+DEFAULT_TIER = os.environ.get("ERGONOMICS_MODEL_TIER", "standard")
+
+# How engines without a shared detector run EfficientDet: "saved_model" calls the TensorFlow
+# model eagerly, "tflite" runs the exported model at ERGONOMICS_TFLITE_QUANTIZATION (export
+# it first with tflite_detector.py; compare accuracy with benchmark_detector_runtime.py)
+DETECTOR_RUNTIME = os.environ.get("ERGONOMICS_DETECTOR_RUNTIME", "saved_model")
+TFLITE_QUANTIZATION = os.environ.get("ERGONOMICS_TFLITE_QUANTIZATION", "dynamic")
+TFLITE_THREADS = int(os.environ.get("ERGONOMICS_TFLITE_THREADS", 0)) or None
+# Which detector produced a result, so cached results of different runtimes are kept apart
+DETECTOR_VARIANT = f"tflite-{TFLITE_QUANTIZATION}" if DETECTOR_RUNTIME == "tflite" else DETECTOR_RUNTIME
+
+# Stages of analyze_image; callers can run a subset (e.g. only "lighting" for a quick check).
+# "face" and "posture_metrics" need "pose" and are dropped when it is disabled.
+ANALYSIS_STAGES = ("lighting", "glare", "detection", "pose", "face", "posture_metrics")
+
+# Long side (pixels) of the copies given to the pose model and drawn on for the result image.
+# Every stage gets the smallest copy that covers what it needs; see ImagePyramid.
+POSE_MAX_SIZE = 960
+DISPLAY_MAX_SIZE = 1280
+
+# COCO class ids of the equipment the assessment looks for
+EQUIPMENT_CATEGORY_INDEX = {
+    1: "person",
+    56: "desk",
+    57: "table",
+    58: "cabinet",
+    59: "shelf",
+    62: "chair",
+    63: "laptop",
+    64: "mouse",
+    66: "keyboard",
+    67: "cell phone",
+    72: "tv",
+    73: "computer",
+    76: "clock",
+    84: "book",
+}
+
+# Ergonomic reference values the assessment is judged against
+ERGONOMIC_REFERENCES = {
+    "neck_angle_threshold": 35,  # Degrees - greater is problematic
+    "shoulder_angle_threshold": 20,  # Degrees - greater is problematic
+    "minimum_viewing_distance": 50,  # Arbitrary units - should calibrate
+    "ideal_screen_height_ratio": 0.15,  # Ratio of screen top to eye level
+    "brightness_low_threshold": 70,
+    "brightness_high_threshold": 210,
+    "brightness_variance_threshold": 1500,  # Needs calibration - greater is uneven lighting
+    "laptop_below_eye_margin": 50,  # Pixels the laptop top may sit below eye level
+    "chair_desk_tolerance": 50,  # Pixels between chair and desk tops before the chair height is flagged
+}
+# Changes whenever a reference value does, so cached assessments made with old values aren't reused
+REFERENCES_VERSION = hashlib.sha256(json.dumps(ERGONOMIC_REFERENCES, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+def encode_result_image(image, quality=95):
+    """JPEG-encode a result image once, so the same bytes can be stored and sent inline."""
+    encoded, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes() if encoded else None
 
 # Function to save result image
 def save_result_image(image, output_path):
-    """Saves the result image to the specified path."""
+    """Saves the result image (an array, or bytes from encode_result_image) to the specified path."""
     try:
         # Get just the filename part
         filename = os.path.basename(output_path)
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         # Save the image
-        cv2.imwrite(output_path, image)
+        if isinstance(image, bytes):
+            with open(output_path, "wb") as f:
+                f.write(image)
+        else:
+            cv2.imwrite(output_path, image)
         return filename
     except Exception as e:
         print(f"Error saving image: {str(e)}")
         return None
 
-# Function to download and extract model - now separate from the class
-def download_model():
-    """Downloads and extracts the EfficientDet-D7 model if not already present."""
-    if not os.path.exists(MODEL_DIR):
-        print("Downloading EfficientDet-D7 model...")
-        os.makedirs("models", exist_ok=True)
-        tar_path = f"models/{MODEL_NAME}.tar.gz"
-        
-        urllib.request.urlretrieve(MODEL_TAR_URL, tar_path)
-
-        with tarfile.open(tar_path, "r:gz") as tar:
-            tar.extractall(path="models")
-
-        print("Model downloaded and extracted successfully!")
-    else:
-        print("Model already exists, skipping download.")
-
-# Object detection model - load once as a global variable
-object_model = None
+def get_tier(tier=None):
+    """Return (name, settings) for a model tier, falling back to DEFAULT_TIER."""
+    tier = tier or DEFAULT_TIER
+    if tier not in MODEL_TIERS:
+        raise ValueError(f"Unknown model tier '{tier}', expected one of: {', '.join(MODEL_TIERS)}")
+    return tier, MODEL_TIERS[tier]
+
+# Object detection models - loaded once per detector variant and shared by all engines
+object_models = {}
+
+def load_object_model(tier=None):
+    """Load the object detection model for a tier if it's not already loaded."""
+    _, settings = get_tier(tier)
+    model_name = settings["detector"]
+    if model_name not in object_models:
+        # Local bundle, size-checked against its manifest (see model_bundle.py); built on first use unless running offline
+        path = ensure_bundle(model_name)
+        print(f"Loading {model_name} model...")
+        with measure_build(model_name):
+            object_models[model_name] = tf.saved_model.load(path)
+    return object_models[model_name]
+
+# Haar face cascade for the no-pose fallback - parsed from disk once per process, on first use.
+# detectMultiScale isn't documented as thread-safe, so engines take turns with the shared copy.
+face_cascade = None
+face_cascade_lock = threading.Lock()
+
+def load_face_cascade():
+    global face_cascade
+    with face_cascade_lock:
+        if face_cascade is None:
+            with measure_build("face_cascade"):
+                face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    return face_cascade
+
+def filter_detections(detections, height, width, category_index):
+    """Turn raw detector output into the best box per known equipment class.
+
+    Each output tensor is copied to NumPy once and filtered with array masks,
+    instead of converting whole tensors again for every detection.
+    """
+    num_detections = int(np.asarray(detections["num_detections"]).reshape(-1)[0])
+    classes = np.asarray(detections["detection_classes"])[0, :num_detections].astype(np.int64)
+    scores = np.asarray(detections["detection_scores"])[0, :num_detections]
+    boxes = np.asarray(detections["detection_boxes"])[0, :num_detections]
+
+    keep = np.flatnonzero((scores > 0.5) & np.isin(classes, list(category_index)))
+    if keep.size == 0:
+        return {}
+
+    kept_classes = classes[keep]
+    # Boxes are [y_min, x_min, y_max, x_max] normalized; scale all of them at once
+    pixel_boxes = (boxes[keep] * np.array([height, width, height, width], dtype=np.float32)).astype(np.int64)
+
+    detected_objects = {}
+    # Visit classes in order of first appearance and keep the highest scoring box of each
+    _, first_positions = np.unique(kept_classes, return_index=True)
+    for position in np.sort(first_positions):
+        class_id = kept_classes[position]
+        candidates = np.flatnonzero(kept_classes == class_id)
+        best = candidates[np.argmax(scores[keep[candidates]])]
+
+        y_min, x_min, y_max, x_max = (int(v) for v in pixel_boxes[best])
+        detected_objects[category_index[int(class_id)]] = {
+            "confidence": float(scores[keep[best]]),
+            "bbox": [x_min, y_min, x_max, y_max],
+            "center": [(x_min + x_max) // 2, (y_min + y_max) // 2],
+            "dimensions": [x_max - x_min, y_max - y_min]
+        }
 
-def load_object_model():
-    """Load the object detection model if it's not already loaded."""
-    global object_model
-    if object_model is None:
-        # Ensure the model is downloaded
-        download_model()
-        print("Loading EfficientDet-D0 model...")
-        object_model = tf.saved_model.load(MODEL_DIR)
-    return object_model
+    return detected_objects
 
 class AdvancedErgonomicAssessment:
-    def __init__(self):
-        # Load object detection model for equipment - now using the global model
-        self.object_model = load_object_model()
-
-        # Initialize MediaPipe Pose model for body posture
-        self.pose = mp_pose.Pose(
-            static_image_mode=True,
-            model_complexity=2,
-            enable_segmentation=True,
-            min_detection_confidence=0.5
-        )
+    def __init__(self, detector=None, tier=None):
+        self.tier, self.settings = get_tier(tier)
+        self.max_image_size = self.settings["max_image_size"]
+
+        # Optional shared detector (e.g. a BatchingDetector) that takes an RGB image and
+        # returns the model's output dict; when None the model is called directly, or
+        # through this engine's own TFLite interpreter with the "tflite" runtime
+        self.detector = detector
+        # Components are built on first use, so an engine only pays for what it runs
+        self._object_model = None
+        self._pose = None
+        self._tracking_pose = None
+        # Set once a stream has used the tracking graph; see reset_tracking_pose
+        self.tracking_pose_used = False
 
         # Extended category index for equipment detection
-        self.category_index = {
-            1: "person",
-            56: "desk",
-            57: "table",
-            58: "cabinet",
-            59: "shelf",
-            62: "chair",
-            63: "laptop",
-            64: "mouse",
-            66: "keyboard",
-            67: "cell phone",
-            72: "tv",
-            73: "computer",
-            76: "clock",
-            84: "book",
-        }
+        self.category_index = dict(EQUIPMENT_CATEGORY_INDEX)
         
         # Define ergonomic reference values
-        self.ergonomic_references = {
-            "neck_angle_threshold": 35,  # Degrees - greater is problematic
-            "shoulder_angle_threshold": 20,  # Degrees - greater is problematic
-            "minimum_viewing_distance": 50,  # Arbitrary units - should calibrate
-            "ideal_screen_height_ratio": 0.15,  # Ratio of screen top to eye level
-            "brightness_low_threshold": 70,
-            "brightness_high_threshold": 210,
-        }
+        self.ergonomic_references = dict(ERGONOMIC_REFERENCES)
     
-    def process_image(self, image_path):
-        """Process an image and return results in format expected by app.py"""
+    @property
+    def object_model(self):
+        """The tier's detection model (shared by all engines in the process)."""
+        if self._object_model is None:
+            self._object_model = load_object_model(self.tier)
+        return self._object_model
+
+    @property
+    def pose(self):
+        """This engine's MediaPipe Pose graph; graphs aren't thread-safe, so each engine has its own."""
+        if self._pose is None:
+            with measure_build(f"pose_complexity_{self.settings['model_complexity']}"):
+                self._pose = mp_pose.Pose(
+                    static_image_mode=True,
+                    model_complexity=self.settings["model_complexity"],
+                    enable_segmentation=self.settings["enable_segmentation"],
+                    min_detection_confidence=0.5
+                )
+        return self._pose
+
+    @property
+    def tracking_pose(self):
+        """This engine's MediaPipe Pose graph in tracking mode, for video (see video_assessment.py).
+
+        The graph carries landmarks over from one frame to the next, so it has to be reset
+        before it sees another stream; AssessmentPool does that when the engine comes back.
+        """
+        if self._tracking_pose is None:
+            with measure_build(f"pose_tracking_complexity_{self.settings['model_complexity']}"):
+                self._tracking_pose = mp_pose.Pose(
+                    static_image_mode=False,
+                    model_complexity=self.settings["model_complexity"],
+                    enable_segmentation=False,
+                    min_detection_confidence=0.5,
+                    min_tracking_confidence=0.5,
+                )
+        self.tracking_pose_used = True
+        return self._tracking_pose
+
+    def reset_tracking_pose(self):
+        """Clear the tracking graph's state from the last stream; the model stays loaded."""
+        if self._tracking_pose is not None:
+            self._tracking_pose.reset()
+        self.tracking_pose_used = False
+
+    def warmup(self):
+        """Run the detector and pose graph once on a dummy image so the first real request doesn't pay for initialization."""
+        dummy_image = np.zeros((480, 640, 3), dtype=np.uint8)
+        self.detect_objects(dummy_image)
+        self.pose.process(dummy_image)
+    
+    def process_image(self, image_path, stages=None, render=True, on_features=None):
+        """Process an image (a file path or the encoded image bytes) and return results in format expected by app.py
+
+        With render=False no result image is drawn: the first return value is None and
+        response_data["overlay"] holds the boxes, landmarks and text for the client to draw.
+        Failures are signalled by response_data being None. on_features, if given, is
+        called with the raw analysis outputs (see feature_store.assessment_row) once the
+        assessment is done.
+        """
         try:
+            profiler = ComponentProfiler()
+            stages = set(ANALYSIS_STAGES if stages is None else stages)
             # Analyze image
-            image, detected_objects, pose_landmarks, posture_measurements, lighting_info, glare_info = self.analyze_image(image_path)
+            pyramid, detected_objects, pose_landmarks, posture_measurements, lighting_info, glare_info = self.analyze_image(
+                image_path, profiler, stages, render
+            )
             
-            if image is None:
+            if pyramid is None:
                 return None, "Error processing image: Could not read image.", None
             
-            # Evaluate ergonomics
-            recommendations, issues = self.evaluate_ergonomics(
-                detected_objects, posture_measurements, lighting_info, glare_info
-            )
+            # Evaluate ergonomics on the flat feature record, which is returned too so the
+            # assessment can be re-scored later without running the models (see ergonomic_rules.py)
+            with profiler.measure("evaluate"):
+                features = extract_features(detected_objects, posture_measurements, lighting_info, glare_info, stages)
+                recommendations, issues = evaluate_record(features, self.ergonomic_references)
             
             # Create visualization
-            result_image = self.visualize_results(
-                image, detected_objects, pose_landmarks, recommendations, glare_info[1]
-            )
+            with profiler.measure("visualize"):
+                if render:
+                    display_image = pyramid.level(self.stage_sizes()["display"])
+                    result_image = self.visualize_results(
+                        display_image, detected_objects, pose_landmarks, recommendations, glare_info[1],
+                        scale=pyramid.scale(display_image)
+                    )
+                else:
+                    result_image = None
+                    overlay = self.overlay_primitives(
+                        detected_objects, pose_landmarks, recommendations, glare_info[1], pyramid.original_size
+                    )
             
             # Prepare response data
             response_data = {
@@ -132,11 +325,36 @@ class AdvancedErgonomicAssessment:
                 "issues": issues,
                 "detected_objects": list(detected_objects.keys()) if detected_objects else [],
                 "posture_detected": pose_landmarks is not None,
+                "model_tier": self.tier,
+                "image_size": list(pyramid.original_size),
+                "stages": [stage for stage in ANALYSIS_STAGES if stage in stages],
                 "lighting_info": {
                     "avg_brightness": float(lighting_info["avg_brightness"]),
                     "brightness_variance": float(lighting_info["brightness_variance"])
-                } if lighting_info else {}
+                } if lighting_info else {},
+                "features": record_to_dict(features),
+                "profile": profiler.report()
             }
+            if not render:
+                response_data["overlay"] = overlay
+            
+            if on_features is not None:
+                try:
+                    on_features({
+                        "tier": self.tier,
+                        "image_size": pyramid.original_size,
+                        "features": features,
+                        "detected_objects": detected_objects,
+                        "pose_landmarks": pose_landmarks,
+                        "lighting_info": lighting_info,
+                        "glare_info": glare_info,
+                        "glare_checked": "glare" in stages,
+                        "profile": response_data["profile"],
+                    })
+                except Exception as e:
+                    # Keeping the measurements must never cost the user their assessment
+                    print(f"Error storing assessment features: {str(e)}")
+                    traceback.print_exc()
             
             return result_image, recommendations, response_data
             
@@ -146,85 +364,119 @@ class AdvancedErgonomicAssessment:
             traceback.print_exc()
             return None, error_msg, None
 
-    def analyze_image(self, image_path):
-        """Perform comprehensive analysis on the image."""
+    def stage_sizes(self):
+        """Long side in pixels each stage works at, capped by the tier's max_image_size."""
+        sizes = {
+            "detection": self.settings["detector_input_size"],
+            "pose": POSE_MAX_SIZE,
+            "luminance": LUMINANCE_MAX_SIZE,
+            "glare": GLARE_MAX_SIZE,
+            "display": DISPLAY_MAX_SIZE,
+        }
+        if self.max_image_size is not None:
+            sizes = {stage: min(size, self.max_image_size) for stage, size in sizes.items()}
+        return sizes
+
+    def decode_size(self, stages=None, render=True):
+        """Long side to decode an upload at: the largest copy the given stages (and the result image) read."""
+        stages = set(ANALYSIS_STAGES if stages is None else stages)
+        sizes = self.stage_sizes()
+        used_sizes = [sizes[name] for name in ("detection", "pose", "glare") if name in stages]
+        if "lighting" in stages:
+            used_sizes.append(sizes["luminance"])
+        if render:
+            used_sizes.append(sizes["display"])
+        return max(used_sizes, default=sizes["pose"])
+
+    def analyze_image(self, image_path, profiler=None, stages=None, render=True):
+        """Perform comprehensive analysis on the image, running independent stages in parallel.
+
+        image_path may also be the encoded image bytes. Returns the image pyramid in place
+        of the image; all coordinates in the results refer to the original image's pixels.
+        Only the copies the selected stages use are made; render=False also skips
+        decoding at the display size when no stage needs that much.
+        """
         print("Analyzing image for ergonomic assessment...")
-
-        # Read image
-        image = cv2.imread(image_path)
-        if image is None:
+        profiler = profiler or ComponentProfiler()
+        stages = set(ANALYSIS_STAGES if stages is None else stages)
+        # Lighting and glare share one pass over the image ("luminance")
+        if stages & {"lighting", "glare"}:
+            stages = stages | {"luminance"}
+        sizes = self.stage_sizes()
+
+        # Decode once, at the reduced size that covers the largest copy needed
+        with profiler.measure("decode"):
+            pyramid = ImagePyramid.load(image_path, self.decode_size(stages, render))
+        if pyramid is None:
             print("Error: Could not read image.")
             return None, None, None, None, None, None
-
-        # Convert image to RGB for MediaPipe
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        height, width, _ = image.shape
-
-        # Assess lighting
-        lighting_info = self.analyze_lighting(image)
-        
-        # Analyze screen glare
-        glare_detected, glare_areas = self.detect_glare(image)
-        
-        # Detect objects with EfficientDet
-        detected_objects = self.detect_objects(image_rgb)
-        
-        # Analyze posture with MediaPipe
-        pose_results = self.pose.process(image_rgb)
-        pose_landmarks = pose_results.pose_landmarks
-        
-        # If no pose detected, try to detect just a face
-        if pose_landmarks is None:
-            print("No full body pose detected, trying face detection...")
-            face_detected = self.detect_face(image_rgb)
-            if not face_detected:
-                print("No face detected. Posture analysis will be limited.")
-        
-        # Get posture measurements if landmarks are detected
-        posture_measurements = None
-        if pose_landmarks:
-            posture_measurements = self.measure_posture(pose_landmarks, width, height)
-        
-        return image, detected_objects, pose_landmarks, posture_measurements, lighting_info, (glare_detected, glare_areas)
-
-    def detect_objects(self, image_rgb):
-        """Detect objects in the image using EfficientDet."""
+        width, height = pyramid.original_size
+
+        # Each stage makes the copy it reads on first use; detection and pose (and the
+        # face fallback, which shares the pose copy) need it in RGB
+        rgb_lock = threading.Lock()
+        rgb_copies = {}
+
+        def rgb(name):
+            with rgb_lock:
+                if name not in rgb_copies:
+                    rgb_copies[name] = cv2.cvtColor(pyramid.level(sizes[name]), cv2.COLOR_BGR2RGB)
+                return rgb_copies[name]
+
+        def luminance(results):
+            luminance_image = pyramid.level(sizes["glare" if "glare" in stages else "luminance"])
+            value, glare_mask = luminance_planes(luminance_image, sizes["luminance"])
+            return value, glare_mask, pyramid.scale(luminance_image)
+
+        # Lighting, glare, object detection and pose only read the image, so they run
+        # concurrently; the face fallback and posture measurements wait for the pose.
+        graph = select_stages([
+            Stage("luminance", luminance),
+            Stage("lighting", lambda results: self.analyze_lighting(None, results["luminance"]),
+                  requires=["luminance"]),
+            Stage("glare", lambda results: self.detect_glare(None, results["luminance"]),
+                  requires=["luminance"]),
+            Stage("detection", lambda results: self.detect_objects(rgb("detection"), pyramid.original_size)),
+            Stage("pose", lambda results: self.pose.process(rgb("pose")).pose_landmarks),
+            Stage("face", lambda results: self.face_fallback(results["pose"], rgb("pose")), requires=["pose"]),
+            Stage("posture_metrics", lambda results: self.measure_posture(results["pose"], width, height)
+                  if results["pose"] else None, requires=["pose"]),
+        ], stages)
+        results = run_stages(graph, profiler)
+
+        return (pyramid, results.get("detection", {}), results.get("pose"), results.get("posture_metrics"),
+                results.get("lighting"), results.get("glare", (False, [])))
+
+    def face_fallback(self, pose_landmarks, image_rgb):
+        """If no pose was detected, check whether there's at least a face in the image."""
+        if pose_landmarks is not None:
+            return None
+        print("No full body pose detected, trying face detection...")
+        face_detected = self.detect_face(image_rgb)
+        if not face_detected:
+            print("No face detected. Posture analysis will be limited.")
+        return face_detected
+
+    def detect_objects(self, image_rgb, image_size=None):
+        """Detect objects in the image using EfficientDet.
+
+        Boxes are in pixels of image_size (width, height) when given, e.g. the original
+        upload when image_rgb is a downscaled copy.
+        """
         height, width, _ = image_rgb.shape
-        input_tensor = tf.convert_to_tensor(image_rgb)[tf.newaxis, ...]
-        detections = self.object_model(input_tensor)
-
-        detected_objects = {}
-        num_detections = int(detections["num_detections"].numpy()[0])
-
-        for i in range(num_detections):
-            class_id = int(detections["detection_classes"].numpy()[0][i])
-            confidence = float(detections["detection_scores"].numpy()[0][i])
-
-            if confidence > 0.5 and class_id in self.category_index:
-                obj_class = self.category_index[class_id]
-                bbox = detections["detection_boxes"].numpy()[0][i]
-
-                y_min = int(bbox[0] * height)
-                x_min = int(bbox[1] * width)
-                y_max = int(bbox[2] * height)
-                x_max = int(bbox[3] * width)
-
-                # If object already exists with lower confidence, replace it
-                if obj_class in detected_objects:
-                    if detected_objects[obj_class]["confidence"] < confidence:
-                        detected_objects[obj_class] = {
-                            "confidence": confidence,
-                            "bbox": [x_min, y_min, x_max, y_max],
-                            "center": [(x_min + x_max) // 2, (y_min + y_max) // 2],
-                            "dimensions": [x_max - x_min, y_max - y_min]
-                        }
-                else:
-                    detected_objects[obj_class] = {
-                        "confidence": confidence,
-                        "bbox": [x_min, y_min, x_max, y_max],
-                        "center": [(x_min + x_max) // 2, (y_min + y_max) // 2],
-                        "dimensions": [x_max - x_min, y_max - y_min]
-                    }
+        if image_size is not None:
+            width, height = image_size
+        if self.detector is None and DETECTOR_RUNTIME == "tflite":
+            with measure_build(f"{self.settings['detector']}_tflite_{TFLITE_QUANTIZATION}"):
+                self.detector = TFLiteDetector.load(self.settings["detector"], self.settings["detector_input_size"],
+                                                    TFLITE_QUANTIZATION, TFLITE_THREADS)
+        if self.detector is not None:
+            detections = self.detector(image_rgb)
+        else:
+            input_tensor = tf.convert_to_tensor(image_rgb)[tf.newaxis, ...]
+            detections = self.object_model(input_tensor)
+
+        detected_objects = filter_detections(detections, height, width, self.category_index)
 
         # If desk wasn't detected but laptop was, infer a desk surface
         if ("desk" not in detected_objects and "table" not in detected_objects) and "laptop" in detected_objects:
@@ -249,68 +501,23 @@ class AdvancedErgonomicAssessment:
 
     def detect_face(self, image_rgb):
         """Detect face when full pose estimation fails."""
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        cascade = load_face_cascade()
         gray = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2GRAY)
-        faces = face_cascade.detectMultiScale(gray, 1.1, 4)
+        with face_cascade_lock:
+            faces = cascade.detectMultiScale(gray, 1.1, 4)
         
         return len(faces) > 0
 
-    def analyze_lighting(self, image):
+    def analyze_lighting(self, image, planes=None):
         """Analyze lighting conditions in the image."""
-        # Convert to HSV for better light analysis
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        h, s, v = cv2.split(hsv)
-        
-        # Analyze value channel (brightness)
-        avg_brightness = np.mean(v)
-        min_brightness = np.min(v)
-        max_brightness = np.max(v)
-        std_brightness = np.std(v)
-        
-        # Calculate brightness distribution across image quadrants
-        height, width = v.shape
-        quadrants = [
-            v[0:height//2, 0:width//2],           # Top-left
-            v[0:height//2, width//2:width],       # Top-right
-            v[height//2:height, 0:width//2],      # Bottom-left
-            v[height//2:height, width//2:width]   # Bottom-right
-        ]
-        
-        quadrant_brightness = [np.mean(q) for q in quadrants]
-        brightness_variance = np.var(quadrant_brightness)
-        
-        lighting_info = {
-            "avg_brightness": avg_brightness,
-            "min_brightness": min_brightness,
-            "max_brightness": max_brightness,
-            "std_brightness": std_brightness,
-            "quadrant_brightness": quadrant_brightness,
-            "brightness_variance": brightness_variance
-        }
-        
+        value = planes[0] if planes else luminance_planes(image)[0]
+        lighting_info, _ = brightness_stats(value)
         return lighting_info
 
-    def detect_glare(self, image):
+    def detect_glare(self, image, planes=None):
         """Detect potential glare on screens."""
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Threshold for bright areas
-        _, thresh = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY)
-        
-        # Find contours of bright areas
-        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        # Filter contours by size
-        glare_areas = []
-        min_glare_area = 50  # Minimum pixel area to consider as glare
-        
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            if area > min_glare_area:
-                glare_areas.append(contour)
-        
-        return len(glare_areas) > 0, glare_areas
+        _, glare_mask, scale = planes or (*luminance_planes(image), 1.0)
+        return glare_regions(glare_mask, scale)
 
     def measure_posture(self, landmarks, image_width, image_height):
         """Measure various aspects of posture from pose landmarks."""
@@ -378,7 +585,7 @@ class AdvancedErgonomicAssessment:
         viewing_distance = None
         if eye_midpoint and nose:
             # This is just a proxy, needs calibration for real distance
-            viewing_distance = distance.euclidean(eye_midpoint, nose)
+            viewing_distance = float(np.hypot(eye_midpoint[0] - nose[0], eye_midpoint[1] - nose[1]))
         
         # Return all measurements
         posture_measurements = {
@@ -393,129 +600,17 @@ class AdvancedErgonomicAssessment:
         
         return posture_measurements
 
-    def evaluate_ergonomics(self, detected_objects, posture_measurements, lighting_info, glare_info):
-        """Evaluate ergonomic conditions and provide recommendations."""
-        recommendations = []
-        issues = []
-        
-        # Check if we have enough data for evaluation
-        if not detected_objects and not posture_measurements:
-            recommendations.append("Not enough information detected for a complete assessment. Try a clearer image showing both person and workspace.")
-            return recommendations, issues
-        
-        # 1. Neck angle assessment
-        if posture_measurements and posture_measurements["neck_angle"] is not None:
-            neck_angle = posture_measurements["neck_angle"]
-            if neck_angle > self.ergonomic_references["neck_angle_threshold"]:
-                recommendations.append(f"Your neck is bent at approximately {neck_angle:.1f}° which exceeds the recommended {self.ergonomic_references['neck_angle_threshold']}°. Raise your screen or adjust your posture to reduce neck strain.")
-                issues.append("neck_angle_excessive")
-        
-        # 2. Shoulder posture assessment
-        if posture_measurements and posture_measurements["shoulder_angle"] is not None:
-            shoulder_angle = posture_measurements["shoulder_angle"]
-            if shoulder_angle > self.ergonomic_references["shoulder_angle_threshold"]:
-                recommendations.append(f"Your shoulders appear to be uneven or hunched. Try relaxing your shoulders and sitting up straight.")
-                issues.append("shoulders_uneven")
-        
-        # 3. Screen height assessment
-        if posture_measurements and posture_measurements["eye_midpoint"] and ("laptop" in detected_objects or "computer" in detected_objects):
-            eye_y = posture_measurements["eye_midpoint"][1]
-            
-            # Get screen position
-            screen = detected_objects.get("laptop", detected_objects.get("computer", None))
-            if screen:
-                screen_top = screen["bbox"][1]  # Y-min (top) of screen
-                screen_bottom = screen["bbox"][3]  # Y-max (bottom) of screen
-                
-                # Check if screen is too low
-                if screen_top > eye_y:
-                    recommendations.append("Your screen is positioned too low. The top of your screen should be at or slightly below eye level to maintain proper neck posture.")
-                    issues.append("screen_too_low")
-                
-                # Check if screen is too high
-                elif screen_bottom < eye_y:
-                    recommendations.append("Your screen is positioned too high. Lower your screen so your eyes align with the top portion of the screen.")
-                    issues.append("screen_too_high")
-        
-        # 4. Desk and laptop detection special case
-        if "laptop" in detected_objects and not any(k in detected_objects for k in ["desk", "table", "inferred_desk"]):
-            recommendations.append("It appears your laptop is not on a proper desk or table. Using a laptop on your lap or unsuitable surface can lead to poor posture and ergonomic issues.")
-            issues.append("improper_laptop_surface")
-        
-        # 5. Laptop on desk height assessment
-        if "laptop" in detected_objects and any(k in detected_objects for k in ["desk", "table", "inferred_desk"]):
-            laptop = detected_objects["laptop"]
-            desk_key = next((k for k in ["desk", "table", "inferred_desk"] if k in detected_objects), None)
-            desk = detected_objects[desk_key]
-            
-            laptop_bottom = laptop["bbox"][3]  # Y-max (bottom) of laptop
-            desk_top = desk["bbox"][1]  # Y-min (top) of desk
-            
-            # Check if laptop is at correct height on desk
-            if posture_measurements and posture_measurements["eye_midpoint"]:
-                eye_y = posture_measurements["eye_midpoint"][1]
-                laptop_top = laptop["bbox"][1]  # Y-min (top) of laptop
-                
-                if laptop_top > eye_y + 50:  # Laptop screen is significantly below eye level
-                    recommendations.append("Your laptop screen is too low relative to your eye level. Consider using a laptop stand or books to raise it, and a separate keyboard and mouse for typing.")
-                    issues.append("laptop_too_low")
-        
-        # 6. Lighting assessment
-        if lighting_info:
-            avg_brightness = lighting_info["avg_brightness"]
-            brightness_variance = lighting_info["brightness_variance"]
-            
-            if avg_brightness < self.ergonomic_references["brightness_low_threshold"]:
-                recommendations.append("Your workspace appears to be too dark (average brightness: {:.1f}). Increase lighting to reduce eye strain.".format(avg_brightness))
-                issues.append("lighting_too_dim")
-            
-            elif avg_brightness > self.ergonomic_references["brightness_high_threshold"]:
-                recommendations.append("Your workspace appears to be too bright (average brightness: {:.1f}). Reduce brightness or adjust lighting to prevent eye strain.".format(avg_brightness))
-                issues.append("lighting_too_bright")
-            
-            if brightness_variance > 1500:  # Threshold needs calibration
-                recommendations.append("Your workspace has uneven lighting. Try to distribute light sources more evenly to reduce eye strain from constantly adjusting to different brightness levels.")
-                issues.append("uneven_lighting")
-        
-        # 7. Screen glare assessment
-        glare_detected, glare_areas = glare_info
-        if glare_detected and ("laptop" in detected_objects or "computer" in detected_objects):
-            recommendations.append("Screen glare detected. Adjust your screen angle or light sources to reduce reflections that can cause eye strain.")
-            issues.append("screen_glare")
-        
-        # 8. Viewing distance assessment
-        if posture_measurements and posture_measurements["viewing_distance"] is not None:
-            view_dist = posture_measurements["viewing_distance"]
-            if view_dist < self.ergonomic_references["minimum_viewing_distance"]:
-                recommendations.append("You appear to be sitting too close to your screen. Maintain an arm's length distance to reduce eye strain.")
-                issues.append("screen_too_close")
-        
-        # If there are detected objects but no person/posture detected
-        if detected_objects and not posture_measurements:
-            if "chair" in detected_objects and any(k in detected_objects for k in ["desk", "table"]):
-                desk_key = next((k for k in ["desk", "table"] if k in detected_objects), None)
-                chair = detected_objects["chair"]
-                desk = detected_objects[desk_key]
-                
-                chair_top = chair["bbox"][1]
-                desk_top = desk["bbox"][1]
-                
-                if abs(chair_top - desk_top) > 50:  # Arbitrary threshold
-                    if chair_top > desk_top:
-                        recommendations.append("The chair appears to be too low relative to the desk. Adjust chair height so elbows are level with the desk when seated.")
-                        issues.append("chair_too_low")
-                    else:
-                        recommendations.append("The chair appears to be too high relative to the desk. Lower the chair so elbows are level with the desk when seated.")
-                        issues.append("chair_too_high")
-        
-        # If no issues found, provide positive feedback
-        if not recommendations:
-            recommendations.append("Your workspace appears to be ergonomically well set up!")
-        
-        return recommendations, issues
+    def evaluate_ergonomics(self, detected_objects, posture_measurements, lighting_info, glare_info, stages=None):
+        """Evaluate ergonomic conditions and provide recommendations (the rules are in ergonomic_rules.RULES)."""
+        features = extract_features(detected_objects, posture_measurements, lighting_info, glare_info, stages)
+        return evaluate_record(features, self.ergonomic_references)
+
+    def visualize_results(self, image, detected_objects, pose_landmarks, recommendations, glare_areas=None, scale=1.0):
+        """Create visualization of assessment results.
 
-    def visualize_results(self, image, detected_objects, pose_landmarks, recommendations, glare_areas=None):
-        """Create visualization of assessment results."""
+        scale maps the coordinates in detected_objects and glare_areas to image's pixels
+        (original size / image size when drawing on a downscaled copy).
+        """
         # Create a copy of the image for drawing
         output_image = image.copy()
         
@@ -531,7 +626,7 @@ class AdvancedErgonomicAssessment:
         # Draw detected objects
         if detected_objects:
             for obj_name, obj_data in detected_objects.items():
-                x_min, y_min, x_max, y_max = obj_data['bbox']
+                x_min, y_min, x_max, y_max = (round(v / scale) for v in obj_data['bbox'])
                 confidence = obj_data['confidence']
                 
                 # Use different color if object was inferred
@@ -545,56 +640,18 @@ class AdvancedErgonomicAssessment:
         
         # Draw glare areas if available
         if glare_areas:
+            if scale != 1.0:
+                glare_areas = [np.round(contour / scale).astype(np.int32) for contour in glare_areas]
             cv2.drawContours(output_image, glare_areas, -1, (255, 0, 255), 2)
         
-        # Improve visibility of text by adding a semi-transparent background
-        # First, make a copy of the image for the text overlay
-        text_overlay = np.zeros_like(output_image)
-        
-        # Add recommendations with better visibility
-        y_offset = 30
-        for i, rec in enumerate(recommendations):
-            # Format long recommendations to fit on screen
-            if len(rec) > 60:
-                words = rec.split()
-                lines = []
-                current_line = words[0]
-                
-                for word in words[1:]:
-                    if len(current_line + " " + word) < 60:
-                        current_line += " " + word
-                    else:
-                        lines.append(current_line)
-                        current_line = word
-                
-                if current_line:
-                    lines.append(current_line)
-                
-                for j, line in enumerate(lines):
-                    # Draw background rectangle
-                    text_size = cv2.getTextSize(line, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-                    cv2.rectangle(text_overlay, (5, y_offset + j*30 - 20), 
-                                 (10 + text_size[0], y_offset + j*30 + 5), (0, 0, 0), -1)
-                    # Draw text
-                    cv2.putText(text_overlay, line, (10, y_offset + j*30), 
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                
-                y_offset += len(lines) * 30
-            else:
-                # Draw background rectangle
-                text_size = cv2.getTextSize(rec, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-                cv2.rectangle(text_overlay, (5, y_offset - 20), 
-                             (10 + text_size[0], y_offset + 5), (0, 0, 0), -1)
-                # Draw text
-                cv2.putText(text_overlay, rec, (10, y_offset), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                y_offset += 30
-        
-        # Blend the text overlay with the original image
-        alpha = 0.7  # Transparency factor
-        output_image = cv2.addWeighted(output_image, 1.0, text_overlay, alpha, 0)
-        
-        return output_image
+        # Add recommendations on a semi-transparent panel, blended only where the panel is
+        return draw_text_panel(output_image, recommendations)
+
+    def overlay_primitives(self, detected_objects, pose_landmarks, recommendations, glare_areas, image_size):
+        """The shapes visualize_results draws, in original-image pixels, for clients that render them."""
+        width, height = image_size
+        landmarks = [(lm.x * width, lm.y * height, lm.visibility) for lm in pose_landmarks.landmark] if pose_landmarks else []
+        return overlay_primitives(detected_objects, landmarks, mp_pose.POSE_CONNECTIONS, recommendations, glare_areas)
 
     def display_results(self, result_image):
         """Display assessment results with improved visibility."""
@@ -619,50 +676,148 @@ class AdvancedErgonomicAssessment:
         
         return result_image
 
+class AssessmentPool:
+    """A fixed set of pre-warmed assessment engines shared between request threads.
+
+    Each engine owns its own MediaPipe Pose graphs, so a request checks one out for the
+    duration of its analysis and concurrent requests never share a graph. An engine whose
+    tracking graph was used for a video is reset on a background thread before it goes
+    back into the pool, so the next clip starts clean without the request waiting.
+    """
+
+    def __init__(self, size=2, warmup=True, detector=None, tier=None):
+        self.size = size
+        self.tier, _ = get_tier(tier)
+        self._engines = queue.Queue()
+        for i in range(size):
+            print(f"Preparing {self.tier} assessment engine {i + 1}/{size}...")
+            engine = AdvancedErgonomicAssessment(detector=detector, tier=self.tier)
+            if warmup:
+                engine.warmup()
+            self._engines.put(engine)
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        """Borrow an engine; raises queue.Empty if none becomes free within the timeout."""
+        engine = self._engines.get(timeout=timeout)
+        try:
+            yield engine
+        finally:
+            if engine.tracking_pose_used:
+                threading.Thread(target=self._recycle, args=(engine,), daemon=True).start()
+            else:
+                self._engines.put(engine)
+
+    def _recycle(self, engine):
+        try:
+            engine.reset_tracking_pose()
+        finally:
+            self._engines.put(engine)
+
 def select_image():
     """Allow user to select an image file."""
+    from tkinter import Tk, filedialog
     root = Tk()
     root.withdraw()
     return filedialog.askopenfilename(title="Select an image file", filetypes=[("Image Files", "*.jpg;*.jpeg;*.png")])
 
-def batch_process_images(folder_path, output_folder="results"):
-    """Process all images in a folder."""
-    # Load model once before processing multiple images
-    load_object_model()
-    
-    assessment = AdvancedErgonomicAssessment()
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Engine owned by each batch worker process, created once by _init_batch_worker
+_batch_engine = None
+
+def _init_batch_worker(tier, tf_threads):
+    global _batch_engine
+    if tf_threads:
+        # Split the CPU between workers instead of every TF runtime claiming all cores
+        tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    _batch_engine = AdvancedErgonomicAssessment(tier=tier)
+    _batch_engine.warmup()
+
+def _process_batch_image(task):
+    """Assess one image in a worker and save its result image; returns a manifest record."""
+    image_file, image_path, output_path = task
+    start = time.perf_counter()
+    result_image, recommendations, response_data = _batch_engine.process_image(image_path)
+    record = {"file": image_file, "seconds": round(time.perf_counter() - start, 3)}
+    if result_image is None:
+        record.update(status="failed", error=recommendations)
+    elif save_result_image(result_image, output_path) is None:
+        record.update(status="failed", error="Failed to save result image")
+    else:
+        record.update(status="ok", output=output_path, recommendations=recommendations, data=response_data)
+    return record
+
+def read_manifest(manifest_path):
+    """Files already processed successfully according to a JSON-lines manifest."""
+    done = set()
+    if not os.path.exists(manifest_path):
+        return done
+    with open(manifest_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short when a previous run was interrupted
+                continue
+            if record.get("status") == "ok":
+                done.add(record["file"])
+    return done
+
+def batch_process_images(folder_path, output_folder="results", workers=None, manifest_path=None,
+                         resume=True, tier=None, progress_interval=10.0):
+    """Process all images in a folder with a pool of worker processes.
+
+    Each worker loads the models once. Results are appended to a JSON-lines manifest
+    (default: manifest.jsonl in output_folder) as they complete, so nothing is held in
+    memory; with resume=True, files the manifest already lists as done are skipped and
+    failed ones are retried. Returns counts of processed, failed and skipped images.
+    """
     os.makedirs(output_folder, exist_ok=True)
-    
+    manifest_path = manifest_path or os.path.join(output_folder, "manifest.jsonl")
+    cpu_count = os.cpu_count() or 1
+    workers = workers or max(1, cpu_count // 4)
+
     # Get all image files from the folder
-    image_extensions = ['.jpg', '.jpeg', '.png']
-    image_files = [f for f in os.listdir(folder_path) if any(f.lower().endswith(ext) for ext in image_extensions)]
-    
-    results = {}
-    
-    for image_file in image_files:
-        image_path = os.path.join(folder_path, image_file)
-        print(f"Processing {image_file}...")
-        
-        # Process the image
-        result_image, recommendations, response_data = assessment.process_image(image_path)
-        
-        if result_image is not None:
-            # Save result image
-            output_path = os.path.join(output_folder, f"assessed_{image_file}")
-            save_result_image(result_image, output_path)
-            
-            # Store results
-            results[image_file] = {
-                "recommendations": recommendations,
-                "data": response_data
-            }
-            
-            print(f"Processed {image_file} successfully")
-            print(f"Results saved to {output_path}")
-        else:
-            print(f"Failed to process {image_file}")
-    
-    return results
+    image_files = sorted(entry.name for entry in os.scandir(folder_path)
+                         if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS))
+    done = read_manifest(manifest_path) if resume else set()
+    tasks = [(image_file, os.path.join(folder_path, image_file), os.path.join(output_folder, f"assessed_{image_file}"))
+             for image_file in image_files if image_file not in done]
+    summary = {"processed": 0, "failed": 0, "skipped": len(image_files) - len(tasks), "manifest": manifest_path}
+    print(f"{len(image_files)} images, {summary['skipped']} already done, {len(tasks)} to process with {workers} workers")
+    if not tasks:
+        return summary
+
+    # TensorFlow isn't fork-safe, so workers start as fresh interpreters
+    context = multiprocessing.get_context("spawn")
+    start = last_report = time.perf_counter()
+    with open(manifest_path, "a" if resume else "w") as manifest, \
+            context.Pool(workers, initializer=_init_batch_worker, initargs=(tier, max(1, cpu_count // workers))) as pool:
+        if manifest.tell() > 0:
+            # End a record cut short by an interrupted run, so the next one starts on its own line
+            with open(manifest_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    manifest.write("\n")
+        for record in pool.imap_unordered(_process_batch_image, tasks):
+            manifest.write(json.dumps(record) + "\n")
+            manifest.flush()
+            summary["processed" if record["status"] == "ok" else "failed"] += 1
+            if record["status"] != "ok":
+                print(f"Failed to process {record['file']}: {record['error']}")
+
+            finished = summary["processed"] + summary["failed"]
+            now = time.perf_counter()
+            if now - last_report >= progress_interval or finished == len(tasks):
+                rate = finished / (now - start)
+                remaining = (len(tasks) - finished) / rate if rate else 0
+                print(f"{finished}/{len(tasks)} images ({summary['failed']} failed), "
+                      f"{rate:.2f} images/s, about {remaining / 60:.0f} min left")
+                last_report = now
+
+    return summary
 
 def main():
     """Main function to run the ergonomic assessment."""
@@ -704,6 +859,7 @@ def main():
         
     elif choice == "2":
         # Process all images in a folder
+        from tkinter import Tk, filedialog
         root = Tk()
         root.withdraw()
         folder_path = filedialog.askdirectory(title="Select folder containing images")
@@ -713,15 +869,32 @@ def main():
             return
         
         output_folder = os.path.join(folder_path, "assessment_results")
-        results = batch_process_images(folder_path, output_folder)
+        summary = batch_process_images(folder_path, output_folder)
         
         # Print summary
         print("\nProcessing Summary:")
-        print(f"Processed {len(results)} images")
-        print(f"Results saved to {output_folder}")
+        print(f"Processed {summary['processed']} images ({summary['failed']} failed, {summary['skipped']} skipped)")
+        print(f"Results saved to {output_folder}, manifest at {summary['manifest']}")
     
     else:
         print("Invalid choice. Please run the program again.")
 
+def batch_main():
+    parser = argparse.ArgumentParser(description="Assess every image in a folder without the interactive menu.")
+    parser.add_argument("folder", help="Folder of images to assess")
+    parser.add_argument("--output", help="Folder for result images and the manifest (default: <folder>/assessment_results)")
+    parser.add_argument("--workers", type=int, help="Worker processes, each with its own models")
+    parser.add_argument("--tier", help="Model tier to use")
+    parser.add_argument("--no-resume", action="store_true", help="Reprocess files already listed in the manifest")
+    args = parser.parse_args()
+    output_folder = args.output or os.path.join(args.folder, "assessment_results")
+    summary = batch_process_images(args.folder, output_folder, workers=args.workers, resume=not args.no_resume, tier=args.tier)
+    print(f"Processed {summary['processed']} images ({summary['failed']} failed, {summary['skipped']} skipped)")
+    print(f"Manifest: {summary['manifest']}")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # `python ergonomic_assessment.py FOLDER [options]` runs a batch; no arguments opens the menu
+    if len(sys.argv) > 1:
+        batch_main()
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,249 @@
+"""Ergonomic rules as a table over flat feature records.
+
+An assessment's inputs (detected objects, posture measurements, lighting and glare)
+are reduced to one row of FEATURE_DTYPE, a NumPy structured array with NaN for
+anything that wasn't measured. The rules in RULES are conditions on those columns
+and the reference values, written with array operations, so the same table scores
+one image or a whole archive of stored records in a single pass:
+
+    features = features_from_dicts(stored_feature_dicts)
+    fired = evaluate_rules(features, references)   # (records, rules) booleans
+
+which lets old assessments be re-scored when a threshold changes, without running
+the models again. `python ergonomic_rules.py manifest.jsonl` does this for a batch
+manifest written by batch_process_images.
+"""
+import argparse
+import json
+from collections import namedtuple
+
+import numpy as np
+
+FEATURE_DTYPE = np.dtype([
+    # Which inputs the assessment had
+    ("person_or_workspace_checked", "?"),  # Detection or pose ran (not a lighting/glare-only check)
+    ("has_objects", "?"),
+    ("has_posture", "?"),
+    ("has_lighting", "?"),
+    # Posture, in original-image pixels and degrees
+    ("neck_angle", "f8"),
+    ("shoulder_angle", "f8"),
+    ("viewing_distance", "f8"),
+    ("eye_y", "f8"),
+    # Equipment; the screen is the laptop, or else a computer
+    ("has_laptop", "?"),
+    ("has_screen", "?"),
+    ("has_work_surface", "?"),  # Desk, table or a desk inferred from the laptop
+    ("has_chair", "?"),
+    ("has_desk", "?"),  # Desk or table actually detected
+    ("screen_top", "f8"),
+    ("screen_bottom", "f8"),
+    ("laptop_top", "f8"),
+    ("chair_top", "f8"),
+    ("desk_top", "f8"),
+    # Lighting
+    ("avg_brightness", "f8"),
+    ("brightness_variance", "f8"),
+    ("glare_detected", "?"),
+])
+
+Rule = namedtuple("Rule", ["issue", "condition", "message"])
+
+# In the order recommendations are given. Each condition takes the feature array and the
+# reference values and returns a boolean array; comparisons with NaN (not measured) are
+# False, so a rule never fires on missing inputs. Messages are formatted with the
+# record's fields and the reference values.
+RULES = (
+    Rule("neck_angle_excessive",
+         lambda f, r: f["neck_angle"] > r["neck_angle_threshold"],
+         "Your neck is bent at approximately {neck_angle:.1f}° which exceeds the recommended {neck_angle_threshold}°. "
+         "Raise your screen or adjust your posture to reduce neck strain."),
+    Rule("shoulders_uneven",
+         lambda f, r: f["shoulder_angle"] > r["shoulder_angle_threshold"],
+         "Your shoulders appear to be uneven or hunched. Try relaxing your shoulders and sitting up straight."),
+    Rule("screen_too_low",
+         lambda f, r: f["screen_top"] > f["eye_y"],
+         "Your screen is positioned too low. The top of your screen should be at or slightly below eye level "
+         "to maintain proper neck posture."),
+    Rule("screen_too_high",
+         lambda f, r: ~(f["screen_top"] > f["eye_y"]) & (f["screen_bottom"] < f["eye_y"]),
+         "Your screen is positioned too high. Lower your screen so your eyes align with the top portion of the screen."),
+    Rule("improper_laptop_surface",
+         lambda f, r: f["has_laptop"] & ~f["has_work_surface"],
+         "It appears your laptop is not on a proper desk or table. Using a laptop on your lap or unsuitable surface "
+         "can lead to poor posture and ergonomic issues."),
+    Rule("laptop_too_low",
+         lambda f, r: f["has_work_surface"] & (f["laptop_top"] > f["eye_y"] + r["laptop_below_eye_margin"]),
+         "Your laptop screen is too low relative to your eye level. Consider using a laptop stand or books to raise it, "
+         "and a separate keyboard and mouse for typing."),
+    Rule("lighting_too_dim",
+         lambda f, r: f["avg_brightness"] < r["brightness_low_threshold"],
+         "Your workspace appears to be too dark (average brightness: {avg_brightness:.1f}). "
+         "Increase lighting to reduce eye strain."),
+    Rule("lighting_too_bright",
+         lambda f, r: f["avg_brightness"] > r["brightness_high_threshold"],
+         "Your workspace appears to be too bright (average brightness: {avg_brightness:.1f}). "
+         "Reduce brightness or adjust lighting to prevent eye strain."),
+    Rule("uneven_lighting",
+         lambda f, r: f["brightness_variance"] > r["brightness_variance_threshold"],
+         "Your workspace has uneven lighting. Try to distribute light sources more evenly to reduce eye strain "
+         "from constantly adjusting to different brightness levels."),
+    Rule("screen_glare",
+         lambda f, r: f["glare_detected"] & f["has_screen"],
+         "Screen glare detected. Adjust your screen angle or light sources to reduce reflections that can cause "
+         "eye strain."),
+    Rule("screen_too_close",
+         lambda f, r: f["viewing_distance"] < r["minimum_viewing_distance"],
+         "You appear to be sitting too close to your screen. Maintain an arm's length distance to reduce eye strain."),
+    # Without a person, judge the chair against the desk
+    Rule("chair_too_low",
+         lambda f, r: _chair_unposed(f) & (f["chair_top"] - f["desk_top"] > r["chair_desk_tolerance"]),
+         "The chair appears to be too low relative to the desk. Adjust chair height so elbows are level with the desk "
+         "when seated."),
+    Rule("chair_too_high",
+         lambda f, r: _chair_unposed(f) & (f["desk_top"] - f["chair_top"] > r["chair_desk_tolerance"]),
+         "The chair appears to be too high relative to the desk. Lower the chair so elbows are level with the desk "
+         "when seated."),
+)
+
+NOT_ENOUGH_INFORMATION = ("Not enough information detected for a complete assessment. "
+                          "Try a clearer image showing both person and workspace.")
+WELL_SET_UP = "Your workspace appears to be ergonomically well set up!"
+
+
+def _chair_unposed(features):
+    return features["has_objects"] & ~features["has_posture"] & features["has_chair"] & features["has_desk"]
+
+
+def _top(obj):
+    return obj["bbox"][1] if obj else np.nan
+
+
+def extract_features(detected_objects, posture_measurements, lighting_info, glare_info, stages=None):
+    """One FEATURE_DTYPE record (a 1-element array) from the outputs of analyze_image."""
+    objects = detected_objects or {}
+    posture = posture_measurements or {}
+    record = np.zeros(1, dtype=FEATURE_DTYPE)
+    for name in FEATURE_DTYPE.names:
+        if FEATURE_DTYPE[name].kind == "f":
+            record[name] = np.nan
+
+    record["person_or_workspace_checked"] = stages is None or "detection" in stages or "pose" in stages
+    record["has_objects"] = bool(objects)
+    record["has_posture"] = bool(posture)
+    for name in ("neck_angle", "shoulder_angle", "viewing_distance"):
+        if posture.get(name) is not None:
+            record[name] = posture[name]
+    if posture.get("eye_midpoint"):
+        record["eye_y"] = posture["eye_midpoint"][1]
+
+    screen = objects.get("laptop", objects.get("computer"))
+    desk = next((objects[k] for k in ("desk", "table") if k in objects), None)
+    record["has_laptop"] = "laptop" in objects
+    record["has_screen"] = screen is not None
+    record["has_work_surface"] = any(k in objects for k in ("desk", "table", "inferred_desk"))
+    record["has_chair"] = "chair" in objects
+    record["has_desk"] = desk is not None
+    if screen is not None:
+        record["screen_top"], record["screen_bottom"] = screen["bbox"][1], screen["bbox"][3]
+    record["laptop_top"] = _top(objects.get("laptop"))
+    record["chair_top"] = _top(objects.get("chair"))
+    record["desk_top"] = _top(desk)
+
+    if lighting_info:
+        record["has_lighting"] = True
+        record["avg_brightness"] = lighting_info["avg_brightness"]
+        record["brightness_variance"] = lighting_info["brightness_variance"]
+    record["glare_detected"] = bool(glare_info and glare_info[0])
+    return record
+
+
+def record_to_dict(record):
+    """A JSON-ready dict of one record, with None for values that weren't measured."""
+    row = record.reshape(-1)[0]
+    values = {}
+    for name in FEATURE_DTYPE.names:
+        value = row[name].item()
+        values[name] = None if isinstance(value, float) and np.isnan(value) else value
+    return values
+
+
+def features_from_dicts(rows):
+    """FEATURE_DTYPE array from dicts like record_to_dict's (missing fields count as not measured)."""
+    features = np.zeros(len(rows), dtype=FEATURE_DTYPE)
+    for name in FEATURE_DTYPE.names:
+        missing = np.nan if FEATURE_DTYPE[name].kind == "f" else False
+        column = [row.get(name) for row in rows]
+        features[name] = [missing if value is None else value for value in column]
+    return features
+
+
+def insufficient_information(features):
+    """Records with nothing to judge the person or workspace by, although those checks ran."""
+    return features["person_or_workspace_checked"] & ~features["has_objects"] & ~features["has_posture"]
+
+
+def evaluate_rules(features, references):
+    """Boolean matrix of which RULES fire for each record, shape (records, rules)."""
+    features = np.atleast_1d(features)
+    fired = np.column_stack([np.broadcast_to(rule.condition(features, references), features.shape)
+                             for rule in RULES])
+    fired[insufficient_information(features)] = False
+    return fired
+
+
+def evaluate_record(record, references):
+    """(recommendations, issues) for one record, as evaluate_ergonomics returns them."""
+    record = np.atleast_1d(record)[:1]
+    if insufficient_information(record)[0]:
+        return [NOT_ENOUGH_INFORMATION], []
+    fired = evaluate_rules(record, references)[0]
+    values = {**record_to_dict(record), **references}
+    recommendations = [rule.message.format(**values) for rule, hit in zip(RULES, fired) if hit]
+    issues = [rule.issue for rule, hit in zip(RULES, fired) if hit]
+    return recommendations or [WELL_SET_UP], issues
+
+
+def issue_counts(features, references):
+    """How many records raise each issue under the given reference values."""
+    fired = evaluate_rules(features, references)
+    return {rule.issue: int(count) for rule, count in zip(RULES, fired.sum(axis=0))}
+
+
+def main():
+    from ergonomic_assessment import ERGONOMIC_REFERENCES
+
+    parser = argparse.ArgumentParser(description="Re-score stored assessments with the current reference values.")
+    parser.add_argument("manifest", help="JSON-lines manifest written by batch_process_images")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="Override a reference value, e.g. --set neck_angle_threshold=30")
+    args = parser.parse_args()
+
+    references = dict(ERGONOMIC_REFERENCES)
+    for override in args.set:
+        name, value = override.split("=", 1)
+        if name not in references:
+            parser.error(f"Unknown reference value: {name}")
+        references[name] = float(value)
+
+    rows = []
+    with open(args.manifest) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == "ok" and "features" in record.get("data", {}):
+                rows.append(record["data"]["features"])
+    if not rows:
+        print(f"No assessments with stored features in {args.manifest}")
+        return
+
+    features = features_from_dicts(rows)
+    print(f"{len(rows)} assessments")
+    for issue, count in issue_counts(features, references).items():
+        print(f"{issue:>24} {count:>7} ({count / len(rows):.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Columnar on-disk store of every assessment's raw measurements, keyed by user and time.
+
+Rows are buffered in memory and written as immutable segments: a directory holding one
+.npy file per column. Readers memory-map the columns, so a query over the full history
+only touches the columns it asks for. Several processes (the web server and job
+workers) can append to the same store; each writes its own segments.
+
+    store = FeatureStore("features")
+    columns = store.query(user_id="abc", start=time.time() - 30 * 86400,
+                          columns=["timestamp", "features", "landmarks"])
+    columns["features"]["neck_angle"]     # NumPy array, one value per assessment
+
+The "features" column holds ergonomic_rules records, so stored assessments can be
+re-scored with ergonomic_rules.evaluate_rules directly.
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from ergonomic_assessment import ANALYSIS_STAGES, EQUIPMENT_CATEGORY_INDEX
+from ergonomic_rules import FEATURE_DTYPE
+from image_stats import HISTOGRAM_BINS
+
+SCHEMA_VERSION = 1
+LANDMARK_COUNT = 33  # MediaPipe Pose
+OBJECT_CLASSES = tuple(EQUIPMENT_CATEGORY_INDEX.values()) + ("inferred_desk",)
+TIMED_COMPONENTS = ("decode", "luminance") + ANALYSIS_STAGES + ("evaluate", "visualize")
+
+# Column name -> (dtype, shape of one row). Values that weren't measured are NaN.
+COLUMNS = {
+    "timestamp": ("f8", ()),  # Unix seconds
+    "user_id": ("S64", ()),
+    "tier": ("S16", ()),
+    "image_size": ("i4", (2,)),  # Original width, height
+    "features": (FEATURE_DTYPE, ()),
+    "landmarks": ("f4", (LANDMARK_COUNT, 4)),  # Normalized x, y, z and visibility
+    "object_boxes": ("f4", (len(OBJECT_CLASSES), 4)),  # x_min, y_min, x_max, y_max in original pixels, by OBJECT_CLASSES
+    "object_scores": ("f4", (len(OBJECT_CLASSES),)),
+    "brightness": ("f4", (4,)),  # Mean, min, max, standard deviation
+    "quadrant_brightness": ("f4", (4,)),  # Top-left, top-right, bottom-left, bottom-right
+    "brightness_histogram": ("f4", (HISTOGRAM_BINS,)),  # Fraction of pixels per value bin
+    "glare": ("f4", (3,)),  # Region count, total and largest area in original pixels
+    "component_ms": ("f4", (len(TIMED_COMPONENTS),)),  # By TIMED_COMPONENTS
+}
+
+
+def _empty(name, rows):
+    dtype, shape = COLUMNS[name]
+    column = np.zeros((rows, *shape), dtype=dtype)
+    if column.dtype.kind == "f":
+        column[...] = np.nan
+    elif column.dtype.names:
+        for field in column.dtype.names:
+            if column.dtype[field].kind == "f":
+                column[field] = np.nan
+    return column
+
+
+def assessment_row(analysis):
+    """One row (column name -> value) from what process_image passes to its on_features callback."""
+    row = {name: _empty(name, 1)[0] for name in COLUMNS if name not in ("timestamp", "user_id")}
+    row["tier"] = analysis["tier"].encode("utf-8")
+    row["image_size"] = analysis["image_size"]
+    row["features"] = analysis["features"].reshape(-1)[0]
+
+    pose_landmarks = analysis["pose_landmarks"]
+    if pose_landmarks is not None:
+        row["landmarks"][:] = [(lm.x, lm.y, lm.z, lm.visibility) for lm in pose_landmarks.landmark][:LANDMARK_COUNT]
+
+    for index, name in enumerate(OBJECT_CLASSES):
+        obj = (analysis["detected_objects"] or {}).get(name)
+        if obj is not None:
+            row["object_boxes"][index] = obj["bbox"]
+            row["object_scores"][index] = obj["confidence"]
+
+    lighting_info = analysis["lighting_info"]
+    if lighting_info:
+        row["brightness"] = [lighting_info[key] for key in
+                             ("avg_brightness", "min_brightness", "max_brightness", "std_brightness")]
+        row["quadrant_brightness"] = lighting_info["quadrant_brightness"]
+        row["brightness_histogram"] = lighting_info["histogram"]
+
+    if analysis["glare_checked"]:
+        areas = [cv2.contourArea(contour) for contour in analysis["glare_info"][1]]
+        row["glare"] = [len(areas), sum(areas), max(areas, default=0.0)]
+
+    components = analysis["profile"]["components"]
+    row["component_ms"] = [components[name]["ms"] if name in components else np.nan for name in TIMED_COMPONENTS]
+    return row
+
+
+class FeatureStore:
+    """Append-only columnar store; see the module docstring.
+
+    Buffered rows are written once there are segment_rows of them and on flush(), which
+    the owning process calls when it exits; a timer would leave a quiet server writing a
+    segment (a file per column) for almost every request. Rows buffered when a process
+    crashes are lost.
+    Queries include rows still in this process's buffer.
+    """
+
+    def __init__(self, directory, segment_rows=1024):
+        self.directory = directory
+        self.segment_rows = segment_rows
+        self._buffer = []
+        self._segment_counter = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, user_id, row, timestamp=None):
+        row = dict(row, user_id=(user_id or "").encode("utf-8")[:64],
+                   timestamp=time.time() if timestamp is None else timestamp)
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.segment_rows:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        self._write_segment(self._stack(rows))
+
+    @staticmethod
+    def _stack(rows):
+        columns = {name: _empty(name, len(rows)) for name in COLUMNS}
+        for i, row in enumerate(rows):
+            for name, column in columns.items():
+                column[i] = row[name]
+        return columns
+
+    def _write_segment(self, columns):
+        self._segment_counter += 1
+        name = f"{int(time.time() * 1000):013d}-{os.getpid()}-{threading.get_ident()}-{self._segment_counter}"
+        # Write into a hidden directory and rename it, so readers never see a partial segment
+        staging = os.path.join(self.directory, f".{name}")
+        os.makedirs(staging)
+        for column, values in columns.items():
+            np.save(os.path.join(staging, f"{column}.npy"), values)
+        with open(os.path.join(staging, "segment.json"), "w") as f:
+            json.dump({"schema": SCHEMA_VERSION, "rows": len(columns["timestamp"])}, f)
+        os.replace(staging, os.path.join(self.directory, name))
+
+    def segments(self):
+        """Names of the complete segments of the current schema, oldest first."""
+        names = []
+        for name in sorted(os.listdir(self.directory)):
+            try:
+                with open(os.path.join(self.directory, name, "segment.json")) as f:
+                    if json.load(f)["schema"] == SCHEMA_VERSION:
+                        names.append(name)
+            except (OSError, ValueError, KeyError):
+                # Being written, compacted away, or not a segment
+                continue
+        return names
+
+    def _load(self, segment, column):
+        return np.load(os.path.join(self.directory, segment, f"{column}.npy"), mmap_mode="r")
+
+    def query(self, user_id=None, start=None, end=None, columns=None):
+        """Column name -> NumPy array of the matching rows, ordered by timestamp.
+
+        user_id limits the rows to one user; start and end (Unix seconds, end exclusive)
+        to a time range. columns defaults to all of COLUMNS.
+        """
+        columns = list(columns or COLUMNS)
+        unknown = set(columns) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+        user_key = user_id.encode("utf-8")[:64] if user_id is not None else None
+
+        with self._lock:
+            buffered = self._stack(self._buffer) if self._buffer else None
+        sources = [(segment, None) for segment in self.segments()]
+        if buffered is not None:
+            sources.append((None, buffered))
+
+        parts = {name: [] for name in columns + ["timestamp"]}
+        for segment, data in sources:
+            load = (lambda name: data[name]) if data is not None else (lambda name: self._load(segment, name))
+            timestamps = load("timestamp")
+            mask = np.ones(len(timestamps), dtype=bool)
+            if user_key is not None:
+                mask &= load("user_id") == user_key
+            if start is not None:
+                mask &= timestamps >= start
+            if end is not None:
+                mask &= timestamps < end
+            if not mask.any():
+                continue
+            for name in parts:
+                parts[name].append(np.asarray(load(name)[mask]))
+
+        result = {name: np.concatenate(values) if values else _empty(name, 0) for name, values in parts.items()}
+        order = np.argsort(result["timestamp"], kind="stable")
+        return {name: result[name][order] for name in columns}
+
+    def compact(self):
+        """Merge all segments into one; run from a single process (e.g. a nightly job)."""
+        self.flush()
+        segments = self.segments()
+        if len(segments) < 2:
+            return len(segments)
+        with self._lock:
+            merged = {name: np.concatenate([self._load(segment, name) for segment in segments]) for name in COLUMNS}
+            self._write_segment(merged)
+        for segment in segments:
+            shutil.rmtree(os.path.join(self.directory, segment), ignore_errors=True)
+        return len(segments)
+
+    def stats(self):
+        segments = self.segments()
+        rows = sum(len(self._load(segment, "timestamp")) for segment in segments)
+        with self._lock:
+            buffered = len(self._buffer)
+        return {"segments": len(segments), "rows": rows, "buffered_rows": buffered}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or compact an assessment feature store.")
+    parser.add_argument("command", choices=["stats", "compact"])
+    parser.add_argument("directory", help="Feature store directory")
+    args = parser.parse_args()
+    store = FeatureStore(args.directory)
+    if args.command == "compact":
+        print(f"Merged {store.compact()} segments")
+    print(store.stats())
+
+
+if __name__ == "__main__":
+    main()
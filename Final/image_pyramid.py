@@ -0,0 +1,116 @@
+import io
+import threading
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# cv2.imread flags that let libjpeg decode straight to 1/2, 1/4 or 1/8 size (DCT scaling);
+# other formats are decoded in full and resized by OpenCV
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+# Accept a decoded long side down to this fraction of the largest size a stage asks for,
+# rather than decoding at twice the resolution to cover the last few pixels
+DECODE_SLACK = 0.75
+
+
+def read_image_size(source):
+    """(width, height) from the header of a file path or file object without decoding the pixels; None if unreadable."""
+    try:
+        with Image.open(source) as image:
+            return image.size
+    except (OSError, ValueError):
+        return None
+
+
+def reduction_factor(long_side, max_size):
+    for factor in (8, 4, 2):
+        if long_side / factor >= max_size * DECODE_SLACK:
+            return factor
+    return 1
+
+
+class ImagePyramid:
+    """One decoded image plus smaller copies, so each stage can work at the size it needs.
+
+    Stages report coordinates in the original image's pixel space: multiply positions
+    measured on a level by `scale(level)` (or use normalized coordinates with
+    `original_size`), so thresholds tuned on full-resolution photos keep working.
+    Levels are made on first use; level() is safe to call from concurrent stages.
+    """
+
+    def __init__(self, image, original_size):
+        # (width, height) of the image as uploaded
+        self.original_size = original_size
+        self.levels = {max(image.shape[:2]): image}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def read(cls, path, max_size=None):
+        """Decode a file at the strongest reduction that still covers max_size; None if unreadable."""
+        return cls._decode(read_image_size(path), max_size, lambda flags: cv2.imread(path, flags))
+
+    @classmethod
+    def from_bytes(cls, data, max_size=None):
+        """Like read(), for an encoded image held in memory (e.g. an upload's body)."""
+        if not data:
+            return None
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        return cls._decode(read_image_size(io.BytesIO(data)), max_size, lambda flags: cv2.imdecode(buffer, flags))
+
+    @classmethod
+    def load(cls, source, max_size=None):
+        """read() for a path, from_bytes() for bytes."""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return cls.from_bytes(source, max_size)
+        return cls.read(source, max_size)
+
+    @classmethod
+    def _decode(cls, size, max_size, decode):
+        factor = reduction_factor(max(size), max_size) if size and max_size else 1
+        image = decode(REDUCED_DECODE_FLAGS[factor])
+        if image is None:
+            return None
+        height, width = image.shape[:2]
+        if size is None:
+            size = (width * factor, height * factor)
+        elif (width > height) != (size[0] > size[1]):
+            # OpenCV applied the EXIF orientation, the header size is before rotation
+            size = (size[1], size[0])
+        pyramid = cls(image, size)
+        if max_size is not None and max(height, width) > max_size:
+            # Keep only the copy at max_size so the decoded image can be freed
+            pyramid.levels = {max_size: pyramid.level(max_size)}
+        return pyramid
+
+    @classmethod
+    def from_array(cls, image):
+        height, width = image.shape[:2]
+        return cls(image, (width, height))
+
+    def level(self, max_size=None):
+        """The image with its long side at most max_size, resized from the nearest larger level."""
+        with self._lock:
+            largest = max(self.levels)
+            if max_size is None or max_size >= largest:
+                return self.levels[largest]
+            if max_size not in self.levels:
+                source = self.levels[min(side for side in self.levels if side > max_size)]
+                height, width = source.shape[:2]
+                scale = max_size / max(height, width)
+                self.levels[max_size] = cv2.resize(source, (max(1, round(width * scale)), max(1, round(height * scale))),
+                                                   interpolation=cv2.INTER_AREA)
+            return self.levels[max_size]
+
+    def build(self, sizes):
+        """Create the levels for all sizes up front, largest first, so each is resized from the next larger one."""
+        for max_size in sorted(sizes, reverse=True):
+            self.level(max_size)
+
+    def scale(self, image):
+        """Factor from a level's pixel coordinates to the original image's."""
+        return max(self.original_size) / max(image.shape[:2])
@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+
+# Lighting is judged on a copy whose long side is at most this many pixels. Area
+# averaging keeps mean brightness intact while a 12 MP upload shrinks ~16x, so the
+# lighting passes touch a fraction of the memory.
+LUMINANCE_MAX_SIZE = 1024
+HISTOGRAM_BINS = 16  # Bins of the brightness histogram kept with each assessment
+GLARE_THRESHOLD = 240  # Grayscale level above which a pixel counts as glare
+# Glare is found on a copy whose long side is at most this many pixels: a 12 MP photo
+# decodes at half size (libjpeg DCT scaling), where a highlight keeps its fully saturated
+# 2x2 blocks. Only highlights barely over glare_regions' min_area (about 8 px across in
+# the original) fall below the threshold.
+GLARE_MAX_SIZE = 2048
+
+
+def luminance_planes(image, max_size=LUMINANCE_MAX_SIZE):
+    """Brightness planes of a BGR image: (value plane, glare mask).
+
+    The HSV value plane (max of B, G, R - what lighting thresholds are calibrated on) is
+    taken from a copy downscaled to max_size. The glare mask (grayscale above
+    GLARE_THRESHOLD) keeps the image's own resolution: averaging would pull a specular
+    highlight a few pixels across below the threshold.
+    """
+    _, glare_mask = cv2.threshold(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), GLARE_THRESHOLD, 255, cv2.THRESH_BINARY)
+    height, width = image.shape[:2]
+    if max_size is not None and max(height, width) > max_size:
+        scale = max(height, width) / max_size
+        image = cv2.resize(image, (max(1, round(width / scale)), max(1, round(height / scale))),
+                           interpolation=cv2.INTER_AREA)
+    blue, green, red = cv2.split(image)
+    value = cv2.max(cv2.max(blue, green), red)
+    return value, glare_mask
+
+
+def region_means(integral, y_edges, x_edges):
+    """Mean of every cell of the grid given by the edges, from a summed-area table."""
+    y_edges, x_edges = np.asarray(y_edges), np.asarray(x_edges)
+    y0, y1 = y_edges[:-1, np.newaxis], y_edges[1:, np.newaxis]
+    x0, x1 = x_edges[np.newaxis, :-1], x_edges[np.newaxis, 1:]
+    sums = integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0]
+    return sums / ((y1 - y0) * (x1 - x0))
+
+
+def grid_means(integral, rows, cols):
+    """Mean brightness of a rows x cols grid over the plane the integral image was built from."""
+    height, width = integral.shape[0] - 1, integral.shape[1] - 1
+    y_edges = np.arange(rows + 1) * height // rows
+    x_edges = np.arange(cols + 1) * width // cols
+    return region_means(integral, y_edges, x_edges)
+
+
+def brightness_stats(value):
+    """Lighting statistics of the value plane: one summed-area pass plus one min/max pass."""
+    integral, squared_integral = cv2.integral2(value, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+    pixels = value.size
+    avg_brightness = integral[-1, -1] / pixels
+    variance = max(squared_integral[-1, -1] / pixels - avg_brightness ** 2, 0.0)
+    min_brightness, max_brightness, _, _ = cv2.minMaxLoc(value)
+
+    # Top-left, top-right, bottom-left, bottom-right
+    quadrant_brightness = [float(q) for q in grid_means(integral, 2, 2).ravel()]
+    histogram = cv2.calcHist([value], [0], None, [HISTOGRAM_BINS], [0, 256]).ravel() / pixels
+
+    return {
+        "avg_brightness": float(avg_brightness),
+        "min_brightness": float(min_brightness),
+        "max_brightness": float(max_brightness),
+        "std_brightness": float(np.sqrt(variance)),
+        "quadrant_brightness": quadrant_brightness,
+        "brightness_variance": float(np.var(quadrant_brightness)),
+        "histogram": [float(h) for h in histogram],
+    }, integral
+
+
+def glare_regions(glare_mask, scale=1.0, min_area=50):
+    """Contours of glare larger than min_area (in original-image pixels), in original coordinates.
+
+    scale maps the mask's coordinates to the original image's.
+    """
+    contours, _ = cv2.findContours(glare_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_area = min_area / (scale * scale)
+    glare_areas = [contour for contour in contours if cv2.contourArea(contour) > min_area]
+    if scale != 1.0:
+        glare_areas = [np.round(contour * scale).astype(np.int32) for contour in glare_areas]
+    return len(glare_areas) > 0, glare_areas
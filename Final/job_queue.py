@@ -0,0 +1,266 @@
+"""Persistent queue of ergonomic assessment jobs and the worker processes that drain it.
+
+Jobs live in a SQLite database, so queued work survives a server restart. Each worker
+is a separate process with its own warmed-up engines; app.py starts them, or run one
+by hand:
+
+    python job_queue.py --db jobs.db --tiers standard,accurate
+"""
+import argparse
+import json
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+
+JOB_TIMEOUT = 600  # Seconds a claimed job may run before another worker takes it over
+MAX_ATTEMPTS = 3  # Claims per job before it is marked failed (e.g. it keeps crashing workers)
+FINISHED_JOB_RETENTION = 24 * 3600  # Seconds finished jobs stay available to /jobs/<id>
+
+
+class QueueFull(Exception):
+    """Raised by JobStore.submit when the queue is at its depth limit."""
+
+
+class JobStore:
+    """SQLite-backed job table shared by the web server and the worker processes."""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    tier TEXT NOT NULL,
+                    stages TEXT,
+                    overlay INTEGER NOT NULL DEFAULT 0,
+                    user_id TEXT,
+                    cache_key TEXT NOT NULL,
+                    image BLOB,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    claimed_at REAL,
+                    finished_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+
+    @contextmanager
+    def _connect(self):
+        # A connection per call keeps the store usable from any request thread;
+        # transactions are managed explicitly with BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def submit(self, image, tier, stages, cache_key, max_depth=None, overlay=False, user_id=None):
+        """Queue a job and return its id; raises QueueFull if max_depth jobs are already waiting.
+
+        overlay jobs return shapes for the client to draw instead of a rendered image.
+        """
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if max_depth is not None:
+                depth = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+                if depth >= max_depth:
+                    conn.execute("ROLLBACK")
+                    raise QueueFull(f"{depth} jobs already queued")
+            conn.execute(
+                "INSERT INTO jobs (id, status, tier, stages, overlay, user_id, cache_key, image, created_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, tier, json.dumps(stages) if stages is not None else None, int(overlay), user_id, cache_key,
+                 image, time.time())
+            )
+            conn.execute("COMMIT")
+        return job_id
+
+    def add_finished(self, tier, stages, cache_key, result):
+        """Record a job that needs no work (e.g. answered from the result cache) and return its id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, tier, stages, cache_key, result, created_at, finished_at) "
+                "VALUES (?, 'done', ?, ?, ?, ?, ?, ?)",
+                (job_id, tier, json.dumps(stages) if stages is not None else None, cache_key, json.dumps(result), now, now)
+            )
+        return job_id
+
+    def claim(self, tiers):
+        """Take the oldest waiting job for one of the tiers (or one whose worker timed out); None if there is none."""
+        placeholders = ",".join("?" * len(tiers))
+        with self._connect() as conn:
+            while True:
+                now = time.time()
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    f"SELECT id, tier, stages, overlay, user_id, cache_key, image, attempts FROM jobs "
+                    f"WHERE tier IN ({placeholders}) AND (status = 'queued' OR (status = 'running' AND claimed_at < ?)) "
+                    f"ORDER BY created_at LIMIT 1",
+                    (*tiers, now - JOB_TIMEOUT)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                if row["attempts"] >= MAX_ATTEMPTS:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, image = NULL, finished_at = ? WHERE id = ?",
+                        (f"Gave up after {row['attempts']} attempts", now, row["id"])
+                    )
+                    conn.execute("COMMIT")
+                    continue
+                conn.execute("UPDATE jobs SET status = 'running', claimed_at = ?, attempts = attempts + 1 WHERE id = ?",
+                             (now, row["id"]))
+                conn.execute("COMMIT")
+                return {
+                    "id": row["id"],
+                    "tier": row["tier"],
+                    "stages": json.loads(row["stages"]) if row["stages"] else None,
+                    "overlay": bool(row["overlay"]),
+                    "user_id": row["user_id"],
+                    "cache_key": row["cache_key"],
+                    "image": row["image"],
+                }
+
+    def complete(self, job_id, result):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = 'done', result = ?, image = NULL, finished_at = ? WHERE id = ?",
+                         (json.dumps(result), time.time(), job_id))
+
+    def fail(self, job_id, error):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = 'failed', error = ?, image = NULL, finished_at = ? WHERE id = ?",
+                         (error, time.time(), job_id))
+
+    def get(self, job_id):
+        """Status of a job as a dict (without the image), or None if it doesn't exist."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, status, tier, result, error, created_at, finished_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            job = {
+                "job_id": row["id"],
+                "status": row["status"],
+                "tier": row["tier"],
+                "created_at": row["created_at"],
+                "finished_at": row["finished_at"],
+            }
+            if row["status"] == "queued":
+                job["queue_position"] = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < ?", (row["created_at"],)
+                ).fetchone()[0] + 1
+            elif row["status"] == "done":
+                job["result"] = json.loads(row["result"])
+            elif row["status"] == "failed":
+                job["error"] = row["error"]
+            return job
+
+    def depth(self):
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")}
+
+    def purge(self, older_than=FINISHED_JOB_RETENTION):
+        """Delete finished jobs older than the retention period."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                         (time.time() - older_than,))
+
+
+def run_worker(db_path, tiers, results_folder, cache_max_bytes, features_folder=None, poll_interval=0.2):
+    """Warm up one engine per tier, then process queued jobs until the parent process exits."""
+    from ergonomic_assessment import AdvancedErgonomicAssessment, encode_result_image
+    from feature_store import FeatureStore, assessment_row
+    from result_cache import ResultCache
+
+    store = JobStore(db_path)
+    result_cache = ResultCache(results_folder, max_bytes=cache_max_bytes)
+    feature_store = FeatureStore(features_folder) if features_folder else None
+    engines = {}
+    for tier in tiers:
+        engines[tier] = AdvancedErgonomicAssessment(tier=tier)
+        engines[tier].warmup()
+    print(f"Worker {os.getpid()} ready for tiers: {', '.join(tiers)}")
+
+    parent = os.getppid()
+    last_purge = 0
+    try:
+        while os.getppid() == parent:
+            if time.time() - last_purge > 3600:
+                store.purge()
+                last_purge = time.time()
+
+            job = store.claim(list(engines))
+            if job is None:
+                time.sleep(poll_interval)
+                continue
+
+            on_features = None
+            if feature_store is not None:
+                on_features = lambda analysis, user_id=job["user_id"]: feature_store.append(user_id, assessment_row(analysis))
+            try:
+                result_image, recommendations, response_data = engines[job["tier"]].process_image(
+                    job["image"], job["stages"], render=not job["overlay"], on_features=on_features
+                )
+                if response_data is None:
+                    store.fail(job["id"], recommendations)
+                    continue
+                image_bytes = None
+                if not job["overlay"]:
+                    image_bytes = encode_result_image(result_image)
+                    if image_bytes is None:
+                        store.fail(job["id"], "Failed to save result image")
+                        continue
+                    response_data["result_path"] = f"/results/{job['cache_key']}.jpg"
+                result_cache.put(job["cache_key"], response_data, image_bytes)
+                response_data["cached"] = False
+                store.complete(job["id"], response_data)
+            except Exception as e:
+                traceback.print_exc()
+                store.fail(job["id"], f"Error processing image: {str(e)}")
+    finally:
+        # Write out buffered measurements when the worker stops
+        if feature_store is not None:
+            feature_store.flush()
+
+
+def start_workers(count, db_path, tiers, results_folder, cache_max_bytes, features_folder=None):
+    """Start worker processes running this file; they exit on their own when the caller does."""
+    command = [sys.executable, os.path.abspath(__file__), "--db", db_path, "--tiers", ",".join(tiers),
+               "--results", results_folder, "--cache-bytes", str(cache_max_bytes)]
+    if features_folder:
+        command += ["--features", features_folder]
+    return [subprocess.Popen(command, cwd=os.getcwd()) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an ergonomic assessment job worker.")
+    parser.add_argument("--db", default="jobs.db", help="Job database shared with the web server")
+    parser.add_argument("--tiers", default="standard", help="Comma-separated model tiers to serve")
+    parser.add_argument("--results", default="results", help="Result cache folder shared with the web server")
+    parser.add_argument("--cache-bytes", type=int, default=500 * 1024 * 1024, help="Result cache size bound")
+    parser.add_argument("--features", help="Feature store folder to record each assessment's measurements in")
+    args = parser.parse_args()
+    # Turn terminate() from the web server into a normal exit, so buffered features are written
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    run_worker(args.db, [t.strip() for t in args.tiers.split(",") if t.strip()], args.results, args.cache_bytes,
+               args.features)
+
+
+if __name__ == "__main__":
+    main()
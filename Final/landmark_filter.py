@@ -0,0 +1,57 @@
+import math
+
+import numpy as np
+
+
+class OneEuroFilter:
+    """One-Euro filter applied to a whole landmark array in a single NumPy call.
+
+    Each coordinate gets its own adaptive low-pass filter: while a landmark is
+    still, the cutoff stays at `min_cutoff` and jitter is smoothed away; as it
+    moves faster the cutoff rises by `beta` * speed, so real movements (a blink,
+    leaning forward) come through with little lag. Works on any array shape,
+    e.g. (33, 2) pose landmarks or (478, 2) face mesh landmarks.
+
+    See Casiez et al., "1 Euro Filter" (CHI 2012).
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.0, d_cutoff=1.0, max_gap=0.5):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        # Restart from the raw values after a gap (e.g. the person left the frame)
+        self.max_gap = max_gap
+        self.reset()
+
+    def reset(self):
+        self._x = None
+        self._dx = None
+        self._t = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, x, timestamp):
+        x = np.asarray(x, dtype=np.float64)
+        if self._x is None or self._x.shape != x.shape or timestamp - self._t > self.max_gap:
+            self._x = x.copy()
+            self._dx = np.zeros_like(x)
+            self._t = timestamp
+            return x
+
+        dt = timestamp - self._t
+        if dt <= 0:
+            return self._x.copy()
+
+        # Smoothed speed of every coordinate, then a per-coordinate cutoff from it
+        dx = (x - self._x) / dt
+        alpha_d = self._alpha(self.d_cutoff, dt)
+        self._dx = alpha_d * dx + (1 - alpha_d) * self._dx
+        cutoff = self.min_cutoff + self.beta * np.abs(self._dx)
+        alpha = self._alpha(cutoff, dt)
+
+        self._x = alpha * x + (1 - alpha) * self._x
+        self._t = timestamp
+        return self._x.copy()
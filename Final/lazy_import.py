@@ -0,0 +1,26 @@
+import importlib
+
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access.
+
+    TensorFlow and MediaPipe take seconds to import; code paths that never touch
+    them (lighting-only checks, tooling, the batch CLI's parent process) don't pay for it.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            # The import system's own lock makes concurrent first accesses safe
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}{' (loaded)' if self._module is not None else ''}>"
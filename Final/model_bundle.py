@@ -0,0 +1,164 @@
+"""Local model bundles, so workers start from files on disk instead of downloading models.
+
+A bundle is a directory `<MODEL_ROOT>/<model_name>/` holding the model files
+(`saved_model/` for the EfficientDet detectors) and a `bundle.json` manifest with the
+size and SHA-256 of every file. Build bundles once, ahead of deployment, and ship the
+directory with the workers:
+
+    python model_bundle.py build efficientdet_d0_coco17_tpu-32
+    python model_bundle.py verify efficientdet_d0_coco17_tpu-32
+
+Workers only compare the file list and sizes when they load a bundle, which catches
+missing and truncated files without reading gigabytes on every start. `verify` hashes
+every file; run it after copying a bundle onto a machine.
+
+With ERGONOMICS_OFFLINE=1 a missing bundle is an error instead of a download.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import urllib.request
+
+MODEL_ROOT = os.environ.get("ERGONOMICS_MODEL_DIR", "models")
+OFFLINE = os.environ.get("ERGONOMICS_OFFLINE", "").lower() in ("1", "true", "yes")
+MANIFEST_NAME = "bundle.json"
+BUNDLE_FORMAT = 1
+
+MODEL_TAR_URL = "http://download.tensorflow.org/models/object_detection/tf2/20200711/{}.tar.gz"
+
+
+class BundleError(Exception):
+    """Raised when a model bundle is missing or doesn't match its manifest."""
+
+
+def bundle_dir(model_name):
+    return os.path.join(MODEL_ROOT, model_name)
+
+
+def saved_model_dir(model_name):
+    return os.path.join(bundle_dir(model_name), "saved_model")
+
+
+def _sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _bundle_files(directory):
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, directory).replace(os.sep, "/")
+            if relative != MANIFEST_NAME:
+                yield relative, path
+
+
+def write_manifest(model_name):
+    """Record the size and checksum of every file in a model's bundle directory."""
+    directory = bundle_dir(model_name)
+    files = {relative: {"size": os.path.getsize(path), "sha256": _sha256(path)}
+             for relative, path in sorted(_bundle_files(directory))}
+    manifest = {"format": BUNDLE_FORMAT, "model": model_name, "files": files}
+    with open(os.path.join(directory, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def verify_bundle(model_name, checksums=False):
+    """Check a bundle against its manifest; raises BundleError on a missing, extra or changed file.
+
+    Only the file list and sizes are compared unless checksums is set.
+    """
+    directory = bundle_dir(model_name)
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        raise BundleError(f"No model bundle for {model_name} in {directory}")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BUNDLE_FORMAT or manifest.get("model") != model_name:
+        raise BundleError(f"{manifest_path} is not a bundle manifest for {model_name}")
+
+    found = dict(_bundle_files(directory))
+    expected = manifest["files"]
+    if set(found) != set(expected):
+        missing, extra = sorted(set(expected) - set(found)), sorted(set(found) - set(expected))
+        raise BundleError(f"Bundle {model_name} doesn't match its manifest (missing: {missing}, unexpected: {extra})")
+    for relative, info in expected.items():
+        path = found[relative]
+        if os.path.getsize(path) != info["size"]:
+            raise BundleError(f"Bundle {model_name} is damaged: {relative} doesn't match its size")
+        if checksums and _sha256(path) != info["sha256"]:
+            raise BundleError(f"Bundle {model_name} is damaged: {relative} doesn't match its checksum")
+    return manifest
+
+
+def build_bundle(model_name, tarball=None):
+    """Create a bundle from the published model archive (or a local copy of it) and write its manifest."""
+    os.makedirs(MODEL_ROOT, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=MODEL_ROOT) as staging:
+        if tarball is None:
+            print(f"Downloading {model_name} model...")
+            tarball = os.path.join(staging, f"{model_name}.tar.gz")
+            urllib.request.urlretrieve(MODEL_TAR_URL.format(model_name), tarball)
+        with tarfile.open(tarball, "r:*") as tar:
+            if hasattr(tarfile, "data_filter"):
+                tar.extractall(path=staging, filter="data")
+            else:
+                tar.extractall(path=staging)
+        source = os.path.join(staging, model_name, "saved_model")
+        if not os.path.isdir(source):
+            raise BundleError(f"{tarball} has no {model_name}/saved_model directory")
+
+        # Swap the finished bundle in with a rename, so other processes never load a partial one
+        directory = bundle_dir(model_name)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        os.replace(source, saved_model_dir(model_name))
+    manifest = write_manifest(model_name)
+    print(f"Bundle for {model_name} written to {directory} ({len(manifest['files'])} files)")
+    return manifest
+
+
+def ensure_bundle(model_name):
+    """Path of a model's SavedModel, building the bundle first unless running offline.
+
+    The bundle's files and sizes are checked against its manifest; checksums are left
+    to the verify command.
+    """
+    directory = bundle_dir(model_name)
+    if not os.path.exists(os.path.join(directory, MANIFEST_NAME)):
+        if OFFLINE:
+            raise BundleError(f"No model bundle for {model_name} in {directory} and ERGONOMICS_OFFLINE is set; "
+                              f"run 'python model_bundle.py build {model_name}' first")
+        if os.path.isdir(saved_model_dir(model_name)):
+            # Extracted by an older version without a manifest; adopt the files as they are
+            write_manifest(model_name)
+        else:
+            build_bundle(model_name)
+    verify_bundle(model_name)
+    return saved_model_dir(model_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or verify local model bundles.")
+    parser.add_argument("command", choices=["build", "verify"])
+    parser.add_argument("models", nargs="+", help="Model names, e.g. efficientdet_d0_coco17_tpu-32")
+    parser.add_argument("--tarball", help="Build from this local copy of the model archive instead of downloading")
+    args = parser.parse_args()
+    for model_name in args.models:
+        if args.command == "build":
+            build_bundle(model_name, args.tarball)
+        else:
+            verify_bundle(model_name, checksums=True)
+            print(f"{model_name}: OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+TEXT_FONT = cv2.FONT_HERSHEY_SIMPLEX
+TEXT_SCALE = 0.6
+TEXT_THICKNESS = 2
+LINE_HEIGHT = 30
+WRAP_WIDTH = 60  # Characters per line of a wrapped recommendation
+TEXT_ALPHA = 0.7  # Weight of the text panel when blended onto the image
+
+
+@lru_cache(maxsize=1024)
+def wrap_text(text, width=WRAP_WIDTH):
+    """Split text into lines shorter than width characters (recommendations repeat, so this is cached)."""
+    if len(text) <= width:
+        return (text,)
+    words = text.split()
+    lines = []
+    current_line = words[0]
+    for word in words[1:]:
+        if len(current_line + " " + word) < width:
+            current_line += " " + word
+        else:
+            lines.append(current_line)
+            current_line = word
+    if current_line:
+        lines.append(current_line)
+    return tuple(lines)
+
+
+@lru_cache(maxsize=4096)
+def text_width(line):
+    return cv2.getTextSize(line, TEXT_FONT, TEXT_SCALE, TEXT_THICKNESS)[0][0]
+
+
+def layout_text_panel(recommendations):
+    """Lines of the recommendations panel as (text, baseline y, width), top to bottom."""
+    layout = []
+    y_offset = LINE_HEIGHT
+    for rec in recommendations:
+        for line in wrap_text(rec):
+            layout.append((line, y_offset, text_width(line)))
+            y_offset += LINE_HEIGHT
+    return layout
+
+
+def draw_text_panel(image, recommendations):
+    """Blend the recommendations panel onto the top-left of image, in place.
+
+    Only the panel's bounding region is allocated and blended; the rest of the image
+    is left untouched.
+    """
+    layout = layout_text_panel(recommendations)
+    if not layout:
+        return image
+    height, width = image.shape[:2]
+    bottom = min(height, layout[-1][1] + 5)
+    right = min(width, max(line_width for _, _, line_width in layout) + 10)
+    if bottom <= 0 or right <= 0:
+        return image
+
+    roi = image[:bottom, :right]
+    panel = np.zeros_like(roi)
+    for line, y, line_width in layout:
+        # Background rectangle behind each line, then the text itself
+        cv2.rectangle(panel, (5, y - 20), (10 + line_width, y + 5), (0, 0, 0), -1)
+        cv2.putText(panel, line, (10, y), TEXT_FONT, TEXT_SCALE, (255, 255, 255), TEXT_THICKNESS)
+    cv2.addWeighted(roi, 1.0, panel, TEXT_ALPHA, 0, dst=roi)
+    return image
+
+
+def overlay_primitives(detected_objects, landmarks, connections, recommendations, glare_areas=None):
+    """What visualize_results would draw, as JSON-ready shapes for the client to render.
+
+    Coordinates are in the original image's pixels. landmarks is a list of
+    (x, y, visibility) and connections a list of landmark index pairs.
+    """
+    boxes = [{
+        "label": obj_name,
+        "bbox": [round(float(v)) for v in obj_data["bbox"]],
+        "confidence": round(float(obj_data["confidence"]), 3),
+        "inferred": bool(obj_data.get("inferred", False)),
+    } for obj_name, obj_data in (detected_objects or {}).items()]
+    return {
+        "boxes": boxes,
+        "landmarks": [[round(float(x), 1), round(float(y), 1), round(float(visibility), 3)]
+                      for x, y, visibility in landmarks or []],
+        "connections": sorted([int(a), int(b)] for a, b in connections or []) if landmarks else [],
+        "glare_areas": [contour.reshape(-1, 2).tolist() for contour in glare_areas or []],
+        "text": [list(wrap_text(rec)) for rec in recommendations],
+    }
@@ -8,6 +8,11 @@ from playsound import playsound
 import threading
 from plyer import notification  # For desktop notifications
 import sys
+from posture_render import Overlay, StageTimer, FrameRenderer
+from posture_events import PostureEventLog, PostureSummary
+from posture_upload import MinuteAggregator, PostureUploader
+from posture_sequence import SequenceClassifier, LandmarkWindow, landmarks_to_array, save_recording
+from landmark_filter import OneEuroFilter
 
 # Initialize MediaPipe Pose and webcam
 mp_pose = mp.solutions.pose
@@ -50,33 +55,94 @@ running = True  # Flag to control the main loop
 # Add improved accuracy variables - MODIFIED
 CALIBRATION_SAMPLE_SIZE = 50   #-------> changed 30 to 50
 posture_buffer = []  
-BUFFER_SIZE = 15  # Increased for more stability (was 10)
+BUFFER_SIZE = 10  # Reduced - landmarks are filtered before angles are measured (was 15)
 THRESHOLD_BUFFER = 3  # Increased to be more forgiving (was 2)
-BAD_POSTURE_CONSECUTIVE_FRAMES = 5  # Increased - need more consecutive bad frames for an alert (was 3)
+BAD_POSTURE_CONSECUTIVE_FRAMES = 4  # Reduced - filtered landmarks give fewer one-off bad frames (was 5)
 CONFIDENCE_THRESHOLD = 0.6  # ---------->REDUCED: Minimum confidence level for valid measurements (was 0.75)
 
+# Landmark smoothing (One-Euro filter on normalized coordinates) - removes jitter without lagging real movement
+POSE_FILTER_MIN_CUTOFF = 0.5  # Hz - lower = smoother while sitting still
+POSE_FILTER_BETA = 20  # Higher = follows fast movements more closely
+pose_filter = OneEuroFilter(min_cutoff=POSE_FILTER_MIN_CUTOFF, beta=POSE_FILTER_BETA)
+face_filter = OneEuroFilter(min_cutoff=POSE_FILTER_MIN_CUTOFF, beta=POSE_FILTER_BETA)
+
 # Distance estimation constants
 KNOWN_FACE_WIDTH = 14 
 FOCAL_LENGTH = 600  
 
 notification_active = False
 
-# Debug mode flag - added for easier troubleshooting
-DEBUG_MODE = True
-
-def debug_print(message):
-    if DEBUG_MODE:
-        print(f"[DEBUG] {message}")
+# Event logging - structured JSON lines written on a background thread instead of debug prints
+EVENT_LOG_ENABLED = True
+EVENT_LOG_PATH = "posture_events.jsonl"
+FRAME_EVENT_SAMPLE_RATE = 10  # Keep 1 in N per-frame measurements; alerts are always logged
+SUMMARY_PATH = "posture_summary.json"  # Minutes of good/bad posture per hour, written on exit
+
+# Optional temporal classifier (see posture_sequence.py) - used instead of the angle thresholds when a model file exists
+USE_SEQUENCE_MODEL = True
+SEQUENCE_MODEL_PATH = "posture_sequence_model.npz"
+SEQUENCE_STRIDE = 5  # Score the latest window every N frames; the verdict is held in between
+RECORD_LANDMARKS = False  # Save landmark sequences labelled with the threshold verdicts, for training
+RECORDING_PATH = "posture_recording.npz"
+
+# Per-minute posture/distance uploads to the screen-time API (root app.py)
+POSTURE_API_URL = os.environ.get("HEALTH_APP_API_URL", "http://localhost:5000")
+POSTURE_API_USER_ID = os.environ.get("HEALTH_APP_USER_ID")  # Uploads are disabled when not set
+POSTURE_UPLOAD_INTERVAL = 60  # Seconds between batched uploads
+POSTURE_SPOOL_DIR = "posture_spool"  # Batches that couldn't be sent are kept here until the API is back
+
+# Rendering settings - overlays are drawn on a separate thread, the main loop only shows the result
+HEADLESS_MODE = False  # True = no window at all, only alerts and notifications
+DISPLAY_FPS = 15  # Window refresh rate, independent of how fast frames are analyzed
+SHOW_STATS_OVERLAY = True  # Show per-stage timings in the corner of the window
+STATS_PRINT_INTERVAL = 30  # Seconds between timing summaries printed in headless mode
+
+event_log = PostureEventLog(EVENT_LOG_PATH if EVENT_LOG_ENABLED else None,
+                            frame_sample_rate=FRAME_EVENT_SAMPLE_RATE)
+posture_summary = PostureSummary()
+
+sequence_model = None
+sequence_verdict = None
+if USE_SEQUENCE_MODEL and os.path.exists(SEQUENCE_MODEL_PATH):
+    sequence_model = SequenceClassifier.load(SEQUENCE_MODEL_PATH)
+    landmark_window = LandmarkWindow(sequence_model.window_size)
+    print(f"Using temporal posture model from {SEQUENCE_MODEL_PATH}")
+recorded_landmarks = []
+recorded_labels = []
+
+minute_aggregator = None
+posture_uploader = None
+if POSTURE_API_USER_ID:
+    minute_aggregator = MinuteAggregator()
+    posture_uploader = PostureUploader(POSTURE_API_URL, POSTURE_API_USER_ID, spool_dir=POSTURE_SPOOL_DIR,
+                                       flush_interval=POSTURE_UPLOAD_INTERVAL)
+next_minute_check = time.time()
 
 def cleanup_and_exit():
     global running
     running = False
+    if renderer is not None:
+        renderer.stop()
     if cap.isOpened():
         cap.release()
     cv2.destroyAllWindows()
     # Make sure windows are properly closed
     for i in range(5):
         cv2.waitKey(1)
+
+    # Write out the posture summary and any queued events
+    event_log.log("summary", hours=posture_summary.minutes())
+    event_log.close()
+    if RECORD_LANDMARKS and recorded_landmarks:
+        save_recording(RECORDING_PATH, recorded_landmarks, recorded_labels)
+        print(f"Saved {len(recorded_landmarks)} landmark frames to {RECORDING_PATH}")
+    if posture_uploader is not None:
+        posture_uploader.add(minute_aggregator.pop_completed(include_current=True))
+        posture_uploader.close()
+    if posture_summary.hours:
+        posture_summary.save(SUMMARY_PATH)
+        print("Posture summary:")
+        posture_summary.print_report()
     print("Application closed.")
     sys.exit(0)
 
@@ -156,8 +222,12 @@ def estimate_distance(eye_left, eye_right):
         return None
     return (KNOWN_FACE_WIDTH * FOCAL_LENGTH) / pixel_distance
 
-def draw_bounding_box(frame, points, color=(0, 255, 0), thickness=2):
-    """Draw a bounding box around a set of points."""
+def to_pixel(points, index):
+    """Pixel coordinates of one landmark from a (N, 2) array of pixel positions."""
+    return (int(points[index, 0]), int(points[index, 1]))
+
+def draw_bounding_box(overlay, points, color=(0, 255, 0), thickness=2):
+    """Add a bounding box around a set of points to the overlay."""
     if not points:
         return
     
@@ -171,14 +241,19 @@ def draw_bounding_box(frame, points, color=(0, 255, 0), thickness=2):
     y_max = int(np.max(points_array[:, 1]))
     
     # Draw rectangle
-    cv2.rectangle(frame, (x_min, y_min), (x_max, y_max), color, thickness)
+    overlay.rectangle((x_min, y_min), (x_max, y_max), color, thickness)
     
     return (x_min, y_min, x_max, y_max)
 
-# Create a named window and set mouse callback
+# Create the render stage - the window is created here on the main thread, drawing runs on its own thread
 window_name = 'Posture Corrector'
-cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
-cv2.setMouseCallback(window_name, on_window_close)
+stage_timer = StageTimer()
+renderer = None
+if not HEADLESS_MODE:
+    renderer = FrameRenderer(window_name, display_fps=DISPLAY_FPS, timer=stage_timer,
+                             show_stats=SHOW_STATS_OVERLAY, mouse_callback=on_window_close)
+    renderer.start()
+last_stats_print = time.time()
 
 # Try to show an initial notification to verify the system works
 try:
@@ -193,37 +268,45 @@ except Exception as e:
 
 # Print instructions
 print("Posture Corrector is running.")
-print("Press 'q' to quit or close the window normally.")
+if HEADLESS_MODE:
+    print("Running headless. Press Ctrl+C to quit.")
+else:
+    print("Press 'q' to quit or close the window normally.")
 
 try:
     while running and cap.isOpened():
-        ret, frame = cap.read()
+        frame_start = time.perf_counter()
+        with stage_timer.time("capture"):
+            ret, frame = cap.read()
         if not ret:
             print("Failed to grab frame")
             break
 
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(rgb_frame)
-        results_face = face_mesh.process(rgb_frame)
+        with stage_timer.time("inference"):
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            results = pose.process(rgb_frame)
+            results_face = face_mesh.process(rgb_frame)
+
+        # Drawing is only recorded here; the render thread rasterizes it later (or never, if headless)
+        overlay = Overlay()
+        analysis_start = time.perf_counter()
+        frame_event = {}
 
         if results.pose_landmarks:
             landmarks = results.pose_landmarks.landmark
 
+            # Filter all landmarks at once, then convert to pixel coordinates
+            raw_points = np.array([(lm.x, lm.y) for lm in landmarks])
+            points = pose_filter(raw_points, time.time()) * (frame.shape[1], frame.shape[0])
+
             # Extract key body landmarks
-            left_shoulder = (int(landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].x * frame.shape[1]),
-                            int(landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value].y * frame.shape[0]))
-            right_shoulder = (int(landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].x * frame.shape[1]),
-                            int(landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value].y * frame.shape[0]))
-            left_ear = (int(landmarks[mp_pose.PoseLandmark.LEFT_EAR.value].x * frame.shape[1]),
-                        int(landmarks[mp_pose.PoseLandmark.LEFT_EAR.value].y * frame.shape[0]))
-            right_ear = (int(landmarks[mp_pose.PoseLandmark.RIGHT_EAR.value].x * frame.shape[1]),
-                        int(landmarks[mp_pose.PoseLandmark.RIGHT_EAR.value].y * frame.shape[0]))
-            left_hip = (int(landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].x * frame.shape[1]),
-                        int(landmarks[mp_pose.PoseLandmark.LEFT_HIP.value].y * frame.shape[0]))
-            right_hip = (int(landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].x * frame.shape[1]),
-                        int(landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value].y * frame.shape[0]))
-            nose = (int(landmarks[mp_pose.PoseLandmark.NOSE.value].x * frame.shape[1]),
-                   int(landmarks[mp_pose.PoseLandmark.NOSE.value].y * frame.shape[0]))
+            left_shoulder = to_pixel(points, mp_pose.PoseLandmark.LEFT_SHOULDER.value)
+            right_shoulder = to_pixel(points, mp_pose.PoseLandmark.RIGHT_SHOULDER.value)
+            left_ear = to_pixel(points, mp_pose.PoseLandmark.LEFT_EAR.value)
+            right_ear = to_pixel(points, mp_pose.PoseLandmark.RIGHT_EAR.value)
+            left_hip = to_pixel(points, mp_pose.PoseLandmark.LEFT_HIP.value)
+            right_hip = to_pixel(points, mp_pose.PoseLandmark.RIGHT_HIP.value)
+            nose = to_pixel(points, mp_pose.PoseLandmark.NOSE.value)
             # Get mouth point (approximated from nose and ears)
             mouth = (nose[0], nose[1] + int(0.03 * frame.shape[0]))  # Slightly below nose
 
@@ -243,37 +326,37 @@ try:
             # Draw bounding boxes
             # Head bounding box
             head_points = [left_ear, right_ear, nose]
-            draw_bounding_box(frame, head_points, color=(255, 0, 0), thickness=2)  # Red for head
+            draw_bounding_box(overlay, head_points, color=(255, 0, 0), thickness=2)  # Red for head
             
             # Shoulder bounding box
             shoulder_points = [left_shoulder, right_shoulder]
-            draw_bounding_box(frame, shoulder_points, color=(0, 255, 0), thickness=2)  # Green for shoulders
+            draw_bounding_box(overlay, shoulder_points, color=(0, 255, 0), thickness=2)  # Green for shoulders
             
             # Torso bounding box
             torso_points = [left_shoulder, right_shoulder, left_hip, right_hip]
-            draw_bounding_box(frame, torso_points, color=(0, 0, 255), thickness=2)  
+            draw_bounding_box(overlay, torso_points, color=(0, 0, 255), thickness=2)  
             
             # Draw angle lines for visualization
             # Shoulder angle line
-            cv2.line(frame, left_shoulder, right_shoulder, (255, 255, 0), 2)
-            cv2.line(frame, right_shoulder, (right_shoulder[0], 0), (255, 255, 0), 2)
+            overlay.line(left_shoulder, right_shoulder, (255, 255, 0), 2)
+            overlay.line(right_shoulder, (right_shoulder[0], 0), (255, 255, 0), 2)
             
             # Neck angle line
-            cv2.line(frame, left_ear, left_shoulder, (0, 255, 255), 2)
-            cv2.line(frame, left_shoulder, (left_shoulder[0], 0), (0, 255, 255), 2)
+            overlay.line(left_ear, left_shoulder, (0, 255, 255), 2)
+            overlay.line(left_shoulder, (left_shoulder[0], 0), (0, 255, 255), 2)
             
             # Leaning angle lines
-            cv2.line(frame, mid_hip, mid_shoulder, (255, 0, 255), 2)  # Purple for spine
-            cv2.line(frame, mid_hip, vertical_ref, (255, 0, 255), 2)  # Vertical reference
+            overlay.line(mid_hip, mid_shoulder, (255, 0, 255), 2)  # Purple for spine
+            overlay.line(mid_hip, vertical_ref, (255, 0, 255), 2)  # Vertical reference
             
             # Chin angle line
-            cv2.line(frame, mouth, left_ear, (255, 165, 0), 2)  # Orange for chin
-            cv2.line(frame, left_ear, left_shoulder, (255, 165, 0), 2)
+            overlay.line(mouth, left_ear, (255, 165, 0), 2)  # Orange for chin
+            overlay.line(left_ear, left_shoulder, (255, 165, 0), 2)
             
             # Mark midpoints
-            cv2.circle(frame, mid_shoulder, 4, (255, 0, 255), -1)  # Midpoint of shoulders
-            cv2.circle(frame, mid_hip, 4, (255, 0, 255), -1)  # Midpoint of hips
-            cv2.circle(frame, mouth, 4, (255, 165, 0), -1)  # Mouth point
+            overlay.circle(mid_shoulder, 4, (255, 0, 255), -1)  # Midpoint of shoulders
+            overlay.circle(mid_hip, 4, (255, 0, 255), -1)  # Midpoint of hips
+            overlay.circle(mouth, 4, (255, 165, 0), -1)  # Mouth point
 
             # Calculate landmark confidence (average of key landmarks)
             key_landmarks = [
@@ -288,8 +371,23 @@ try:
             # Calculate average visibility as a confidence measure
             landmark_confidence = np.mean([landmarks[lm].visibility for lm in key_landmarks])
             
-            # Debug output for angle calculations - ADDED
-            debug_print(f"Angles - Shoulder: {shoulder_angle:.1f}, Neck: {neck_angle:.1f}, Lean: {lean_angle:.1f}, Confidence: {landmark_confidence:.2f}")
+            # Feed the temporal model; it scores a whole window every SEQUENCE_STRIDE frames
+            frame_landmarks = None
+            if sequence_model is not None or RECORD_LANDMARKS:
+                frame_landmarks = landmarks_to_array(results.pose_landmarks)
+            if sequence_model is not None:
+                landmark_window.append(frame_landmarks)
+                if landmark_window.full() and landmark_window.count % SEQUENCE_STRIDE == 0:
+                    sequence_verdict = sequence_model.predict(landmark_window.window())[0]
+            
+            # Angle measurements for the event log
+            frame_event = {
+                "shoulder": round(float(shoulder_angle), 1),
+                "neck": round(float(neck_angle), 1),
+                "lean": round(float(lean_angle), 1),
+                "chin": round(float(chin_angle), 1),
+                "confidence": round(float(landmark_confidence), 2),
+            }
 
             # Calibration step - IMPROVED
             if not is_calibrated and calibration_frames < CALIBRATION_SAMPLE_SIZE:
@@ -302,14 +400,13 @@ try:
                     
                     # ADDED: Regular feedback during calibration
                     if calibration_frames % 10 == 0:
-                        debug_print(f"Calibration progress: {calibration_frames}/{CALIBRATION_SAMPLE_SIZE}")
+                        event_log.log("calibration_progress", frames=calibration_frames, total=CALIBRATION_SAMPLE_SIZE)
                 
-                cv2.putText(frame, f"Calibrating... {calibration_frames}/{CALIBRATION_SAMPLE_SIZE}", (10, 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2, cv2.LINE_AA)
+                overlay.text(f"Calibrating... {calibration_frames}/{CALIBRATION_SAMPLE_SIZE}", (10, 30), 1, (0, 255, 255), 2)
                 
                 # ADDED: Make calibration more obvious with a progress bar
                 progress_width = int((calibration_frames / CALIBRATION_SAMPLE_SIZE) * frame.shape[1] * 0.8)
-                cv2.rectangle(frame, (int(frame.shape[1]*0.1), 60), 
+                overlay.rectangle((int(frame.shape[1]*0.1), 60), 
                               (int(frame.shape[1]*0.1) + progress_width, 80), 
                               (0, 255, 255), -1)
                 
@@ -330,6 +427,8 @@ try:
                 is_calibrated = True
                 print("✅ CALIBRATION COMPLETE - Posture monitoring is now active!")
                 print(f"Calibration values - Shoulder threshold: {shoulder_threshold:.1f}, Neck threshold: {neck_threshold:.1f}, Lean threshold: {lean_threshold:.1f}")
+                event_log.log("calibration_complete", shoulder_threshold=float(shoulder_threshold),
+                              neck_threshold=float(neck_threshold), lean_threshold=float(lean_threshold))
                 
                 # Initialize posture buffer with "good" values
                 posture_buffer = [False] * BUFFER_SIZE
@@ -351,11 +450,19 @@ try:
                     neck_bad = neck_angle < (neck_threshold - 3)  # Must be significantly below threshold
                     lean_bad = abs(90 - lean_angle) > (lean_threshold + 2)  # Must be significantly above threshold
                     
-                    # ADDED: Debug feedback on posture metrics
-                    if DEBUG_MODE:
-                        debug_print(f"Posture status - Shoulders: {'BAD' if shoulder_bad else 'OK'}, " +
-                                  f"Neck: {'BAD' if neck_bad else 'OK'}, " +
-                                  f"Lean: {'BAD' if lean_bad else 'OK'}")
+                    if RECORD_LANDMARKS:
+                        recorded_landmarks.append(frame_landmarks)
+                        recorded_labels.append([shoulder_bad, neck_bad, lean_bad])
+                    
+                    # The temporal model, when loaded, replaces the per-frame threshold checks
+                    if sequence_verdict is not None:
+                        shoulder_bad, neck_bad, lean_bad = (bool(v) for v in sequence_verdict)
+                    
+                    # Track time spent in each posture issue for the hourly summary
+                    frame_issues = [name for name, bad in (("shoulders", shoulder_bad), ("neck", neck_bad), ("lean", lean_bad)) if bad]
+                    posture_summary.record(current_time, frame_issues)
+                    if minute_aggregator is not None:
+                        minute_aggregator.add_posture(current_time, frame_issues)
                     
                     is_bad_posture = shoulder_bad or neck_bad or lean_bad
                     
@@ -368,15 +475,14 @@ try:
                     bad_posture_count = sum(posture_buffer)
                     sustained_bad_posture = bad_posture_count >= (BAD_POSTURE_CONSECUTIVE_FRAMES - 1)
                     
-                    # Debug posture buffer state
-                    debug_print(f"Posture buffer: {bad_posture_count}/{len(posture_buffer)} bad frames")
+                    frame_event["issues"] = frame_issues
+                    frame_event["bad_frames"] = int(bad_posture_count)
                     
                     if sustained_bad_posture:
                         color = (0, 0, 255)  # Red for measurements
                         
                         # ADDED: Visual alert on screen
-                        cv2.putText(frame, "POOR POSTURE DETECTED", (frame.shape[1]//2 - 150, 30),
-                                 cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2, cv2.LINE_AA)
+                        overlay.text("POOR POSTURE DETECTED", (frame.shape[1]//2 - 150, 30), 0.8, (0, 0, 255), 2)
                         
                         if current_time - last_alert_time > alert_cooldown:
                             posture_issue = ""
@@ -384,21 +490,22 @@ try:
                             # More detailed issue identification with REDUCED thresholds for sensitivity
                             if shoulder_bad:
                                 shoulder_deviation = ((shoulder_threshold - shoulder_angle) / shoulder_threshold) * 100
-                                if shoulder_deviation > 5:  # REDUCED from 10
+                                if shoulder_deviation > 5 or sequence_verdict is not None:  # REDUCED from 10
                                     posture_issue += "Shoulders hunched. "
                             
                             if neck_bad:
                                 neck_deviation = ((neck_threshold - neck_angle) / neck_threshold) * 100
-                                if neck_deviation > 5:  # REDUCED from 10
+                                if neck_deviation > 5 or sequence_verdict is not None:  # REDUCED from 10
                                     posture_issue += "Forward head posture. "
                             
                             lean_deviation = abs(90 - lean_angle)
-                            if lean_bad and lean_deviation > (lean_threshold):  # REDUCED buffer
+                            if lean_bad and (lean_deviation > lean_threshold or sequence_verdict is not None):  # REDUCED buffer
                                 posture_issue += "Body leaning. "
                             
                             # Only alert if there are specific issues identified
                             if posture_issue:
                                 print(f"🔴 Poor posture detected! {posture_issue}Please correct your position.")
+                                event_log.log("alert", kind="posture", message=posture_issue.strip(), issues=frame_issues)
                                 
                                 # Show desktop notification
                                 show_desktop_notification(
@@ -418,12 +525,12 @@ try:
                         color = (0, 255, 0)  # Green for measurements
                         
                         # ADDED: Good posture confirmation
-                        cv2.putText(frame, "Good Posture", (frame.shape[1]//2 - 80, 30),
-                                 cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2, cv2.LINE_AA)
+                        overlay.text("Good Posture", (frame.shape[1]//2 - 80, 30), 0.8, (0, 255, 0), 2)
                         
                         # Provide positive reinforcement every 2 minutes if posture has been good
                         if not any(posture_buffer) and current_time - last_alert_time > 120:  # 2 minutes
                             print("✅ Great job maintaining good posture!")
+                            event_log.log("alert", kind="good_posture")
                             
                             # Show positive feedback notification
                             show_desktop_notification(
@@ -433,37 +540,31 @@ try:
                             last_alert_time = current_time
                     
                     # Display confidence and measurements on screen
-                    cv2.putText(frame, f"Confidence: {landmark_confidence:.2f}", (10, 60),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1, cv2.LINE_AA)
-                    cv2.putText(frame, f"Shoulder Angle: {shoulder_angle:.1f}/{shoulder_threshold:.1f}", (10, 90),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, color if shoulder_bad else (0, 255, 0), 1, cv2.LINE_AA)
-                    cv2.putText(frame, f"Neck Angle: {neck_angle:.1f}/{neck_threshold:.1f}", (10, 120),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, color if neck_bad else (0, 255, 0), 1, cv2.LINE_AA)
-                    cv2.putText(frame, f"Leaning Angle: {abs(90-lean_angle):.1f}/{lean_threshold:.1f}", (10, 150),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, color if lean_bad else (0, 255, 0), 1, cv2.LINE_AA)
-                    cv2.putText(frame, f"Chin Angle: {chin_angle:.1f}", (10, 180),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1, cv2.LINE_AA)
+                    overlay.text(f"Confidence: {landmark_confidence:.2f}", (10, 60), 0.6, (255, 255, 255), 1)
+                    overlay.text(f"Shoulder Angle: {shoulder_angle:.1f}/{shoulder_threshold:.1f}", (10, 90), 0.6, color if shoulder_bad else (0, 255, 0), 1)
+                    overlay.text(f"Neck Angle: {neck_angle:.1f}/{neck_threshold:.1f}", (10, 120), 0.6, color if neck_bad else (0, 255, 0), 1)
+                    overlay.text(f"Leaning Angle: {abs(90-lean_angle):.1f}/{lean_threshold:.1f}", (10, 150), 0.6, color if lean_bad else (0, 255, 0), 1)
+                    overlay.text(f"Chin Angle: {chin_angle:.1f}", (10, 180), 0.6, (255, 255, 255), 1)
                 else:
                     # Low confidence - display warning
-                    cv2.putText(frame, f"Low detection confidence: {landmark_confidence:.2f}", (10, 30),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 165, 255), 2, cv2.LINE_AA)
-                    cv2.putText(frame, "Move to better lighting or adjust position", (10, 60),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 165, 255), 1, cv2.LINE_AA)
+                    overlay.text(f"Low detection confidence: {landmark_confidence:.2f}", (10, 30), 0.8, (0, 165, 255), 2)
+                    overlay.text("Move to better lighting or adjust position", (10, 60), 0.6, (0, 165, 255), 1)
 
         # Eye distance detection
         if results_face.multi_face_landmarks:
             for face_landmarks in results_face.multi_face_landmarks:
-                left_eye = (int(face_landmarks.landmark[33].x * frame.shape[1]),
-                            int(face_landmarks.landmark[33].y * frame.shape[0]))
-                right_eye = (int(face_landmarks.landmark[263].x * frame.shape[1]),
-                            int(face_landmarks.landmark[263].y * frame.shape[0]))
+                # Only the two outer eye corners are needed, so only those are filtered
+                eye_corners = np.array([(face_landmarks.landmark[i].x, face_landmarks.landmark[i].y) for i in (33, 263)])
+                eye_points = face_filter(eye_corners, time.time()) * (frame.shape[1], frame.shape[0])
+                left_eye = to_pixel(eye_points, 0)
+                right_eye = to_pixel(eye_points, 1)
 
                 # Draw points for eyes
-                cv2.circle(frame, left_eye, 3, (0, 255, 255), -1)
-                cv2.circle(frame, right_eye, 3, (0, 255, 255), -1)
+                overlay.circle(left_eye, 3, (0, 255, 255), -1)
+                overlay.circle(right_eye, 3, (0, 255, 255), -1)
                 
                 # Draw line between eyes
-                cv2.line(frame, left_eye, right_eye, (0, 255, 255), 2)
+                overlay.line(left_eye, right_eye, (0, 255, 255), 2)
 
                 distance = estimate_distance(left_eye, right_eye)
 
@@ -473,6 +574,7 @@ try:
                         eye_color = (0, 0, 255)  # Red
                         if time.time() - last_alert_time > alert_cooldown:
                             print("⚠️ You're too close to the screen!")
+                            event_log.log("alert", kind="distance", distance_cm=round(float(distance), 1))
                             
                             # Show desktop notification for screen distance
                             show_desktop_notification(
@@ -494,19 +596,37 @@ try:
                         eye_color = (0, 255, 255)  # Yellow
 
                     # MOVED: Position eye distance text lower to avoid overlap
-                    cv2.putText(frame, f"Distance: {int(distance)} cm - {eye_status}", (10, 210),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, eye_color, 1, cv2.LINE_AA)
+                    overlay.text(f"Distance: {int(distance)} cm - {eye_status}", (10, 210), 0.6, eye_color, 1)
+                    frame_event["distance_cm"] = round(float(distance), 1)
+                    if minute_aggregator is not None:
+                        minute_aggregator.add_distance(time.time(), float(distance))
 
-        # Add instruction text
-        cv2.putText(frame, "Press 'q' to quit", (10, frame.shape[0] - 20),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1, cv2.LINE_AA)
-                
-        # Display the frame
-        cv2.imshow(window_name, frame)
+        # Sampled per-frame record - queued here, written by the event log thread
+        if frame_event:
+            event_log.log_frame(**frame_event)
+
+        # Hand finished minutes to the uploader, which sends them in batches
+        if posture_uploader is not None and time.time() >= next_minute_check:
+            posture_uploader.add(minute_aggregator.pop_completed())
+            next_minute_check = time.time() + 5
 
-        # Check for 'q' key press or if the window was closed
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q') or cv2.getWindowProperty(window_name, cv2.WND_PROP_VISIBLE) < 1:
+        # Add instruction text
+        overlay.text("Press 'q' to quit", (10, frame.shape[0] - 20), 0.6, (255, 255, 255), 1)
+        stage_timer.record("analysis", time.perf_counter() - analysis_start)
+
+        # Hand the frame to the render thread, which composites it at DISPLAY_FPS; show the
+        # newest composited frame from here, since HighGUI calls belong on the main thread
+        if renderer is not None:
+            renderer.submit(frame, overlay)
+            renderer.show()
+        stage_timer.record("frame", time.perf_counter() - frame_start)
+
+        if HEADLESS_MODE and time.time() - last_stats_print > STATS_PRINT_INTERVAL:
+            print("Frame budget - " + " | ".join(stage_timer.budget_lines()))
+            last_stats_print = time.time()
+
+        # Check if 'q' was pressed or the window was closed (noticed by renderer.show())
+        if renderer is not None and renderer.stop_requested.is_set():
             print("Exiting...")
             break
 
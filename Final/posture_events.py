@@ -0,0 +1,118 @@
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+
+def _to_json(value):
+    """Fallback for NumPy scalars (np.bool_, np.float32, ...) that json can't encode."""
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class PostureEventLog:
+    """Writes posture events as JSON lines from a background thread.
+
+    log() only puts the event on a queue, so the frame loop never waits on disk or
+    console I/O. Frame events are sampled (one in every `frame_sample_rate`), while
+    every other event type (alerts, calibration) is always kept. Passing path=None
+    turns every call into a no-op.
+    """
+
+    def __init__(self, path, frame_sample_rate=10, flush_interval=1.0, max_queue=10000):
+        self.path = path
+        self.frame_sample_rate = max(1, frame_sample_rate)
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._frame_count = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = threading.Event()
+        self._thread = None
+        if path is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def log(self, event_type, **fields):
+        if self._thread is None:
+            return
+        fields["event"] = event_type
+        fields.setdefault("t", round(time.time(), 3))
+        try:
+            self._queue.put_nowait(fields)
+        except queue.Full:
+            # Never block the frame loop - losing a trace line is better than a stalled camera
+            self.dropped += 1
+
+    def log_frame(self, **fields):
+        """Log a per-frame measurement, keeping only every Nth one."""
+        self._frame_count += 1
+        if self._frame_count % self.frame_sample_rate == 0:
+            self.log("frame", frame=self._frame_count, **fields)
+
+    def _run(self):
+        with open(self.path, "a", buffering=64 * 1024) as f:
+            last_flush = time.time()
+            while not (self._closed.is_set() and self._queue.empty()):
+                try:
+                    event = self._queue.get(timeout=self.flush_interval)
+                    f.write(json.dumps(event, default=_to_json) + "\n")
+                except queue.Empty:
+                    pass
+                if time.time() - last_flush >= self.flush_interval:
+                    f.flush()
+                    last_flush = time.time()
+
+    def close(self):
+        """Write out everything still queued and stop the writer thread."""
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+class PostureSummary:
+    """Aggregates time spent in good or bad posture per hour and per issue type."""
+
+    def __init__(self, max_gap=2.0):
+        # Gaps longer than this (no person detected, low confidence) are not counted
+        self.max_gap = max_gap
+        self.hours = defaultdict(lambda: defaultdict(float))
+        self._last_time = None
+
+    def record(self, timestamp, issues):
+        """Add the time since the previous evaluated frame to the current state.
+
+        `issues` is a list of issue names for this frame, e.g. ["shoulders", "neck"];
+        an empty list counts as good posture.
+        """
+        if self._last_time is not None:
+            elapsed = timestamp - self._last_time
+            if 0 < elapsed <= self.max_gap:
+                hour = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:00")
+                bucket = self.hours[hour]
+                if issues:
+                    bucket["bad"] += elapsed
+                    for issue in issues:
+                        bucket[issue] += elapsed
+                else:
+                    bucket["good"] += elapsed
+        self._last_time = timestamp
+
+    def minutes(self):
+        """Return {hour: {"good": minutes, "bad": minutes, <issue>: minutes}}."""
+        return {
+            hour: {key: round(seconds / 60, 2) for key, seconds in bucket.items()}
+            for hour, bucket in sorted(self.hours.items())
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.minutes(), f, indent=2)
+
+    def print_report(self):
+        for hour, bucket in self.minutes().items():
+            issues = ", ".join(f"{k}: {v:.1f} min" for k, v in bucket.items() if k not in ("good", "bad"))
+            print(f"{hour} - good: {bucket.get('good', 0):.1f} min, bad: {bucket.get('bad', 0):.1f} min"
+                  + (f" ({issues})" if issues else ""))
@@ -0,0 +1,202 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import cv2
+
+
+class Overlay:
+    """Collects drawing primitives for a frame so they can be rasterized later by the render stage."""
+
+    def __init__(self):
+        self.items = []
+
+    def rectangle(self, pt1, pt2, color, thickness=2):
+        self.items.append(("rectangle", pt1, pt2, color, thickness))
+
+    def line(self, pt1, pt2, color, thickness=2):
+        self.items.append(("line", pt1, pt2, color, thickness))
+
+    def circle(self, center, radius, color, thickness=-1):
+        self.items.append(("circle", center, radius, color, thickness))
+
+    def text(self, text, org, scale, color, thickness=1):
+        self.items.append(("text", text, org, scale, color, thickness))
+
+    def draw(self, frame):
+        """Rasterize all collected primitives onto the frame."""
+        for item in self.items:
+            kind = item[0]
+            if kind == "rectangle":
+                cv2.rectangle(frame, item[1], item[2], item[3], item[4])
+            elif kind == "line":
+                cv2.line(frame, item[1], item[2], item[3], item[4])
+            elif kind == "circle":
+                cv2.circle(frame, item[1], item[2], item[3], item[4])
+            elif kind == "text":
+                cv2.putText(frame, item[1], item[2], cv2.FONT_HERSHEY_SIMPLEX, item[3], item[4], item[5], cv2.LINE_AA)
+
+
+class StageTimer:
+    """Keeps a moving average of how long each stage of the frame loop takes."""
+
+    def __init__(self, smoothing=0.9):
+        self.smoothing = smoothing
+        self.averages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            previous = self.averages.get(stage)
+            if previous is None:
+                self.averages[stage] = seconds
+            else:
+                self.averages[stage] = previous * self.smoothing + seconds * (1 - self.smoothing)
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.averages)
+
+    def fps(self, stage):
+        """Frames per second implied by the average duration of a stage."""
+        average = self.snapshot().get(stage)
+        return 1.0 / average if average else 0.0
+
+    def budget_lines(self, frame_stage="frame"):
+        """Format each stage as milliseconds and share of the full frame time."""
+        averages = self.snapshot()
+        frame_time = averages.get(frame_stage)
+        lines = []
+        for stage, seconds in averages.items():
+            if stage == frame_stage:
+                continue
+            line = f"{stage}: {seconds * 1000:.1f} ms"
+            if frame_time:
+                line += f" ({seconds / frame_time * 100:.0f}%)"
+            lines.append(line)
+        if frame_time:
+            lines.append(f"{frame_stage}: {frame_time * 1000:.1f} ms ({1.0 / frame_time:.1f} FPS)")
+        return lines
+
+
+class FrameRenderer:
+    """Composites overlays on a helper thread and shows the results at a fixed display rate.
+
+    The inference loop hands over its latest frame with submit(); older frames that
+    were never composited are simply dropped. Drawing the overlay and the stats runs on
+    the helper thread, but HighGUI only supports the main thread on some platforms
+    (Cocoa on macOS), so the window itself is created in start() and updated by show(),
+    both called from the main loop. While the backend reports the window as not visible,
+    submitted frames are dropped instead of composited.
+    """
+
+    def __init__(self, window_name, display_fps=15, timer=None, show_stats=True, mouse_callback=None):
+        self.window_name = window_name
+        self.display_fps = display_fps
+        self.timer = timer
+        self.show_stats = show_stats
+        self.mouse_callback = mouse_callback
+        self.measured_fps = 0.0
+        self.stop_requested = threading.Event()
+        self._latest = None
+        self._composited = None
+        self._visible = threading.Event()
+        self._visible.set()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._last_shown = time.perf_counter()
+
+    def start(self):
+        """Create the window (on the calling thread, which must be the main one) and start compositing."""
+        cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
+        if self.mouse_callback is not None:
+            cv2.setMouseCallback(self.window_name, self.mouse_callback)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, overlay):
+        """Replace the pending frame; the helper thread only ever composites the newest one."""
+        with self._condition:
+            self._latest = (frame, overlay)
+            self._condition.notify()
+
+    def show(self):
+        """Display the newest composited frame and pump window events; call from the main thread every loop.
+
+        Sets stop_requested when 'q' is pressed or the window was closed.
+        """
+        with self._condition:
+            composited, self._composited = self._composited, None
+        if composited is not None:
+            cv2.imshow(self.window_name, composited)
+            now = time.perf_counter()
+            if now > self._last_shown:
+                self.measured_fps = 0.9 * self.measured_fps + 0.1 * (1.0 / (now - self._last_shown))
+            self._last_shown = now
+
+        # waitKey also pumps window events, so keep calling it even when nothing new was shown
+        key = cv2.waitKey(1) & 0xFF
+        visible = cv2.getWindowProperty(self.window_name, cv2.WND_PROP_VISIBLE) >= 1
+        self.set_visible(visible)
+        if key == ord('q') or not visible:
+            self.stop_requested.set()
+
+    def set_visible(self, visible):
+        """Composite submitted frames only while the window is visible."""
+        if visible:
+            self._visible.set()
+        else:
+            self._visible.clear()
+
+    def stop(self):
+        self.stop_requested.set()
+        with self._condition:
+            self._condition.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    def _draw_stats(self, frame):
+        lines = self.timer.budget_lines()
+        lines.append(f"display: {self.measured_fps:.1f} FPS (target {self.display_fps})")
+        x = max(10, frame.shape[1] - 300)
+        for i, line in enumerate(lines):
+            cv2.putText(frame, line, (x, 20 + i * 18), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (200, 200, 200), 1, cv2.LINE_AA)
+
+    def _run(self):
+        interval = 1.0 / self.display_fps
+        last_composited = time.perf_counter()
+
+        while not self.stop_requested.is_set():
+            with self._condition:
+                if self._latest is None:
+                    self._condition.wait(timeout=interval)
+                pending = self._latest
+                self._latest = None
+
+            if pending is not None and not self._visible.is_set():
+                # Nobody can see it; skip the drawing and wait for the next frame
+                pending = None
+            if pending is not None:
+                frame, overlay = pending
+                start = time.perf_counter()
+                overlay.draw(frame)
+                if self.show_stats and self.timer is not None:
+                    self._draw_stats(frame)
+                if self.timer is not None:
+                    self.timer.record("render", time.perf_counter() - start)
+                with self._condition:
+                    self._composited = frame
+                last_composited = time.perf_counter()
+
+            # Throttle to the display rate regardless of how fast inference runs
+            remaining = interval - (time.perf_counter() - last_composited)
+            if remaining > 0:
+                self.stop_requested.wait(remaining)
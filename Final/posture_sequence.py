@@ -0,0 +1,320 @@
+"""Temporal posture classifier over sliding windows of pose landmarks.
+
+Instead of judging each frame with hand-tuned angle thresholds, this scores a
+window of recent frames at once. Features are computed for every window in a
+batch with NumPy array operations, and a small logistic regression model (one
+output per posture issue) turns them into probabilities. Only NumPy is needed.
+
+Offline usage:
+    python posture_sequence.py train recordings/*.npz --labels labels.csv --out posture_sequence_model.npz
+    python posture_sequence.py eval recordings/*.npz --labels labels.csv --model posture_sequence_model.npz
+
+Recordings are .npz files with `landmarks` (frames x 7 x 3: x, y, visibility for the
+landmarks in SEQUENCE_LANDMARKS) and `labels` (frames x 3: shoulders, neck, lean).
+posture.py writes them when RECORD_LANDMARKS is enabled; their labels are the
+threshold rules' verdicts, so a model trained and scored on those alone can only
+learn to agree with the rules. Human labels come from a CSV of frame ranges
+(see load_human_labels): with --labels, training uses only the windows a person
+labelled, and eval reports the model and the threshold rules against those labels.
+"""
+import argparse
+import csv
+import glob
+import os
+import time
+
+import numpy as np
+
+# MediaPipe pose landmark indices used by the model
+SEQUENCE_LANDMARKS = [
+    0,   # Nose
+    7,   # Left ear
+    8,   # Right ear
+    11,  # Left shoulder
+    12,  # Right shoulder
+    23,  # Left hip
+    24,  # Right hip
+]
+ISSUES = ["shoulders", "neck", "lean"]
+WINDOW_SIZE = 15  # Frames per window (~0.5s at 30 FPS)
+
+
+def frame_features(landmarks):
+    """Per-frame posture features for landmark arrays shaped (..., 7, 3).
+
+    Coordinates are expressed relative to the shoulder midpoint and scaled by
+    shoulder width, so features don't depend on where the user sits in the frame.
+    """
+    xy = landmarks[..., :2]
+    nose, left_ear, right_ear = xy[..., 0, :], xy[..., 1, :], xy[..., 2, :]
+    left_shoulder, right_shoulder = xy[..., 3, :], xy[..., 4, :]
+    mid_hip = (xy[..., 5, :] + xy[..., 6, :]) / 2
+
+    mid_shoulder = (left_shoulder + right_shoulder) / 2
+    shoulder_width = np.linalg.norm(right_shoulder - left_shoulder, axis=-1) + 1e-6
+    scale = shoulder_width[..., np.newaxis]
+
+    shoulder_slope = (right_shoulder[..., 1] - left_shoulder[..., 1]) / shoulder_width
+    nose_offset = (nose - mid_shoulder) / scale
+    ear_offset = ((left_ear + right_ear) / 2 - mid_shoulder) / scale
+    torso = mid_shoulder - mid_hip
+    lean = np.arctan2(torso[..., 0], -torso[..., 1])
+    visibility = landmarks[..., 2].mean(axis=-1)
+
+    return np.stack([
+        shoulder_slope,
+        nose_offset[..., 0], nose_offset[..., 1],
+        ear_offset[..., 0], ear_offset[..., 1],
+        lean,
+        np.linalg.norm(torso, axis=-1) / shoulder_width,
+        visibility,
+    ], axis=-1)
+
+
+def window_features(windows):
+    """Summarize windows shaped (N, T, 7, 3) into a (N, F) feature matrix in one pass."""
+    per_frame = frame_features(windows)  # (N, T, 8)
+    return np.concatenate([
+        per_frame.mean(axis=1),
+        per_frame.std(axis=1),
+        per_frame[:, -1],
+        per_frame[:, -1] - per_frame[:, 0],
+    ], axis=1)
+
+
+def make_windows(landmarks, labels=None, window_size=WINDOW_SIZE, stride=1):
+    """Cut a recording into overlapping windows; each window takes the label of its last frame."""
+    if len(landmarks) < window_size:
+        empty = np.empty((0, window_size) + landmarks.shape[1:], dtype=np.float32)
+        return empty, (None if labels is None else np.empty((0, labels.shape[1])))
+    # sliding_window_view puts the window axis last: (N, 7, 3, T) -> (N, T, 7, 3)
+    windows = np.lib.stride_tricks.sliding_window_view(landmarks, window_size, axis=0)[::stride]
+    windows = np.moveaxis(windows, -1, 1)
+    if labels is None:
+        return windows, None
+    return windows, labels[window_size - 1::stride][:len(windows)]
+
+
+class SequenceClassifier:
+    """Multi-label logistic regression over window features (one sigmoid per issue)."""
+
+    def __init__(self, weights=None, bias=None, mean=None, std=None, window_size=WINDOW_SIZE):
+        self.weights = weights
+        self.bias = bias
+        self.mean = mean
+        self.std = std
+        self.window_size = window_size
+
+    def fit(self, windows, labels, epochs=500, learning_rate=0.1, l2=1e-3):
+        features = window_features(windows)
+        self.mean = features.mean(axis=0)
+        self.std = features.std(axis=0) + 1e-6
+        x = (features - self.mean) / self.std
+        y = labels.astype(np.float64)
+
+        # Weight positives up for issues that are rare in the recordings
+        positive_rate = np.clip(y.mean(axis=0), 1e-3, 1 - 1e-3)
+        sample_weight = np.where(y > 0, 0.5 / positive_rate, 0.5 / (1 - positive_rate))
+
+        self.weights = np.zeros((x.shape[1], y.shape[1]))
+        self.bias = np.zeros(y.shape[1])
+        for _ in range(epochs):
+            p = 1 / (1 + np.exp(-(x @ self.weights + self.bias)))
+            error = (p - y) * sample_weight / len(x)
+            self.weights -= learning_rate * (x.T @ error + l2 * self.weights)
+            self.bias -= learning_rate * error.sum(axis=0)
+        return self
+
+    def predict_proba(self, windows):
+        """Issue probabilities for a batch of windows shaped (N, T, 7, 3) -> (N, 3)."""
+        x = (window_features(windows) - self.mean) / self.std
+        return 1 / (1 + np.exp(-(x @ self.weights + self.bias)))
+
+    def predict(self, windows, threshold=0.5):
+        return self.predict_proba(windows) > threshold
+
+    def save(self, path):
+        np.savez(path, weights=self.weights, bias=self.bias, mean=self.mean, std=self.std,
+                 window_size=self.window_size)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data["weights"], data["bias"], data["mean"], data["std"], int(data["window_size"]))
+
+
+class LandmarkWindow:
+    """Fixed-size ring buffer of the most recent landmark frames for live scoring."""
+
+    def __init__(self, window_size=WINDOW_SIZE):
+        self.buffer = np.zeros((window_size, len(SEQUENCE_LANDMARKS), 3), dtype=np.float32)
+        self.count = 0
+
+    def append(self, frame_landmarks):
+        self.buffer[self.count % len(self.buffer)] = frame_landmarks
+        self.count += 1
+
+    def full(self):
+        return self.count >= len(self.buffer)
+
+    def window(self):
+        """Frames in time order, shaped (1, T, 7, 3) ready for predict_proba."""
+        start = self.count % len(self.buffer)
+        return np.roll(self.buffer, -start, axis=0)[np.newaxis]
+
+
+def landmarks_to_array(pose_landmarks):
+    """Convert MediaPipe pose landmarks to the (7, 3) array used by the model."""
+    landmarks = pose_landmarks.landmark
+    return np.array([[landmarks[i].x, landmarks[i].y, landmarks[i].visibility] for i in SEQUENCE_LANDMARKS],
+                    dtype=np.float32)
+
+
+def save_recording(path, landmarks, labels):
+    np.savez_compressed(path, landmarks=np.asarray(landmarks, dtype=np.float32),
+                        labels=np.asarray(labels, dtype=np.uint8))
+
+
+def load_human_labels(path):
+    """Human-labelled frame ranges from a CSV, as {recording file name: [(start, end, labels)]}.
+
+    Columns: recording (the .npz file name), start, end (frames, end excluded), then
+    shoulders, neck and lean as 0 or 1. Frames outside every range are unlabelled.
+    """
+    ranges = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            labels = np.array([int(row[issue]) for issue in ISSUES], dtype=np.int8)
+            ranges.setdefault(os.path.basename(row["recording"]), []).append(
+                (int(row["start"]), int(row["end"]), labels))
+    return ranges
+
+
+def frame_labels(ranges, frames):
+    """(frames x 3) labels from human-labelled ranges, -1 for frames nobody labelled."""
+    labels = np.full((frames, len(ISSUES)), -1, dtype=np.int8)
+    for start, end, values in ranges:
+        labels[start:end] = values
+    return labels
+
+
+def load_recordings(patterns, window_size=WINDOW_SIZE, stride=1, human_labels=None):
+    """Load every recording matching the glob patterns; returns windows, labels and the rules' labels.
+
+    Without human_labels (see load_human_labels) the labels are the recorded threshold
+    verdicts and the rules' labels are None. With them, only windows whose last frame a
+    person labelled are kept, labelled by the person, and the rules' verdicts for the
+    same windows come third.
+    """
+    all_windows, all_labels, all_rule_labels = [], [], []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            data = np.load(path)
+            windows, rule_labels = make_windows(data["landmarks"], data["labels"], window_size, stride)
+            labels = rule_labels
+            if human_labels is not None:
+                _, labels = make_windows(data["landmarks"], frame_labels(human_labels.get(os.path.basename(path), []),
+                                                                         len(data["landmarks"])), window_size, stride)
+                labelled = (labels >= 0).all(axis=1)
+                windows, labels, rule_labels = windows[labelled], labels[labelled], rule_labels[labelled]
+            all_windows.append(windows)
+            all_labels.append(labels)
+            all_rule_labels.append(rule_labels)
+            print(f"Loaded {path}: {len(windows)} windows")
+    if not all_windows:
+        raise FileNotFoundError(f"No recordings found for {patterns}")
+    if human_labels is None:
+        return np.concatenate(all_windows), np.concatenate(all_labels), None
+    return np.concatenate(all_windows), np.concatenate(all_labels), np.concatenate(all_rule_labels)
+
+
+def issue_metrics(predictions, labels):
+    """Accuracy, precision, recall and F1 per issue for boolean (N, 3) predictions."""
+    predictions, labels = predictions.astype(bool), labels.astype(bool)
+    metrics = {}
+    for i, issue in enumerate(ISSUES):
+        tp = np.sum(predictions[:, i] & labels[:, i])
+        fp = np.sum(predictions[:, i] & ~labels[:, i])
+        fn = np.sum(~predictions[:, i] & labels[:, i])
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        metrics[issue] = {
+            "accuracy": float(np.mean(predictions[:, i] == labels[:, i])),
+            "precision": float(precision),
+            "recall": float(recall),
+            "f1": float(2 * precision * recall / (precision + recall)) if precision + recall else 0.0,
+        }
+    return metrics
+
+
+def evaluate(model, windows, labels, rule_labels=None, batch_size=1024):
+    """Score all windows in batches and report accuracy/precision/recall per issue and speed.
+
+    With rule_labels (the threshold rules' verdicts for the same windows), the rules are
+    scored against the labels too, under "threshold_rules".
+    """
+    start = time.perf_counter()
+    predictions = np.concatenate([model.predict(windows[i:i + batch_size])
+                                  for i in range(0, len(windows), batch_size)])
+    elapsed = time.perf_counter() - start
+
+    report = issue_metrics(predictions, labels)
+    if rule_labels is not None:
+        report["threshold_rules"] = issue_metrics(rule_labels, labels)
+    report["microseconds_per_window"] = elapsed / max(len(windows), 1) * 1e6
+    return report
+
+
+def split_train_test(windows, labels, test_fraction=0.2):
+    """Hold out the last part of the data (not a random split, so overlapping windows don't leak)."""
+    split = int(len(windows) * (1 - test_fraction))
+    return windows[:split], labels[:split], windows[split:], labels[split:]
+
+
+def print_metrics(name, metrics):
+    for issue in ISSUES:
+        values = metrics[issue]
+        print(f"{name:16s} {issue:10s} accuracy {values['accuracy']:.3f}  precision {values['precision']:.3f}  "
+              f"recall {values['recall']:.3f}  f1 {values['f1']:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or evaluate the temporal posture classifier.")
+    parser.add_argument("command", choices=["train", "eval"])
+    parser.add_argument("recordings", nargs="+", help="Recording .npz files or glob patterns")
+    parser.add_argument("--model", default="posture_sequence_model.npz", help="Model file to evaluate")
+    parser.add_argument("--out", default="posture_sequence_model.npz", help="Where to save a trained model")
+    parser.add_argument("--window", type=int, default=WINDOW_SIZE, help="Frames per window")
+    parser.add_argument("--stride", type=int, default=1, help="Frames between consecutive windows")
+    parser.add_argument("--labels", help="CSV of human-labelled frame ranges (see load_human_labels)")
+    args = parser.parse_args()
+
+    human_labels = load_human_labels(args.labels) if args.labels else None
+    if human_labels is None:
+        print("No --labels: the recordings' labels are the threshold rules' verdicts, so the scores "
+              "below measure agreement with the rules, not accuracy")
+    window_size = args.window if args.command == "train" else SequenceClassifier.load(args.model).window_size
+    windows, labels, rule_labels = load_recordings(args.recordings, window_size, args.stride, human_labels)
+    if not len(windows):
+        parser.error("No labelled windows in the recordings")
+
+    if args.command == "train":
+        train_x, train_y, test_x, test_y = split_train_test(windows, labels)
+        test_rules = None if rule_labels is None else rule_labels[len(train_x):]
+        model = SequenceClassifier(window_size=args.window).fit(train_x, train_y)
+        model.save(args.out)
+        print(f"Model saved to {args.out}")
+        report = evaluate(model, test_x, test_y, test_rules)
+    else:
+        model = SequenceClassifier.load(args.model)
+        report = evaluate(model, windows, labels, rule_labels)
+
+    print("\nEvaluation" + (" against human labels:" if human_labels is not None else ":"))
+    print_metrics("model", report)
+    if "threshold_rules" in report:
+        print_metrics("threshold rules", report["threshold_rules"])
+    print(f"Inference: {report['microseconds_per_window']:.1f} µs per window")
+
+
+if __name__ == "__main__":
+    main()
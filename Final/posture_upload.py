@@ -0,0 +1,195 @@
+import glob
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+# Column in the posture_minutes table for each posture issue reported by posture.py
+ISSUE_COLUMNS = {
+    "shoulders": "shoulder_seconds",
+    "neck": "neck_seconds",
+    "lean": "lean_seconds",
+}
+
+
+class MinuteAggregator:
+    """Accumulates posture and screen distance measurements into one record per minute."""
+
+    def __init__(self, max_gap=2.0, too_close_cm=70):
+        # Gaps longer than this (no person detected, low confidence) are not counted
+        self.max_gap = max_gap
+        self.too_close_cm = too_close_cm
+        self.minutes = {}
+        self._last_posture_time = None
+        self._last_distance_time = None
+
+    def _bucket(self, timestamp):
+        minute = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+        if minute not in self.minutes:
+            self.minutes[minute] = defaultdict(float)
+        return self.minutes[minute]
+
+    def add_posture(self, timestamp, issues):
+        """Count the time since the previous evaluated frame as good or bad posture."""
+        if self._last_posture_time is not None:
+            elapsed = timestamp - self._last_posture_time
+            if 0 < elapsed <= self.max_gap:
+                bucket = self._bucket(timestamp)
+                if issues:
+                    bucket["bad_seconds"] += elapsed
+                    for issue in issues:
+                        bucket[ISSUE_COLUMNS[issue]] += elapsed
+                else:
+                    bucket["good_seconds"] += elapsed
+        self._last_posture_time = timestamp
+
+    def add_distance(self, timestamp, distance_cm):
+        bucket = self._bucket(timestamp)
+        bucket["distance_sum"] += distance_cm
+        bucket["distance_count"] += 1
+        if self._last_distance_time is not None and distance_cm < self.too_close_cm:
+            elapsed = timestamp - self._last_distance_time
+            if 0 < elapsed <= self.max_gap:
+                bucket["too_close_seconds"] += elapsed
+        self._last_distance_time = timestamp
+
+    def pop_completed(self, now=None, include_current=False):
+        """Remove and return records for minutes that have ended, ready for upload."""
+        current = datetime.fromtimestamp(now or time.time()).strftime("%Y-%m-%d %H:%M")
+        completed = []
+        for minute in sorted(self.minutes):
+            if minute >= current and not include_current:
+                continue
+            bucket = self.minutes.pop(minute)
+            record = {
+                "minute": minute,
+                "good_seconds": round(bucket["good_seconds"], 1),
+                "bad_seconds": round(bucket["bad_seconds"], 1),
+                "shoulder_seconds": round(bucket["shoulder_seconds"], 1),
+                "neck_seconds": round(bucket["neck_seconds"], 1),
+                "lean_seconds": round(bucket["lean_seconds"], 1),
+                "avg_distance_cm": None,
+                "too_close_seconds": round(bucket["too_close_seconds"], 1),
+                "distance_samples": int(bucket["distance_count"]),
+            }
+            if bucket["distance_count"]:
+                record["avg_distance_cm"] = round(bucket["distance_sum"] / bucket["distance_count"], 1)
+            completed.append(record)
+        return completed
+
+
+class PostureUploader:
+    """Uploads per-minute posture records to the screen-time API in batches.
+
+    Records are buffered in memory and sent from a background thread every
+    `flush_interval` seconds (or sooner once `batch_size` records are waiting).
+    Failed uploads are retried with backoff; if the API still can't be reached the
+    batch is spooled to disk and re-sent after the next successful upload.
+
+    Every record carries this uploader's session_id. The API keeps one row per user,
+    minute and session, so a retried batch replaces its own rows instead of counting
+    twice, while another session reporting the same minute adds to it.
+    """
+
+    def __init__(self, api_url, user_id, spool_dir="posture_spool", batch_size=30,
+                 flush_interval=60, max_retries=3, timeout=10):
+        self.api_url = api_url.rstrip("/") + "/posture/bulk"
+        self.user_id = user_id
+        self.session_id = uuid.uuid4().hex
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        os.makedirs(spool_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add(self, records):
+        if not records:
+            return
+        # Stamped per record, so spooled batches keep the session they came from
+        records = [dict(record, session_id=record.get("session_id", self.session_id)) for record in records]
+        with self._lock:
+            self._pending.extend(records)
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+
+    def _post(self, records):
+        body = json.dumps({"user_id": self.user_id, "minutes": records}).encode("utf-8")
+        req = urllib.request.Request(self.api_url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            return 200 <= response.status < 300
+
+    def _send_with_retry(self, records):
+        delay = 1
+        for attempt in range(self.max_retries):
+            try:
+                if self._post(records):
+                    return True
+            except urllib.error.HTTPError as e:
+                if 400 <= e.code < 500:
+                    # The API rejected the data itself - retrying or spooling won't help
+                    print(f"Posture upload rejected by API ({e.code}), dropping {len(records)} records")
+                    return True
+                print(f"Posture upload failed (attempt {attempt + 1}/{self.max_retries}): {e}")
+            except (urllib.error.URLError, OSError) as e:
+                print(f"Posture upload failed (attempt {attempt + 1}/{self.max_retries}): {e}")
+            if attempt < self.max_retries - 1:
+                if self._closed.wait(delay):
+                    # Shutting down - don't hold up exit with long backoffs
+                    return False
+                delay *= 2
+        return False
+
+    def _spool(self, records):
+        path = os.path.join(self.spool_dir, f"posture_{int(time.time() * 1000)}.json")
+        with open(path, "w") as f:
+            json.dump(records, f)
+
+    def _resend_spooled(self):
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, "posture_*.json"))):
+            try:
+                with open(path) as f:
+                    records = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Skipping unreadable spool file {path}: {e}")
+                continue
+            if not self._send_with_retry(records):
+                return
+            os.remove(path)
+
+    def flush(self):
+        with self._lock:
+            records, self._pending = self._pending, []
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start:start + self.batch_size]
+            if self._send_with_retry(batch):
+                # The API is reachable again, so catch up on anything saved while offline
+                self._resend_spooled()
+            else:
+                self._spool(batch)
+
+    def _run(self):
+        # Upload anything left over from a previous offline session
+        self._resend_spooled()
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """Send (or spool) everything still buffered and stop the upload thread."""
+        self._closed.set()
+        self._wake.set()
+        self._thread.join(timeout=self.timeout * self.max_retries + 5)
+        self.flush()
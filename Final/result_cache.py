@@ -0,0 +1,192 @@
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_KEY_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_key(image_hash, tier, references_version, stages=None, overlay=False, detector_variant="saved_model"):
+    """Cache key for one assessment: same image, tier, references, stages, detector and output form give the same result.
+
+    detector_variant is the runtime the detector ran on, e.g. "saved_model" or "tflite-int8"
+    (see DETECTOR_VARIANT in ergonomic_assessment.py). stages=None is a full assessment; an
+    empty list (which would assess nothing) raises ValueError.
+    """
+    if stages is not None and not stages:
+        raise ValueError("No stages to assess")
+    parts = [image_hash, tier, references_version, "all" if stages is None else ",".join(sorted(stages))]
+    if overlay:
+        parts.append("overlay")
+    parts.append(detector_variant)
+    return hashlib.sha256(":".join(parts).encode("utf-8")).hexdigest()[:32]
+
+
+class ResultCache:
+    """Content-addressed store of assessment responses and their result images.
+
+    Each entry is `<key>.json` (the response) plus `<key>.jpg` (the rendered image) in
+    `directory`, so the image can be served straight from the store; entries for
+    overlay responses, which the client draws itself, have no image. A key's files never
+    change once written, so they can be cached by clients indefinitely.
+
+    Reads and writes only update an in-memory index. Retention runs in sweep(), meant to
+    be called periodically off the request path (see start_sweeper): it re-scans the
+    directory, so entries written by other processes sharing it (job workers) are
+    counted, then removes entries unused for more than `max_age` seconds and the least
+    recently used ones while the store is over `max_bytes`. Recency survives restarts
+    through the files' modification times.
+    """
+
+    def __init__(self, directory, max_bytes=500 * 1024 * 1024, max_age=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._entries = OrderedDict()  # key -> (bytes on disk, last used, has image), least recently used first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.last_sweep = None
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _paths(self, key):
+        return os.path.join(self.directory, f"{key}.json"), os.path.join(self.directory, f"{key}.jpg")
+
+    def _entry_size(self, key):
+        """Bytes on disk and whether the entry has an image."""
+        json_path, image_path = self._paths(key)
+        size = os.path.getsize(json_path)
+        if os.path.exists(image_path):
+            return size + os.path.getsize(image_path), True
+        return size, False
+
+    def _load_index(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            key, ext = os.path.splitext(entry.name)
+            if ext != ".json" or not _KEY_PATTERN.match(key):
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, key, *self._entry_size(key)))
+            except OSError:
+                # An entry that is being evicted right now
+                continue
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            for used_at, key, size, has_image in sorted(entries):
+                self._entries[key] = (size, used_at, has_image)
+                self._total_bytes += size
+
+    def _touch(self, key, size, has_image):
+        self._total_bytes += size - self._entries.pop(key, (0,))[0]
+        self._entries[key] = (size, time.time(), has_image)
+
+    def get(self, key):
+        """The cached response for key, or None."""
+        json_path = self._paths(key)[0]
+        with self._lock:
+            if key in self._entries:
+                size, _, has_image = self._entries[key]
+                self._touch(key, size, has_image)
+            elif os.path.exists(json_path):
+                # Stored by another process sharing the directory (the image is written first)
+                try:
+                    self._touch(key, *self._entry_size(key))
+                except OSError:
+                    return None
+            else:
+                return None
+        try:
+            with open(json_path) as f:
+                response_data = json.load(f)
+            os.utime(json_path)
+        except (OSError, ValueError):
+            # Evicted by another thread or damaged; treat as a miss
+            return None
+        return response_data
+
+    def put(self, key, response_data, image_bytes=None):
+        """Store a response and its encoded result image, if any; returns the image's filename (None without one)."""
+        json_path, image_path = self._paths(key)
+        # Write under temporary names and rename, so readers never see half-written files
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        if image_bytes is not None:
+            with open(image_path + suffix, "wb") as f:
+                f.write(image_bytes)
+            os.replace(image_path + suffix, image_path)
+        with open(json_path + suffix, "w") as f:
+            json.dump(response_data, f)
+        os.replace(json_path + suffix, json_path)
+
+        size = os.path.getsize(json_path) + (len(image_bytes) if image_bytes is not None else 0)
+        with self._lock:
+            self._touch(key, size, image_bytes is not None)
+        return os.path.basename(image_path) if image_bytes is not None else None
+
+    def sweep(self):
+        """Apply the age and size bounds to everything in the directory; returns the number of entries removed."""
+        self._load_index()
+        removed = []
+        with self._lock:
+            if self.max_age is not None:
+                cutoff = time.time() - self.max_age
+                while self._entries and next(iter(self._entries.values()))[1] < cutoff:
+                    removed.append(self._pop_oldest())
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                removed.append(self._pop_oldest())
+            self.last_sweep = time.time()
+        for key in removed:
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return len(removed)
+
+    def _pop_oldest(self):
+        key, (size, _, _) = self._entries.popitem(last=False)
+        self._total_bytes -= size
+        return key
+
+    def entries(self, offset=0, limit=50):
+        """A page of entries, most recently used first, from the in-memory index (no filesystem calls)."""
+        with self._lock:
+            total = len(self._entries)
+            page = list(itertools.islice(reversed(self._entries.items()), offset, offset + limit))
+        return total, [{"key": key, "bytes": size, "last_used": used_at, "has_image": has_image}
+                       for key, (size, used_at, has_image) in page]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._total_bytes, "max_bytes": self.max_bytes,
+                    "max_age": self.max_age, "last_sweep": self.last_sweep}
+
+
+def start_sweeper(cache, interval=300):
+    """Run cache.sweep() every `interval` seconds on a daemon thread."""
+    def run():
+        while True:
+            try:
+                removed = cache.sweep()
+                if removed:
+                    print(f"Result cache sweep removed {removed} entries")
+            except Exception as e:
+                print(f"Result cache sweep failed: {str(e)}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="result-cache-sweeper", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,81 @@
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Threads shared by every engine in the process. OpenCV, TensorFlow and MediaPipe release
+# the GIL while they work, so independent stages of one image really do run in parallel.
+STAGE_WORKERS = int(os.environ.get("ERGONOMICS_STAGE_WORKERS", 8))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix="stage")
+    return _executor
+
+
+class Stage:
+    """A named step of the analysis. `func` receives the results of the stages it requires."""
+
+    def __init__(self, name, func, requires=()):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+
+
+def select_stages(stages, enabled):
+    """Keep the enabled stages whose requirements are also kept, preserving order."""
+    selected = []
+    names = set()
+    for stage in stages:
+        if stage.name in enabled and all(name in names for name in stage.requires):
+            selected.append(stage)
+            names.add(stage.name)
+    return selected
+
+
+def run_stages(stages, profiler, executor=None):
+    """Run each stage as soon as its requirements have finished and return {name: result}.
+
+    Independent stages run concurrently, so the total time approaches the slowest chain
+    of dependent stages rather than the sum of all of them. If a stage fails, the ones
+    already running are allowed to finish (they may hold the engine's pose graph) before
+    the first error is re-raised.
+    """
+    executor = executor or get_executor()
+    pending = {stage.name: stage for stage in stages}
+    results = {}
+    running = {}
+    error = None
+
+    def run(stage, inputs):
+        with profiler.measure(stage.name):
+            return stage.func(inputs)
+
+    while pending or running:
+        if error is None:
+            for name, stage in list(pending.items()):
+                if all(required in results for required in stage.requires):
+                    del pending[name]
+                    inputs = {required: results[required] for required in stage.requires}
+                    running[executor.submit(run, stage, inputs)] = name
+            if not running:
+                raise ValueError(f"Stages with unmet requirements: {', '.join(pending)}")
+        elif not running:
+            break
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = running.pop(future)
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                error = error or e
+
+    if error is not None:
+        raise error
+    return results
@@ -0,0 +1,153 @@
+"""TensorFlow Lite export of the EfficientDet detectors, and a detector that runs the exported model.
+
+The SavedModel is called eagerly from Python for every image; a converted, quantized
+TFLite model with a fixed input size runs the same network several times cheaper on
+CPU. Export once per detector and quantization, ahead of deployment:
+
+    python tflite_detector.py --tier standard --quantization dynamic
+    python tflite_detector.py --tier standard --quantization int8 --calibration sample_images/
+
+then serve it with ERGONOMICS_DETECTOR_RUNTIME=tflite (and ERGONOMICS_TFLITE_QUANTIZATION
+set to the same quantization). The exported file becomes part of the model's bundle.
+Check what quantization costs in accuracy with benchmark_detector_runtime.py.
+"""
+import argparse
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from lazy_import import LazyModule
+from model_bundle import BundleError, bundle_dir, ensure_bundle, verify_bundle, write_manifest
+
+tf = LazyModule("tensorflow")
+
+# "none" keeps float32 weights; "dynamic" stores weights as int8 and quantizes activations
+# on the fly; "float16" halves the weights; "int8" quantizes weights and activations using
+# calibration images. Operations TFLite has no builtin for run as TensorFlow ops either way.
+QUANTIZATIONS = ("none", "dynamic", "float16", "int8")
+OUTPUT_KEYS = ("detection_boxes", "detection_classes", "detection_scores", "num_detections")
+
+# Bundles checked against their manifest by this process; every engine loads its own interpreter
+_verified_bundles = set()
+_verified_lock = threading.Lock()
+
+
+def tflite_path(model_name, quantization, input_size):
+    return os.path.join(bundle_dir(model_name), "tflite", f"{quantization}_{input_size}.tflite")
+
+
+def letterbox(image_rgb, input_size):
+    """Resize the long side to input_size and pad bottom/right; returns the canvas and scale."""
+    height, width = image_rgb.shape[:2]
+    scale = input_size / max(height, width)
+    resized = cv2.resize(image_rgb, (max(1, round(width * scale)), max(1, round(height * scale))),
+                         interpolation=cv2.INTER_AREA)
+    canvas = np.zeros((input_size, input_size, 3), dtype=np.uint8)
+    canvas[:resized.shape[0], :resized.shape[1]] = resized
+    return canvas, scale
+
+
+def calibration_images(folder, input_size, limit=200):
+    """Letterboxed RGB images for int8 calibration."""
+    names = sorted(name for name in os.listdir(folder) if name.lower().endswith(('.jpg', '.jpeg', '.png')))
+    for name in names[:limit]:
+        image = cv2.imread(os.path.join(folder, name))
+        if image is not None:
+            yield letterbox(cv2.cvtColor(image, cv2.COLOR_BGR2RGB), input_size)[0]
+
+
+def export_tflite(model_name, input_size, quantization="dynamic", calibration_folder=None):
+    """Convert a bundled SavedModel to TFLite at a fixed input size and add it to the bundle."""
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization '{quantization}', expected one of: {', '.join(QUANTIZATIONS)}")
+    if quantization == "int8" and not calibration_folder:
+        raise ValueError("int8 quantization needs a folder of calibration images")
+
+    model = tf.saved_model.load(ensure_bundle(model_name))
+    serving = model.signatures["serving_default"]
+
+    @tf.function(input_signature=[tf.TensorSpec([1, input_size, input_size, 3], tf.uint8, name="input_tensor")])
+    def detect(input_tensor):
+        outputs = serving(input_tensor=input_tensor)
+        return {key: outputs[key] for key in OUTPUT_KEYS}
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([detect.get_concrete_function()], model)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+    if quantization != "none":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        converter.representative_dataset = lambda: ([image[np.newaxis]] for image in
+                                                    calibration_images(calibration_folder, input_size))
+
+    print(f"Converting {model_name} to TFLite ({quantization}, {input_size}px)...")
+    flatbuffer = converter.convert()
+    path = tflite_path(model_name, quantization, input_size)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        f.write(flatbuffer)
+    os.replace(path + ".tmp", path)
+    write_manifest(model_name)
+    print(f"Wrote {path} ({len(flatbuffer) / 1e6:.1f} MB)")
+    return path
+
+
+class TFLiteDetector:
+    """Runs an exported detector on one RGB image and returns the SavedModel's output format.
+
+    Images are letterboxed to the model's fixed input size and the boxes mapped back, so
+    results can go straight to filter_detections. The model file is memory-mapped by the
+    interpreter. An interpreter runs one image at a time, so give each engine its own.
+    """
+
+    def __init__(self, model_path, input_size, num_threads=None):
+        self.model_path = model_path
+        self.input_size = input_size
+        self._interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+        self._runner = self._interpreter.get_signature_runner()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, model_name, input_size, quantization, num_threads=None):
+        """The exported model from a checked bundle; raises BundleError if it hasn't been exported."""
+        path = tflite_path(model_name, quantization, input_size)
+        if not os.path.exists(path):
+            raise BundleError(f"No {quantization} TFLite export of {model_name} at {input_size}px; run "
+                              f"'python tflite_detector.py --quantization {quantization}' for its tier first")
+        with _verified_lock:
+            if model_name not in _verified_bundles:
+                verify_bundle(model_name)
+                _verified_bundles.add(model_name)
+        return cls(path, input_size, num_threads)
+
+    def __call__(self, image_rgb):
+        height, width = image_rgb.shape[:2]
+        canvas, scale = letterbox(image_rgb, self.input_size)
+        with self._lock:
+            outputs = self._runner(input_tensor=canvas[np.newaxis])
+        detections = {key: np.asarray(outputs[key]) for key in OUTPUT_KEYS}
+        # Boxes are normalized to the padded canvas; rescale them to the original image
+        y_factor = self.input_size / (height * scale)
+        x_factor = self.input_size / (width * scale)
+        boxes = detections["detection_boxes"] * np.array([y_factor, x_factor, y_factor, x_factor], dtype=np.float32)
+        detections["detection_boxes"] = np.clip(boxes, 0.0, 1.0)
+        return detections
+
+
+def main():
+    from ergonomic_assessment import get_tier
+
+    parser = argparse.ArgumentParser(description="Export a tier's detector to TensorFlow Lite.")
+    parser.add_argument("--tier", help="Model tier whose detector and input size to export")
+    parser.add_argument("--quantization", default="dynamic", choices=QUANTIZATIONS)
+    parser.add_argument("--calibration", help="Folder of representative images (required for int8)")
+    args = parser.parse_args()
+    _, settings = get_tier(args.tier)
+    export_tflite(settings["detector"], settings["detector_input_size"], args.quantization, args.calibration)
+
+
+if __name__ == "__main__":
+    main()
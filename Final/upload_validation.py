@@ -0,0 +1,125 @@
+"""Validation of uploaded images while they stream in, before any model work.
+
+Werkzeug writes each uploaded file into the stream returned by the request's
+_get_file_stream; ImageUploadBuffer is such a stream. It refuses the upload as soon as
+the body grows past max_bytes, the first bytes aren't a format the engine can decode,
+or the header gives dimensions outside the accepted range, so junk is turned away
+after a few kilobytes instead of after buffering and decoding the whole body. The
+errors are Werkzeug HTTP exceptions (413, 415 and 400), which the app answers as JSON.
+"""
+import io
+import struct
+
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge, UnsupportedMediaType
+
+from image_pyramid import read_image_size
+
+# Formats cv2.imdecode reads, by their leading bytes; WebP is a RIFF container checked separately
+SIGNATURES = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"BM", "bmp"),
+)
+ACCEPTED_FORMATS = ("jpeg", "png", "webp", "bmp")
+SIGNATURE_BYTES = 12
+# Give up on finding the dimensions after this many bytes; camera EXIF blocks can put a
+# JPEG's frame header 64 KB into the file
+HEADER_BYTES = 256 * 1024
+MIN_IMAGE_SIDE = 32  # Smaller images can't show a person at a desk
+MAX_IMAGE_PIXELS = 50_000_000  # Decoded, that's 150 MB of BGR pixels
+
+
+def image_format(head):
+    """Format of an encoded image from its first SIGNATURE_BYTES bytes; None if not one the engine reads."""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    for signature, name in SIGNATURES:
+        if head.startswith(signature):
+            return name
+    return None
+
+
+def webp_size(head):
+    """(width, height) from a WebP file's first 30 bytes; None if they don't hold a known header.
+
+    Pillow only opens complete WebP files, so the three bitstream headers are read here.
+    """
+    if len(head) < 30:
+        return None
+    chunk = head[12:16]
+    if chunk == b"VP8X":
+        # Extended format: 24-bit canvas width and height minus one
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+    elif chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        # Lossy: 14-bit width and height after the key frame's start code
+        width, height = (value & 0x3FFF for value in struct.unpack("<HH", head[26:30]))
+    elif chunk == b"VP8L" and head[20] == 0x2F:
+        # Lossless: 14-bit width and height minus one, packed after the signature byte
+        bits = int.from_bytes(head[21:25], "little")
+        width, height = (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    else:
+        return None
+    return width, height
+
+
+def header_size(head, image_format):
+    """(width, height) from the start of an encoded image; None until enough of it has arrived."""
+    if image_format == "webp":
+        return webp_size(head)
+    return read_image_size(io.BytesIO(head))
+
+
+def check_dimensions(size, min_side=MIN_IMAGE_SIDE, max_pixels=MAX_IMAGE_PIXELS):
+    width, height = size
+    if min(width, height) < min_side:
+        raise BadRequest(f"Image is {width}x{height}; both sides must be at least {min_side} pixels")
+    if max_pixels is not None and width * height > max_pixels:
+        raise RequestEntityTooLarge(f"Image is {width}x{height}; at most {max_pixels // 1_000_000} megapixels are accepted")
+
+
+class ImageUploadBuffer(io.BytesIO):
+    """In-memory stream for one uploaded image that validates it as Werkzeug writes it.
+
+    After the upload has been parsed, `format` and `size` (width, height) describe the
+    image; call finish() to reject a body that ended before its header did.
+    """
+
+    def __init__(self, max_bytes=None, min_side=MIN_IMAGE_SIDE, max_pixels=MAX_IMAGE_PIXELS):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.min_side = min_side
+        self.max_pixels = max_pixels
+        self.format = None
+        self.size = None
+
+    def write(self, data):
+        if self.max_bytes is not None and self.tell() + len(data) > self.max_bytes:
+            raise RequestEntityTooLarge(f"Image is larger than {self.max_bytes // (1024 * 1024)} MB")
+        written = super().write(data)
+        if self.size is None:
+            self._sniff(final=False)
+        return written
+
+    def _sniff(self, final):
+        with self.getbuffer() as view:
+            head = bytes(view[:HEADER_BYTES])
+        if self.format is None:
+            if len(head) < SIGNATURE_BYTES and not final:
+                return
+            self.format = image_format(head)
+            if self.format is None:
+                raise UnsupportedMediaType(f"Unsupported image format; accepted formats: {', '.join(ACCEPTED_FORMATS)}")
+        size = header_size(head, self.format)
+        if size is None:
+            if final or len(head) >= HEADER_BYTES:
+                raise BadRequest(f"Could not read the {self.format.upper()} image header")
+            return
+        check_dimensions(size, self.min_side, self.max_pixels)
+        self.size = size
+
+    def finish(self):
+        """Validate a body that was too short to finish sniffing while it streamed in; returns self."""
+        if self.size is None:
+            self._sniff(final=True)
+        return self
@@ -0,0 +1,290 @@
+"""Continuous ergonomic assessment of a webcam stream or a video clip.
+
+Running the full still-image pipeline on every frame would mostly repeat work: desks,
+chairs and screens barely move. VideoAssessment runs the EfficientDet detector only on
+keyframes (every `keyframe_interval` frames, or sooner when the scene changes) and
+follows the equipment boxes in between with sparse optical flow. Pose runs on every
+frame with MediaPipe in tracking mode, which is much cheaper than a fresh detection per
+frame. Each frame is scored with the same rule table as still images, and issues are
+reported once they hold for a share of the recent window, so one awkward frame doesn't
+trigger a recommendation.
+
+    python video_assessment.py clip.mp4 --fps 5
+    python video_assessment.py 0          # webcam
+"""
+import argparse
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from ergonomic_assessment import AdvancedErgonomicAssessment, ERGONOMIC_REFERENCES
+from ergonomic_rules import (NOT_ENOUGH_INFORMATION, RULES, WELL_SET_UP, evaluate_rules, extract_features,
+                             insufficient_information, record_to_dict)
+from image_pyramid import ImagePyramid
+from image_stats import brightness_stats, glare_regions, luminance_planes
+
+TRACK_MAX_SIZE = 480  # Long side of the grayscale copy boxes are tracked on
+THUMBNAIL_SIZE = (32, 32)  # Scene change is judged on a tiny thumbnail
+LIGHTING_MAX_SIZE = 320  # Lighting changes slowly and is measured on a small copy
+
+
+class BoxTracker:
+    """Moves detection boxes along with the frame using Lucas-Kanade optical flow.
+
+    Corner features are picked inside every box on a keyframe and tracked from frame to
+    frame; each box shifts by the median motion of its features. Boxes are in
+    original-image pixels, tracking runs on a TRACK_MAX_SIZE grayscale copy.
+    """
+
+    def __init__(self, max_corners=20, min_points=3):
+        self.max_corners = max_corners
+        self.min_points = min_points
+        self.objects = {}
+        self._gray = None
+        self._scale = 1.0
+        self._points = {}
+
+    def reset(self, gray, scale, detected_objects):
+        self._gray, self._scale = gray, scale
+        self.objects = {name: dict(obj) for name, obj in detected_objects.items()}
+        self._points = {}
+        for name, obj in self.objects.items():
+            x_min, y_min, x_max, y_max = (int(round(v / scale)) for v in obj["bbox"])
+            mask = np.zeros_like(gray)
+            mask[max(0, y_min):max(0, y_max), max(0, x_min):max(0, x_max)] = 255
+            points = cv2.goodFeaturesToTrack(gray, self.max_corners, 0.01, 5, mask=mask)
+            if points is not None:
+                self._points[name] = points.astype(np.float32)
+
+    def update(self, gray):
+        """Move the boxes to the new frame; returns the share of tracked features that were lost."""
+        if self._gray is None or not self._points:
+            self._gray = gray
+            return 0.0
+        names = list(self._points)
+        points = np.concatenate([self._points[name] for name in names])
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(self._gray, gray, points, None)
+        status = status.reshape(-1).astype(bool)
+        self._gray = gray
+
+        offset = 0
+        for name in names:
+            count = len(self._points[name])
+            found = status[offset:offset + count]
+            before = points[offset:offset + count][found].reshape(-1, 2)
+            after = moved[offset:offset + count][found].reshape(-1, 2)
+            offset += count
+            if len(after) < self.min_points:
+                # Too little texture left to follow; keep the box where it was
+                self._points.pop(name)
+                continue
+            dx, dy = np.median(after - before, axis=0) * self._scale
+            obj = self.objects[name]
+            x_min, y_min, x_max, y_max = obj["bbox"]
+            obj["bbox"] = [x_min + dx, y_min + dy, x_max + dx, y_max + dy]
+            obj["center"] = [(obj["bbox"][0] + obj["bbox"][2]) / 2, (obj["bbox"][1] + obj["bbox"][3]) / 2]
+            self._points[name] = after.reshape(-1, 1, 2)
+        return 1.0 - status.mean()
+
+
+class VideoAssessment:
+    """Assesses a stream of frames; see the module docstring.
+
+    Reuses an engine's detector and posture measurement, and by default its MediaPipe
+    Pose graph in tracking mode (engine.tracking_pose), so one VideoAssessment serves
+    one stream at a time. That graph keeps the previous frame's landmarks; engines from
+    an AssessmentPool have it reset between clips. pose may be any object with the
+    graph's process() method.
+    """
+
+    def __init__(self, engine=None, tier=None, pose=None, keyframe_interval=30, scene_change_threshold=0.15,
+                 max_lost_features=0.5, lighting_interval=15, window_seconds=30.0, min_issue_share=0.5):
+        self.engine = engine or AdvancedErgonomicAssessment(tier=tier)
+        self.keyframe_interval = keyframe_interval
+        self.scene_change_threshold = scene_change_threshold
+        self.max_lost_features = max_lost_features
+        self.lighting_interval = lighting_interval
+        self.window_seconds = window_seconds
+        self.min_issue_share = min_issue_share
+        self.references = dict(ERGONOMIC_REFERENCES)
+        if pose is None and self.engine.tracking_pose_used:
+            # Left over from an earlier stream on an engine outside an AssessmentPool
+            self.engine.reset_tracking_pose()
+        self.pose = pose if pose is not None else self.engine.tracking_pose
+        self.tracker = BoxTracker()
+        self._window = deque()  # (timestamp, feature record, fired rules)
+        self._keyframe_thumbnail = None
+        self._frames_since_keyframe = 0
+        self._lighting = None
+        self._glare = (False, [])
+        self.frames = 0
+        self.keyframes = 0
+        self.seconds = {"detection": 0.0, "tracking": 0.0, "pose": 0.0, "lighting": 0.0}
+
+    def _timed(self, component, func):
+        start = time.perf_counter()
+        result = func()
+        self.seconds[component] += time.perf_counter() - start
+        return result
+
+    def _is_keyframe(self, thumbnail, lost_features):
+        if self._keyframe_thumbnail is None or self._frames_since_keyframe >= self.keyframe_interval:
+            return True
+        if lost_features > self.max_lost_features:
+            return True
+        change = cv2.absdiff(thumbnail, self._keyframe_thumbnail).mean() / 255
+        return change > self.scene_change_threshold
+
+    def process_frame(self, frame, timestamp=None):
+        """Assess one BGR frame; returns its objects, pose landmarks and the issues it raised."""
+        timestamp = time.time() if timestamp is None else timestamp
+        sizes = self.engine.stage_sizes()
+        # Copies are made on first use: detection only runs on keyframes and lighting every
+        # lighting_interval frames, so most frames only need the tracking and pose copies
+        pyramid = ImagePyramid.from_array(frame)
+        width, height = pyramid.original_size
+        self.frames += 1
+        self._frames_since_keyframe += 1
+
+        track_image = pyramid.level(TRACK_MAX_SIZE)
+        gray = cv2.cvtColor(track_image, cv2.COLOR_BGR2GRAY)
+        thumbnail = cv2.resize(gray, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+        lost_features = self._timed("tracking", lambda: self.tracker.update(gray))
+
+        if self._is_keyframe(thumbnail, lost_features):
+            detection_rgb = cv2.cvtColor(pyramid.level(sizes["detection"]), cv2.COLOR_BGR2RGB)
+            detected_objects = self._timed("detection", lambda: self.engine.detect_objects(detection_rgb, (width, height)))
+            self.tracker.reset(gray, pyramid.scale(track_image), detected_objects)
+            self._keyframe_thumbnail = thumbnail
+            self._frames_since_keyframe = 0
+            self.keyframes += 1
+        detected_objects = self.tracker.objects
+
+        if self._lighting is None or self.frames % self.lighting_interval == 0:
+            def lighting():
+                # Glare is found on the full frame; lighting on a small copy of it
+                value, glare_mask = luminance_planes(pyramid.level(), LIGHTING_MAX_SIZE)
+                self._lighting = brightness_stats(value)[0]
+                self._glare = glare_regions(glare_mask)
+            self._timed("lighting", lighting)
+
+        pose_rgb = cv2.cvtColor(pyramid.level(sizes["pose"]), cv2.COLOR_BGR2RGB)
+        pose_landmarks = self._timed("pose", lambda: self.pose.process(pose_rgb).pose_landmarks)
+        posture_measurements = self.engine.measure_posture(pose_landmarks, width, height) if pose_landmarks else None
+
+        features = extract_features(detected_objects, posture_measurements, self._lighting, self._glare)
+        fired = evaluate_rules(features, self.references)[0]
+        self._window.append((timestamp, features, fired))
+        while self._window and self._window[0][0] < timestamp - self.window_seconds:
+            self._window.popleft()
+
+        return {
+            "timestamp": timestamp,
+            "keyframe": self._frames_since_keyframe == 0,
+            "detected_objects": {name: dict(obj) for name, obj in detected_objects.items()},
+            "pose_landmarks": pose_landmarks,
+            "issues": [rule.issue for rule, hit in zip(RULES, fired) if hit],
+        }
+
+    def summary(self):
+        """Issues that held for at least min_issue_share of the frames in the recent window."""
+        if not self._window:
+            return {"frames": self.frames, "issue_share": {}, "issues": [], "recommendations": []}
+        features = np.concatenate([features for _, features, _ in self._window])
+        fired = np.stack([fired for _, _, fired in self._window])
+        share = fired.mean(axis=0)
+
+        issues, recommendations = [], []
+        for index, rule in enumerate(RULES):
+            if share[index] < self.min_issue_share:
+                continue
+            # Describe the issue with the median of the frames that raised it
+            hits = features[fired[:, index]]
+            values = record_to_dict(hits[:1])
+            for name in hits.dtype.names:
+                if hits.dtype[name].kind == "f" and not np.isnan(hits[name]).all():
+                    values[name] = float(np.nanmedian(hits[name]))
+            issues.append(rule.issue)
+            recommendations.append(rule.message.format(**values, **self.references))
+        if not recommendations and insufficient_information(features).mean() >= self.min_issue_share:
+            recommendations.append(NOT_ENOUGH_INFORMATION)
+
+        return {
+            "frames": self.frames,
+            "keyframes": self.keyframes,
+            "window_frames": len(self._window),
+            "window_seconds": self._window[-1][0] - self._window[0][0],
+            "issue_share": {rule.issue: round(float(s), 3) for rule, s in zip(RULES, share) if s > 0},
+            "issues": issues,
+            "recommendations": recommendations or [WELL_SET_UP],
+            "seconds": {component: round(seconds, 3) for component, seconds in self.seconds.items()},
+        }
+
+
+def process_video(source, engine=None, tier=None, fps=None, max_seconds=None, on_frame=None, **options):
+    """Assess a video file (or a webcam index) and return the summary of its last window.
+
+    fps samples the stream down to that many frames per second of video time;
+    max_seconds stops after that much video. on_frame(result, frame) is called per
+    assessed frame, e.g. to draw a preview.
+    """
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video source: {source}")
+    source_fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    step = max(1, round(source_fps / fps)) if fps else 1
+    # Webcams have no video clock; use wall time for them
+    live = isinstance(source, int)
+    options.setdefault("window_seconds", float("inf") if not live else 30.0)
+
+    video = VideoAssessment(engine=engine, tier=tier, **options)
+    index = 0
+    start = time.time()
+    try:
+        while True:
+            ok, frame = capture.read() if index % step == 0 else (capture.grab(), None)
+            if not ok:
+                break
+            if frame is not None:
+                timestamp = time.time() if live else index / source_fps
+                if max_seconds is not None and (timestamp - start if live else timestamp) > max_seconds:
+                    break
+                result = video.process_frame(frame, timestamp)
+                if on_frame is not None and on_frame(result, frame) is False:
+                    break
+            index += 1
+        return video.summary()
+    finally:
+        capture.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Continuous ergonomic assessment of a video clip or webcam.")
+    parser.add_argument("source", help="Video file, or a webcam index such as 0")
+    parser.add_argument("--tier", help="Model tier")
+    parser.add_argument("--fps", type=float, help="Frames per second of video to assess (default: all)")
+    parser.add_argument("--keyframe-interval", type=int, default=30, help="Frames between detector runs")
+    parser.add_argument("--max-seconds", type=float, help="Stop after this much video")
+    args = parser.parse_args()
+
+    source = int(args.source) if args.source.isdigit() else args.source
+    last_report = [time.time()]
+
+    def report(result, frame):
+        if time.time() - last_report[0] > 5:
+            print(f"{result['timestamp']:.1f}s: {', '.join(result['issues']) or 'no issues'}")
+            last_report[0] = time.time()
+
+    summary = process_video(source, tier=args.tier, fps=args.fps, max_seconds=args.max_seconds,
+                            on_frame=report, keyframe_interval=args.keyframe_interval)
+    print(f"\n{summary['frames']} frames, detector ran on {summary.get('keyframes', 0)}")
+    print(f"Seconds per component: {summary.get('seconds', {})}")
+    print("Issues (share of frames): " + ", ".join(f"{k} {v:.0%}" for k, v in summary["issue_share"].items()))
+    for i, recommendation in enumerate(summary["recommendations"], 1):
+        print(f"{i}. {recommendation}")
+
+
+if __name__ == "__main__":
+    main()
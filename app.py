@@ -6,6 +6,7 @@ import io
 import base64
 import uuid
 import hashlib
+import math
 import os
 
 app = Flask(__name__)
@@ -259,6 +260,105 @@ def generate_insights(user_id):
     else:
         return jsonify({"insight": "No data available for the past week."}), 200
 
+POSTURE_MINUTE_FIELDS = ['good_seconds', 'bad_seconds', 'shoulder_seconds', 'neck_seconds',
+                         'lean_seconds', 'avg_distance_cm', 'too_close_seconds', 'distance_samples']
+POSTURE_SECONDS_FIELDS = [field for field in POSTURE_MINUTE_FIELDS if field.endswith('_seconds')]
+MAX_POSTURE_BATCH = 1440  # One day of minutes per request
+
+def is_amount(value):
+    """True for a finite, non-negative JSON number (booleans excluded)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value) and value >= 0
+
+@app.route('/posture/bulk', methods=['POST'])
+def ingest_posture_minutes():
+    """Store a batch of per-minute posture/distance summaries in a single transaction."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object with user_id and minutes"}), 400
+    user_id = data.get('user_id')
+    minutes = data.get('minutes', [])
+    
+    if not user_id or not isinstance(user_id, str) or not isinstance(minutes, list):
+        return jsonify({"error": "user_id and a list of minutes are required"}), 400
+    if len(minutes) > MAX_POSTURE_BATCH:
+        return jsonify({"error": f"At most {MAX_POSTURE_BATCH} minutes per request"}), 400
+    
+    rows = []
+    for entry in minutes:
+        if not isinstance(entry, dict):
+            return jsonify({"error": "Each minute must be a JSON object"}), 400
+        minute = entry.get('minute')
+        try:
+            datetime.strptime(minute, '%Y-%m-%d %H:%M')
+        except (TypeError, ValueError):
+            return jsonify({"error": f"Invalid minute: {minute}. Expected YYYY-MM-DD HH:MM"}), 400
+        # Distance stays NULL for minutes where no face was visible; clients that don't send
+        # sample counts weigh an average like one sample
+        values = {field: entry.get(field, 0) for field in POSTURE_MINUTE_FIELDS}
+        values['avg_distance_cm'] = entry.get('avg_distance_cm')
+        invalid = [field for field, value in values.items()
+                   if not (is_amount(value) or field == 'avg_distance_cm' and value is None)
+                   or field == 'distance_samples' and not isinstance(value, int)]
+        if invalid:
+            return jsonify({"error": f"Invalid {', '.join(invalid)} for minute {minute}: expected non-negative numbers"}), 400
+        session_id = entry.get('session_id', '')
+        if not isinstance(session_id, str):
+            return jsonify({"error": f"Invalid session_id for minute {minute}"}), 400
+        if values['avg_distance_cm'] is not None and not values['distance_samples']:
+            values['distance_samples'] = 1
+        rows.append([user_id, minute, session_id] + [values[field] for field in POSTURE_MINUTE_FIELDS])
+    
+    # Rows are per user, minute and monitoring session: a batch that is retried after a
+    # timeout replaces its own rows instead of double counting, and two sessions that
+    # report the same minute (one flushing a partial minute at exit) both keep their time
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO posture_minutes (user_id, minute, session_id, " + ", ".join(POSTURE_MINUTE_FIELDS) + ") "
+        "VALUES (?, ?, ?, " + ", ".join("?" for _ in POSTURE_MINUTE_FIELDS) + ") "
+        "ON CONFLICT(user_id, minute, session_id) DO UPDATE SET " +
+        ", ".join(f"{field} = excluded.{field}" for field in POSTURE_MINUTE_FIELDS),
+        rows
+    )
+    conn.commit()
+    conn.close()
+    
+    return jsonify({"message": "Posture data stored successfully", "stored": len(rows)}), 200
+
+@app.route('/posture/<user_id>', methods=['GET'])
+def get_posture_minutes(user_id):
+    """Return per-minute posture data for one day (defaults to today) for charting."""
+    day = request.args.get('date', datetime.today().strftime('%Y-%m-%d'))
+    
+    # Sessions that reported the same minute are merged: times add up, distances are
+    # averaged weighted by their sample counts
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT minute, " + ", ".join(f"SUM({field}) AS {field}" for field in POSTURE_SECONDS_FIELDS) + ", "
+        "SUM(avg_distance_cm * distance_samples) / NULLIF(SUM(CASE WHEN avg_distance_cm IS NOT NULL "
+        "THEN distance_samples END), 0) AS avg_distance_cm, "
+        "SUM(distance_samples) AS distance_samples FROM posture_minutes "
+        "WHERE user_id = ? AND minute LIKE ? GROUP BY minute ORDER BY minute",
+        (user_id, day + '%')
+    )
+    results = cursor.fetchall()
+    conn.close()
+    
+    minutes = [dict(row) for row in results]
+    for row in minutes:
+        if row['avg_distance_cm'] is not None:
+            row['avg_distance_cm'] = round(row['avg_distance_cm'], 1)
+    good_minutes = sum(row['good_seconds'] for row in minutes) / 60
+    bad_minutes = sum(row['bad_seconds'] for row in minutes) / 60
+    
+    return jsonify({
+        "date": day,
+        "minutes": minutes,
+        "good_posture_minutes": round(good_minutes, 1),
+        "bad_posture_minutes": round(bad_minutes, 1)
+    }), 200
+
 @app.route('/')
 def home():
     return render_template('index.html')
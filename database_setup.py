@@ -2,7 +2,8 @@ import sqlite3
 
 def setup_database():
     """
-    Set up the SQLite database with tables for users, health metrics, and screen time.
+    Set up the SQLite database with tables for users, health metrics, screen time and
+    per-minute posture summaries.
     """
     conn = sqlite3.connect("screen_time.db")
     cursor = conn.cursor()
@@ -34,6 +35,24 @@ def setup_database():
                         work_mode INTEGER NOT NULL DEFAULT 0,
                         FOREIGN KEY (user_id) REFERENCES users(user_id))''')
     
+    # Create posture minutes table - one row per user, minute and monitoring session, uploaded in
+    # batches by the posture monitor (sessions reporting the same minute are merged when read)
+    cursor.execute('''CREATE TABLE IF NOT EXISTS posture_minutes (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_id TEXT NOT NULL,
+                        minute TEXT NOT NULL,
+                        session_id TEXT NOT NULL DEFAULT '',
+                        good_seconds REAL NOT NULL DEFAULT 0,
+                        bad_seconds REAL NOT NULL DEFAULT 0,
+                        shoulder_seconds REAL NOT NULL DEFAULT 0,
+                        neck_seconds REAL NOT NULL DEFAULT 0,
+                        lean_seconds REAL NOT NULL DEFAULT 0,
+                        avg_distance_cm REAL,
+                        too_close_seconds REAL NOT NULL DEFAULT 0,
+                        distance_samples INTEGER NOT NULL DEFAULT 0,
+                        UNIQUE (user_id, minute, session_id),
+                        FOREIGN KEY (user_id) REFERENCES users(user_id))''')
+    
     conn.commit()
     conn.close()
 
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The screen-time API lives at the repository root; the assessment modules in Final/
+# import each other by bare name, as they do when the server runs from that folder
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.append(os.path.join(ROOT, "Final"))
@@ -0,0 +1,98 @@
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import ergonomic_assessment
+from ergonomic_assessment import batch_process_images, read_manifest
+
+
+class FakeEngine:
+    """Stands in for a batch worker's engine, recording which images it was given."""
+
+    def __init__(self):
+        self.seen = []
+
+    def process_image(self, image_path):
+        self.seen.append(image_path.replace("\\", "/").rsplit("/", 1)[-1])
+        return np.zeros((8, 8, 3), dtype=np.uint8), ["Looks good"], {"recommendations": ["Looks good"]}
+
+
+class InlinePool:
+    """multiprocessing.Pool replacement that runs the tasks in this process."""
+
+    def __init__(self, workers, initializer=None, initargs=()):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def imap_unordered(self, func, tasks):
+        return map(func, tasks)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = FakeEngine()
+    monkeypatch.setattr(ergonomic_assessment, "_batch_engine", engine)
+    monkeypatch.setattr(ergonomic_assessment.multiprocessing, "get_context",
+                        lambda method: SimpleNamespace(Pool=InlinePool))
+    return engine
+
+
+@pytest.fixture
+def folder(tmp_path):
+    images = tmp_path / "images"
+    images.mkdir()
+    for name in ["a.jpg", "b.jpg", "c.jpg", "d.png", "notes.txt"]:
+        (images / name).write_bytes(b"")
+    return images
+
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.endswith("\n")]
+
+
+def test_resume_skips_files_the_manifest_lists_as_done(engine, folder, tmp_path):
+    output = tmp_path / "results"
+    output.mkdir()
+    manifest = output / "manifest.jsonl"
+    # a.jpg finished, b.jpg failed, and the run was killed while writing c.jpg's record
+    manifest.write_text(json.dumps({"file": "a.jpg", "status": "ok"}) + "\n"
+                        + json.dumps({"file": "b.jpg", "status": "failed", "error": "boom"}) + "\n"
+                        + '{"file": "c.jpg", "sta')
+
+    summary = batch_process_images(str(folder), str(output), workers=1)
+
+    assert sorted(engine.seen) == ["b.jpg", "c.jpg", "d.png"]
+    assert summary["processed"] == 3 and summary["failed"] == 0 and summary["skipped"] == 1
+    assert read_manifest(str(manifest)) == {"a.jpg", "b.jpg", "c.jpg", "d.png"}
+    assert (output / "assessed_d.png").exists() and not (output / "assessed_a.jpg").exists()
+
+
+def test_a_finished_manifest_processes_nothing(engine, folder, tmp_path):
+    output = tmp_path / "results"
+    batch_process_images(str(folder), str(output), workers=1)
+    engine.seen.clear()
+
+    summary = batch_process_images(str(folder), str(output), workers=1)
+
+    assert engine.seen == []
+    assert summary["skipped"] == 4
+    assert len(read_records(output / "manifest.jsonl")) == 4
+
+
+def test_without_resume_everything_is_redone(engine, folder, tmp_path):
+    output = tmp_path / "results"
+    batch_process_images(str(folder), str(output), workers=1)
+    engine.seen.clear()
+
+    batch_process_images(str(folder), str(output), workers=1, resume=False)
+
+    assert sorted(engine.seen) == ["a.jpg", "b.jpg", "c.jpg", "d.png"]
+    assert len(read_records(output / "manifest.jsonl")) == 4
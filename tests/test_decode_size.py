@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+import pytest
+
+import ergonomic_assessment
+from ergonomic_assessment import AdvancedErgonomicAssessment
+from image_pyramid import ImagePyramid
+
+
+@pytest.mark.parametrize("tier, expected", [("fast", 640), ("standard", 2048), ("accurate", 2048)])
+def test_default_request_decodes_at_a_reduced_size(tier, expected):
+    engine = AdvancedErgonomicAssessment(tier=tier)
+
+    assert engine.decode_size() == expected
+
+
+def test_decode_size_follows_the_requested_stages():
+    engine = AdvancedErgonomicAssessment(tier="standard")
+
+    assert engine.decode_size(["lighting"], render=False) == 1024
+    assert engine.decode_size(["detection", "pose"], render=False) == 960
+    assert engine.decode_size(["lighting"]) == 1280
+
+
+def test_glare_on_a_12mp_upload_is_found_on_the_half_size_decode(monkeypatch):
+    image = np.full((3024, 4032, 3), 120, dtype=np.uint8)
+    cv2.circle(image, (600, 2400), 12, (255, 255, 255), -1)
+    upload = cv2.imencode(".jpg", image)[1].tobytes()
+    decoded = []
+
+    def load(source, max_size=None):
+        pyramid = ImagePyramid.from_bytes(source, max_size)
+        decoded.append(max(pyramid.level().shape[:2]))
+        return pyramid
+
+    monkeypatch.setattr(ergonomic_assessment.ImagePyramid, "load", load)
+    engine = AdvancedErgonomicAssessment(tier="standard")
+
+    *_, (found, [contour]) = engine.analyze_image(upload, stages=["lighting", "glare"], render=False)
+
+    assert decoded == [2016]
+    assert found
+    # In original pixels, give or take a half-size pixel at the highlight's edge
+    x, y, w, h = cv2.boundingRect(contour)
+    assert x + w / 2 == pytest.approx(600, abs=2) and y + h / 2 == pytest.approx(2400, abs=2)
+    assert w == pytest.approx(25, abs=4) and h == pytest.approx(25, abs=4)
@@ -0,0 +1,166 @@
+import random
+
+import numpy as np
+import pytest
+
+from ergonomic_assessment import ERGONOMIC_REFERENCES
+from ergonomic_rules import (NOT_ENOUGH_INFORMATION, RULES, WELL_SET_UP, evaluate_record, evaluate_rules,
+                             extract_features, features_from_dicts, record_to_dict)
+
+
+def legacy_evaluate_ergonomics(references, detected_objects, posture_measurements, lighting_info, glare_info):
+    """The if-chain evaluate_ergonomics the rule table replaced, with its thresholds read from references."""
+    recommendations = []
+    issues = []
+
+    if not detected_objects and not posture_measurements:
+        recommendations.append("Not enough information detected for a complete assessment. Try a clearer image showing both person and workspace.")
+        return recommendations, issues
+
+    if posture_measurements and posture_measurements["neck_angle"] is not None:
+        neck_angle = posture_measurements["neck_angle"]
+        if neck_angle > references["neck_angle_threshold"]:
+            recommendations.append(f"Your neck is bent at approximately {neck_angle:.1f}° which exceeds the recommended {references['neck_angle_threshold']}°. Raise your screen or adjust your posture to reduce neck strain.")
+            issues.append("neck_angle_excessive")
+
+    if posture_measurements and posture_measurements["shoulder_angle"] is not None:
+        if posture_measurements["shoulder_angle"] > references["shoulder_angle_threshold"]:
+            recommendations.append("Your shoulders appear to be uneven or hunched. Try relaxing your shoulders and sitting up straight.")
+            issues.append("shoulders_uneven")
+
+    if posture_measurements and posture_measurements["eye_midpoint"] and ("laptop" in detected_objects or "computer" in detected_objects):
+        eye_y = posture_measurements["eye_midpoint"][1]
+        screen = detected_objects.get("laptop", detected_objects.get("computer", None))
+        if screen:
+            if screen["bbox"][1] > eye_y:
+                recommendations.append("Your screen is positioned too low. The top of your screen should be at or slightly below eye level to maintain proper neck posture.")
+                issues.append("screen_too_low")
+            elif screen["bbox"][3] < eye_y:
+                recommendations.append("Your screen is positioned too high. Lower your screen so your eyes align with the top portion of the screen.")
+                issues.append("screen_too_high")
+
+    if "laptop" in detected_objects and not any(k in detected_objects for k in ["desk", "table", "inferred_desk"]):
+        recommendations.append("It appears your laptop is not on a proper desk or table. Using a laptop on your lap or unsuitable surface can lead to poor posture and ergonomic issues.")
+        issues.append("improper_laptop_surface")
+
+    if "laptop" in detected_objects and any(k in detected_objects for k in ["desk", "table", "inferred_desk"]):
+        if posture_measurements and posture_measurements["eye_midpoint"]:
+            eye_y = posture_measurements["eye_midpoint"][1]
+            if detected_objects["laptop"]["bbox"][1] > eye_y + references["laptop_below_eye_margin"]:
+                recommendations.append("Your laptop screen is too low relative to your eye level. Consider using a laptop stand or books to raise it, and a separate keyboard and mouse for typing.")
+                issues.append("laptop_too_low")
+
+    if lighting_info:
+        avg_brightness = lighting_info["avg_brightness"]
+        if avg_brightness < references["brightness_low_threshold"]:
+            recommendations.append("Your workspace appears to be too dark (average brightness: {:.1f}). Increase lighting to reduce eye strain.".format(avg_brightness))
+            issues.append("lighting_too_dim")
+        elif avg_brightness > references["brightness_high_threshold"]:
+            recommendations.append("Your workspace appears to be too bright (average brightness: {:.1f}). Reduce brightness or adjust lighting to prevent eye strain.".format(avg_brightness))
+            issues.append("lighting_too_bright")
+        if lighting_info["brightness_variance"] > references["brightness_variance_threshold"]:
+            recommendations.append("Your workspace has uneven lighting. Try to distribute light sources more evenly to reduce eye strain from constantly adjusting to different brightness levels.")
+            issues.append("uneven_lighting")
+
+    glare_detected, _ = glare_info
+    if glare_detected and ("laptop" in detected_objects or "computer" in detected_objects):
+        recommendations.append("Screen glare detected. Adjust your screen angle or light sources to reduce reflections that can cause eye strain.")
+        issues.append("screen_glare")
+
+    if posture_measurements and posture_measurements["viewing_distance"] is not None:
+        if posture_measurements["viewing_distance"] < references["minimum_viewing_distance"]:
+            recommendations.append("You appear to be sitting too close to your screen. Maintain an arm's length distance to reduce eye strain.")
+            issues.append("screen_too_close")
+
+    if detected_objects and not posture_measurements:
+        if "chair" in detected_objects and any(k in detected_objects for k in ["desk", "table"]):
+            desk_key = next((k for k in ["desk", "table"] if k in detected_objects), None)
+            chair_top = detected_objects["chair"]["bbox"][1]
+            desk_top = detected_objects[desk_key]["bbox"][1]
+            if abs(chair_top - desk_top) > references["chair_desk_tolerance"]:
+                if chair_top > desk_top:
+                    recommendations.append("The chair appears to be too low relative to the desk. Adjust chair height so elbows are level with the desk when seated.")
+                    issues.append("chair_too_low")
+                else:
+                    recommendations.append("The chair appears to be too high relative to the desk. Lower the chair so elbows are level with the desk when seated.")
+                    issues.append("chair_too_high")
+
+    if not recommendations:
+        recommendations.append("Your workspace appears to be ergonomically well set up!")
+    return recommendations, issues
+
+
+def random_box(rng):
+    top = rng.randint(0, 600)
+    return {"bbox": [rng.randint(0, 400), top, rng.randint(400, 800), top + rng.randint(20, 400)], "confidence": 0.9}
+
+
+def random_assessment(rng):
+    """Inputs to evaluate_ergonomics, drawn so that every rule fires in some of them."""
+    names = ["laptop", "computer", "desk", "table", "inferred_desk", "chair"]
+    objects = {name: random_box(rng) for name in names if rng.random() < 0.4}
+    posture = None
+    if rng.random() < 0.7:
+        posture = {
+            "neck_angle": rng.choice([None, rng.uniform(0, 60)]),
+            "shoulder_angle": rng.choice([None, rng.uniform(0, 40)]),
+            "viewing_distance": rng.choice([None, rng.uniform(20, 120)]),
+            "eye_midpoint": rng.choice([None, (rng.randint(0, 800), rng.randint(0, 700))]),
+        }
+    lighting = None
+    if rng.random() < 0.8:
+        lighting = {"avg_brightness": rng.uniform(20, 250), "brightness_variance": rng.uniform(0, 3000)}
+    glare = (True, ["contour"]) if rng.random() < 0.4 else (False, [])
+    return objects, posture, lighting, glare
+
+
+ASSESSMENTS = [random_assessment(random.Random(seed)) for seed in range(2000)]
+
+
+@pytest.mark.parametrize("references", [
+    ERGONOMIC_REFERENCES,
+    {**ERGONOMIC_REFERENCES, "neck_angle_threshold": 25, "brightness_low_threshold": 90, "chair_desk_tolerance": 10},
+])
+def test_rule_table_matches_the_if_chain(references):
+    for objects, posture, lighting, glare in ASSESSMENTS:
+        record = extract_features(objects, posture, lighting, glare)
+
+        assert evaluate_record(record, references) == \
+            legacy_evaluate_ergonomics(references, objects, posture, lighting, glare)
+
+
+def test_every_rule_is_exercised():
+    fired = set()
+    for objects, posture, lighting, glare in ASSESSMENTS:
+        fired.update(evaluate_record(extract_features(objects, posture, lighting, glare), ERGONOMIC_REFERENCES)[1])
+
+    assert fired == {rule.issue for rule in RULES}
+
+
+def test_nothing_detected_is_not_enough_information():
+    record = extract_features({}, None, {"avg_brightness": 10, "brightness_variance": 0}, (False, []))
+
+    assert evaluate_record(record, ERGONOMIC_REFERENCES) == ([NOT_ENOUGH_INFORMATION], [])
+
+
+def test_lighting_only_check_is_judged_on_lighting_alone():
+    lighting = {"avg_brightness": 10, "brightness_variance": 0}
+
+    recommendations, issues = evaluate_record(extract_features({}, None, lighting, (False, []), stages=["lighting"]),
+                                              ERGONOMIC_REFERENCES)
+    assert issues == ["lighting_too_dim"]
+
+    well_lit = {"avg_brightness": 120, "brightness_variance": 0}
+    assert evaluate_record(extract_features({}, None, well_lit, (False, []), stages=["lighting"]),
+                           ERGONOMIC_REFERENCES) == ([WELL_SET_UP], [])
+
+
+def test_stored_records_score_the_same_in_bulk():
+    records = np.concatenate([extract_features(*assessment) for assessment in ASSESSMENTS[:200]])
+    stored = features_from_dicts([record_to_dict(record) for record in records])
+
+    bulk = evaluate_rules(stored, ERGONOMIC_REFERENCES)
+
+    for row, record in zip(bulk, records):
+        issues = evaluate_record(record, ERGONOMIC_REFERENCES)[1]
+        assert [rule.issue for rule, hit in zip(RULES, row) if hit] == issues
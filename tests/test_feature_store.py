@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from ergonomic_rules import FEATURE_DTYPE
+from feature_store import OBJECT_CLASSES, FeatureStore, assessment_row
+
+
+def row(neck_angle):
+    features = np.zeros(1, dtype=FEATURE_DTYPE)
+    features["neck_angle"] = neck_angle
+    return assessment_row({
+        "tier": "standard",
+        "image_size": (640, 480),
+        "features": features,
+        "pose_landmarks": None,
+        "detected_objects": {"laptop": {"bbox": [10, 20, 110, 90], "confidence": 0.9}},
+        "lighting_info": None,
+        "glare_checked": False,
+        "glare_info": (False, []),
+        "profile": {"components": {"decode": {"ms": 4.0}}},
+    })
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FeatureStore(str(tmp_path / "features"), segment_rows=3)
+
+
+def test_rows_are_buffered_until_a_segment_is_full(store):
+    store.append("alice", row(10.0), timestamp=1.0)
+    store.append("alice", row(11.0), timestamp=2.0)
+
+    assert store.stats() == {"segments": 0, "rows": 0, "buffered_rows": 2}
+
+    store.append("alice", row(12.0), timestamp=3.0)
+
+    assert store.stats() == {"segments": 1, "rows": 3, "buffered_rows": 0}
+
+
+def test_query_filters_by_user_and_time_and_includes_the_buffer(store):
+    for i in range(4):
+        store.append("alice" if i % 2 else "bob", row(float(i)), timestamp=float(i))
+
+    columns = store.query(user_id="alice", start=0.0, end=3.5, columns=["timestamp", "features", "object_scores"])
+
+    assert columns["timestamp"].tolist() == [1.0, 3.0]
+    assert columns["features"]["neck_angle"].tolist() == [1.0, 3.0]
+    assert columns["object_scores"][:, OBJECT_CLASSES.index("laptop")] == pytest.approx([0.9, 0.9])
+
+
+def test_query_rejects_unknown_columns(store):
+    with pytest.raises(ValueError, match="posture"):
+        store.query(columns=["posture"])
+
+
+def test_compact_merges_segments_without_losing_rows(store):
+    for i in range(7):
+        store.append("alice", row(float(i)), timestamp=float(i))
+
+    merged = store.compact()
+
+    assert merged == 3
+    assert store.stats() == {"segments": 1, "rows": 7, "buffered_rows": 0}
+    assert store.query(columns=["features"])["features"]["neck_angle"].tolist() == list(map(float, range(7)))
+    assert FeatureStore(store.directory).query(user_id="alice")["timestamp"].tolist() == list(map(float, range(7)))
@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+import pytest
+
+from image_stats import glare_regions, luminance_planes
+
+
+def legacy_glare(image):
+    """The original full-resolution detect_glare."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    _, thresh = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY)
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return [contour for contour in contours if cv2.contourArea(contour) > 50]
+
+
+def desk_photo(highlight_radius):
+    """A 12 MP mid-grey photo with one specular highlight of the given radius."""
+    image = np.full((3024, 4032, 3), 120, dtype=np.uint8)
+    if highlight_radius:
+        cv2.circle(image, (600, 2400), highlight_radius, (255, 255, 255), -1)
+    return image
+
+
+@pytest.mark.parametrize("radius", [0, 3, 5, 6, 12, 200])
+def test_glare_matches_the_full_resolution_detector(radius):
+    image = desk_photo(radius)
+
+    _, glare_mask = luminance_planes(image)
+    found, areas = glare_regions(glare_mask)
+
+    expected = legacy_glare(image)
+    assert found == bool(expected)
+    assert [cv2.boundingRect(c) for c in areas] == [cv2.boundingRect(c) for c in expected]
+
+
+def test_small_highlight_survives_the_downscaled_lighting_plane():
+    image = desk_photo(6)
+
+    value, glare_mask = luminance_planes(image, max_size=256)
+
+    assert value.shape[:2] == (192, 256)
+    assert glare_mask.shape == image.shape[:2]
+    assert glare_regions(glare_mask)[0]
+
+
+def test_glare_regions_map_mask_coordinates_to_the_original_image():
+    mask = np.zeros((100, 100), dtype=np.uint8)
+    mask[40:50, 20:30] = 255
+
+    found, [contour] = glare_regions(mask, scale=4.0)
+
+    assert found
+    assert cv2.boundingRect(contour) == (80, 160, 37, 37)
+
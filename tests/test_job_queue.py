@@ -0,0 +1,117 @@
+import sqlite3
+import threading
+
+import pytest
+
+import job_queue
+from job_queue import JobStore, QueueFull
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"))
+
+
+def submit(store, tier="standard", image=b"jpeg bytes", **options):
+    return store.submit(image, tier, options.pop("stages", None), f"key-{tier}", **options)
+
+
+def stored_image(store, job_id):
+    with sqlite3.connect(store.path) as conn:
+        return conn.execute("SELECT image FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+
+
+def test_claim_then_complete(store):
+    job_id = submit(store, stages=["pose"], overlay=True, user_id="user-1")
+    assert store.get(job_id)["status"] == "queued"
+
+    job = store.claim(["standard"])
+
+    assert job == {"id": job_id, "tier": "standard", "stages": ["pose"], "overlay": True, "user_id": "user-1",
+                   "cache_key": "key-standard", "image": b"jpeg bytes"}
+    assert store.get(job_id)["status"] == "running"
+    assert store.claim(["standard"]) is None
+
+    store.complete(job_id, {"recommendations": ["ok"]})
+
+    finished = store.get(job_id)
+    assert finished["status"] == "done"
+    assert finished["result"] == {"recommendations": ["ok"]}
+    assert finished["finished_at"] is not None
+    assert stored_image(store, job_id) is None
+    assert store.depth() == {"queued": 0, "running": 0, "done": 1, "failed": 0}
+
+
+def test_oldest_job_is_claimed_first(store):
+    first, second = submit(store), submit(store)
+
+    assert store.get(second)["queue_position"] == 2
+    assert store.claim(["standard"])["id"] == first
+    assert store.claim(["standard"])["id"] == second
+
+
+def test_workers_only_claim_their_tiers(store):
+    job_id = submit(store, tier="accurate")
+
+    assert store.claim(["fast", "standard"]) is None
+    assert store.claim(["standard", "accurate"])["id"] == job_id
+
+
+def test_failed_job_keeps_its_error(store):
+    job_id = submit(store)
+    store.claim(["standard"])
+
+    store.fail(job_id, "Could not read image")
+
+    failed = store.get(job_id)
+    assert failed["status"] == "failed"
+    assert failed["error"] == "Could not read image"
+    assert "result" not in failed
+    assert stored_image(store, job_id) is None
+
+
+def test_timed_out_job_is_claimed_again_until_it_gives_up(store, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_TIMEOUT", -1)  # Every running job counts as abandoned
+    job_id = submit(store)
+
+    for _ in range(job_queue.MAX_ATTEMPTS):
+        assert store.claim(["standard"])["id"] == job_id
+    assert store.claim(["standard"]) is None
+
+    failed = store.get(job_id)
+    assert failed["status"] == "failed"
+    assert failed["error"] == f"Gave up after {job_queue.MAX_ATTEMPTS} attempts"
+
+
+def test_submit_refuses_jobs_past_max_depth(store):
+    submit(store, max_depth=2)
+    submit(store, max_depth=2)
+
+    with pytest.raises(QueueFull):
+        submit(store, max_depth=2)
+    store.claim(["standard"])
+    submit(store, max_depth=2)
+
+
+def test_concurrent_workers_never_claim_the_same_job(store):
+    job_ids = {submit(store) for _ in range(20)}
+    claimed = []
+
+    def worker():
+        while (job := store.claim(["standard"])) is not None:
+            claimed.append(job["id"])
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(job_ids)
+
+
+def test_cached_results_are_recorded_as_finished_jobs(store):
+    job_id = store.add_finished("standard", None, "key", {"cached": True})
+
+    assert store.get(job_id)["result"] == {"cached": True}
+    assert store.claim(["standard"]) is None
@@ -0,0 +1,77 @@
+import numpy as np
+
+from landmark_filter import OneEuroFilter
+
+FPS = 30.0
+
+
+def run(filter_, values, fps=FPS):
+    return np.array([filter_(value, i / fps) for i, value in enumerate(values)])
+
+
+def test_first_sample_passes_through():
+    landmarks = np.arange(66, dtype=float).reshape(33, 2)
+
+    np.testing.assert_array_equal(OneEuroFilter()(landmarks, 0.0), landmarks)
+
+
+def test_jitter_on_a_still_landmark_is_smoothed():
+    rng = np.random.default_rng(0)
+    noisy = 100 + rng.normal(0, 2, (300, 2))
+
+    filtered = run(OneEuroFilter(min_cutoff=1.0, beta=0.0), noisy)
+
+    assert filtered[30:].std(axis=0).max() < noisy.std(axis=0).min() / 3
+    np.testing.assert_allclose(filtered[30:].mean(axis=0), 100, atol=0.5)
+
+
+def test_beta_lets_fast_movements_through():
+    step = np.r_[np.zeros(30), np.full(30, 100.0)]
+
+    still = run(OneEuroFilter(min_cutoff=1.0, beta=0.0), step)
+    adaptive = run(OneEuroFilter(min_cutoff=1.0, beta=0.5), step)
+
+    # Two frames after the jump the adaptive filter is there, the plain low-pass halfway
+    assert adaptive[32] > 95
+    assert still[32] < 50
+
+
+def test_each_coordinate_adapts_on_its_own():
+    values = np.zeros((60, 2))
+    values[30:, 0] = 100.0  # Only x moves
+    values[:, 1] = 50.0
+
+    filtered = run(OneEuroFilter(min_cutoff=1.0, beta=0.5), values)
+
+    np.testing.assert_allclose(filtered[:, 1], 50.0)
+
+
+def test_restarts_after_a_gap():
+    filter_ = OneEuroFilter(min_cutoff=1.0, max_gap=0.5)
+    filter_(np.zeros(2), 0.0)
+    filter_(np.zeros(2), 1 / FPS)
+
+    np.testing.assert_array_equal(filter_(np.full(2, 80.0), 1.0), np.full(2, 80.0))
+
+
+def test_restarts_when_the_landmark_count_changes():
+    filter_ = OneEuroFilter()
+    filter_(np.zeros((33, 2)), 0.0)
+
+    face = np.ones((478, 2))
+    np.testing.assert_array_equal(filter_(face, 1 / FPS), face)
+
+
+def test_repeated_timestamp_returns_the_previous_estimate():
+    filter_ = OneEuroFilter()
+    filter_(np.zeros(2), 0.0)
+    previous = filter_(np.full(2, 10.0), 1 / FPS)
+
+    np.testing.assert_array_equal(filter_(np.full(2, 500.0), 1 / FPS), previous)
+
+
+def test_scalar_input_as_used_for_the_eye_aspect_ratio():
+    filter_ = OneEuroFilter(min_cutoff=5.0, beta=0.5)
+
+    assert float(filter_(0.3, 0.0)) == 0.3
+    assert 0.1 < float(filter_(0.1, 1 / FPS)) < 0.3
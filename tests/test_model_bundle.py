@@ -0,0 +1,36 @@
+import pytest
+
+import model_bundle
+from model_bundle import BundleError, verify_bundle, write_manifest
+
+
+@pytest.fixture
+def bundle(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_bundle, "MODEL_ROOT", str(tmp_path))
+    weights = tmp_path / "detector" / "saved_model" / "variables.data"
+    weights.parent.mkdir(parents=True)
+    weights.write_bytes(b"weights" * 100)
+    write_manifest("detector")
+    return weights
+
+
+def test_startup_check_catches_truncated_files(bundle):
+    bundle.write_bytes(b"weights")
+
+    with pytest.raises(BundleError, match="size"):
+        verify_bundle("detector")
+
+
+def test_changed_contents_are_left_to_the_checksum_verify(bundle):
+    bundle.write_bytes(b"WEIGHTS" * 100)
+
+    verify_bundle("detector")
+    with pytest.raises(BundleError, match="checksum"):
+        verify_bundle("detector", checksums=True)
+
+
+def test_missing_files_fail_the_startup_check(bundle):
+    bundle.unlink()
+
+    with pytest.raises(BundleError, match="missing"):
+        verify_bundle("detector")
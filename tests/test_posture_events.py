@@ -0,0 +1,111 @@
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from posture_events import PostureEventLog, PostureSummary
+
+
+def read_events(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def at(hour, minute, second):
+    return datetime(2025, 3, 14, hour, minute, second).timestamp()
+
+
+def test_frames_are_sampled_and_other_events_always_kept(tmp_path):
+    path = tmp_path / "events.jsonl"
+    log = PostureEventLog(str(path), frame_sample_rate=10)
+    for i in range(35):
+        log.log_frame(neck_angle=float(i))
+    log.log("alert", issue="neck")
+    log.close()
+
+    events = read_events(path)
+    assert [event["frame"] for event in events if event["event"] == "frame"] == [10, 20, 30]
+    assert [event["neck_angle"] for event in events if event["event"] == "frame"] == [9.0, 19.0, 29.0]
+    assert [event["issue"] for event in events if event["event"] == "alert"] == ["neck"]
+
+
+def test_sample_rate_of_one_keeps_every_frame(tmp_path):
+    path = tmp_path / "events.jsonl"
+    log = PostureEventLog(str(path), frame_sample_rate=0)
+    for _ in range(5):
+        log.log_frame()
+    log.close()
+
+    assert len(read_events(path)) == 5
+
+
+def test_close_writes_everything_still_queued_and_stops_the_writer(tmp_path):
+    path = tmp_path / "events.jsonl"
+    log = PostureEventLog(str(path), flush_interval=60)
+    for i in range(2000):
+        log.log("frame", frame=i, good=np.bool_(i % 2), angle=np.float32(1.5))
+    log.close()
+
+    assert not log._thread.is_alive()
+    events = read_events(path)
+    assert len(events) == 2000 - log.dropped
+    assert events[1]["good"] is True
+    assert events[1]["angle"] == 1.5
+
+
+def test_log_without_a_path_does_nothing(tmp_path):
+    log = PostureEventLog(None)
+    log.log("alert", issue="neck")
+    log.log_frame()
+    log.close()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_summary_splits_time_into_good_bad_and_issues():
+    summary = PostureSummary()
+    start = at(10, 15, 0)
+    summary.record(start, [])
+    summary.record(start + 1.5, [])
+    summary.record(start + 3.0, ["neck", "shoulders"])
+    summary.record(start + 4.0, ["neck"])
+
+    bucket = summary.hours["2025-03-14 10:00"]
+    assert dict(bucket) == pytest.approx({"good": 1.5, "bad": 2.5, "neck": 2.5, "shoulders": 1.5})
+    assert summary.minutes()["2025-03-14 10:00"]["bad"] == round(2.5 / 60, 2)
+
+
+def test_summary_rolls_over_to_the_next_hour():
+    summary = PostureSummary()
+    summary.record(at(10, 59, 58), [])
+    summary.record(at(10, 59, 59), [])
+    summary.record(at(11, 0, 0), ["lean"])
+    summary.record(at(11, 0, 1), ["lean"])
+
+    hours = summary.hours
+    assert list(summary.minutes()) == ["2025-03-14 10:00", "2025-03-14 11:00"]
+    assert hours["2025-03-14 10:00"]["good"] == pytest.approx(1.0)
+    assert "bad" not in hours["2025-03-14 10:00"]
+    assert hours["2025-03-14 11:00"]["bad"] == pytest.approx(2.0)
+    assert hours["2025-03-14 11:00"]["lean"] == pytest.approx(2.0)
+
+
+def test_summary_skips_gaps_longer_than_max_gap():
+    summary = PostureSummary(max_gap=2.0)
+    summary.record(at(10, 0, 0), [])
+    summary.record(at(10, 0, 30), [])  # Nobody in front of the camera for 30 s
+    summary.record(at(10, 0, 31), [])
+
+    assert summary.hours["2025-03-14 10:00"]["good"] == pytest.approx(1.0)
+
+
+def test_summary_save_writes_minutes(tmp_path):
+    summary = PostureSummary()
+    summary.record(at(9, 0, 0), [])
+    summary.record(at(9, 0, 1), ["neck"])
+    path = tmp_path / "summary.json"
+
+    summary.save(str(path))
+
+    assert json.loads(path.read_text()) == summary.minutes()
@@ -0,0 +1,114 @@
+import pytest
+
+import app as screen_time
+from database_setup import setup_database
+
+MINUTE = "2025-03-14 10:15"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # The API opens screen_time.db in the working directory
+    monkeypatch.chdir(tmp_path)
+    setup_database()
+    return screen_time.app.test_client()
+
+
+def upload(client, *minutes, user_id="user-1"):
+    return client.post("/posture/bulk", json={"user_id": user_id, "minutes": list(minutes)})
+
+
+def minute(session_id, good=0.0, bad=0.0, distance=None, samples=0, **fields):
+    return {"minute": MINUTE, "session_id": session_id, "good_seconds": good, "bad_seconds": bad,
+            "avg_distance_cm": distance, "distance_samples": samples, **fields}
+
+
+def day(client, user_id="user-1"):
+    response = client.get(f"/posture/{user_id}?date=2025-03-14")
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_retried_batch_replaces_its_own_rows(client):
+    assert upload(client, minute("a", good=40, bad=20, distance=60, samples=30)).status_code == 200
+    assert upload(client, minute("a", good=40, bad=20, distance=60, samples=30)).status_code == 200
+
+    [row] = day(client)["minutes"]
+    assert row["good_seconds"] == 40
+    assert row["bad_seconds"] == 20
+
+
+def test_sessions_reporting_the_same_minute_are_merged(client):
+    upload(client, minute("a", good=30, distance=60, samples=30, too_close_seconds=30))
+    upload(client, minute("b", good=15, bad=10, distance=90, samples=10))
+    upload(client, minute("c", bad=5))  # No face visible: no distance
+
+    result = day(client)
+    [row] = result["minutes"]
+    assert row["good_seconds"] == 45
+    assert row["bad_seconds"] == 15
+    assert row["too_close_seconds"] == 30
+    assert row["distance_samples"] == 40
+    assert row["avg_distance_cm"] == pytest.approx((60 * 30 + 90 * 10) / 40, abs=0.05)
+    assert result["good_posture_minutes"] == 0.8
+
+
+def test_distance_without_sample_count_weighs_like_one_sample(client):
+    upload(client, minute("a", distance=50), minute("b", distance=80, samples=3))
+
+    [row] = day(client)["minutes"]
+    assert row["distance_samples"] == 4
+    assert row["avg_distance_cm"] == pytest.approx((50 + 80 * 3) / 4, abs=0.05)
+
+
+def test_users_are_kept_apart(client):
+    upload(client, minute("a", good=60), user_id="user-1")
+    upload(client, minute("a", bad=60), user_id="user-2")
+
+    assert day(client, "user-1")["good_posture_minutes"] == 1.0
+    assert day(client, "user-2")["bad_posture_minutes"] == 1.0
+    assert day(client, "user-2")["good_posture_minutes"] == 0.0
+
+
+def test_invalid_minute_is_rejected(client):
+    response = upload(client, {"minute": "10:15", "good_seconds": 60})
+
+    assert response.status_code == 400
+    assert day(client)["minutes"] == []
+
+
+
+@pytest.mark.parametrize("body", [
+    ["not", "an", "object"],
+    "minutes",
+    {"user_id": "user-1", "minutes": {"minute": MINUTE}},
+    {"user_id": 42, "minutes": []},
+    {"user_id": "user-1", "minutes": ["2025-03-14 10:15"]},
+])
+def test_malformed_batches_are_rejected(client, body):
+    response = client.post("/posture/bulk", json=body)
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize("fields", [
+    {"good_seconds": "sixty"},
+    {"bad_seconds": None},
+    {"good_seconds": True},
+    {"neck_seconds": -5},
+    {"avg_distance_cm": "far"},
+    {"distance_samples": 2.5},
+    {"session_id": 7},
+])
+def test_invalid_values_are_rejected(client, fields):
+    response = upload(client, minute("a", good=30), {**minute("b"), **fields})
+
+    assert response.status_code == 400
+    assert day(client)["minutes"] == []
+
+
+def test_body_that_is_not_json_is_rejected(client):
+    response = client.post("/posture/bulk", data="user_id=user-1", content_type="application/x-www-form-urlencoded")
+
+    assert response.status_code == 400
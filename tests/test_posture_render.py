@@ -0,0 +1,115 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from posture_render import FrameRenderer, Overlay, StageTimer
+
+
+def blank():
+    return np.zeros((120, 160, 3), dtype=np.uint8)
+
+
+def test_overlay_draws_what_direct_calls_would():
+    overlay = Overlay()
+    overlay.rectangle((10, 10), (60, 50), (0, 255, 0))
+    overlay.line((0, 100), (150, 100), (255, 0, 0), 3)
+    overlay.circle((120, 40), 12, (0, 0, 255))
+    overlay.text("Good posture", (5, 80), 0.5, (255, 255, 255))
+
+    expected = blank()
+    cv2.rectangle(expected, (10, 10), (60, 50), (0, 255, 0), 2)
+    cv2.line(expected, (0, 100), (150, 100), (255, 0, 0), 3)
+    cv2.circle(expected, (120, 40), 12, (0, 0, 255), -1)
+    cv2.putText(expected, "Good posture", (5, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1, cv2.LINE_AA)
+
+    frame = blank()
+    overlay.draw(frame)
+    np.testing.assert_array_equal(frame, expected)
+
+
+def test_stage_timer_keeps_a_moving_average():
+    timer = StageTimer(smoothing=0.5)
+    timer.record("inference", 0.040)
+    timer.record("inference", 0.020)
+
+    assert timer.snapshot()["inference"] == pytest.approx(0.030)
+    assert timer.fps("inference") == pytest.approx(1 / 0.030)
+    assert timer.fps("render") == 0.0
+
+
+def test_budget_lines_give_each_stage_as_a_share_of_the_frame():
+    timer = StageTimer()
+    timer.record("capture", 0.005)
+    timer.record("inference", 0.030)
+    timer.record("frame", 0.040)
+
+    assert timer.budget_lines() == [
+        "capture: 5.0 ms (12%)",
+        "inference: 30.0 ms (75%)",
+        "frame: 40.0 ms (25.0 FPS)",
+    ]
+
+
+def test_budget_lines_without_a_frame_time_have_no_shares():
+    timer = StageTimer()
+    timer.record("capture", 0.005)
+
+    assert timer.budget_lines() == ["capture: 5.0 ms"]
+
+
+def test_timer_context_records_the_elapsed_time():
+    timer = StageTimer()
+    with timer.time("capture"):
+        time.sleep(0.01)
+
+    assert timer.snapshot()["capture"] >= 0.01
+
+
+def composite(renderer, frame, overlay, timeout=2.0):
+    """Submit one frame to a running renderer and wait for its composited result."""
+    renderer.submit(frame, overlay)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with renderer._condition:
+            if renderer._composited is not None:
+                return renderer._composited
+        time.sleep(0.005)
+    return None
+
+
+@pytest.fixture
+def renderer():
+    # Runs only the compositing thread; no window is created
+    renderer = FrameRenderer("test", display_fps=100, timer=StageTimer(), show_stats=False)
+    renderer._thread = threading.Thread(target=renderer._run, daemon=True)
+    renderer._thread.start()
+    yield renderer
+    renderer.stop()
+
+
+def test_renderer_composites_the_overlay(renderer):
+    overlay = Overlay()
+    overlay.rectangle((10, 10), (60, 50), (0, 255, 0))
+
+    composited = composite(renderer, blank(), overlay)
+
+    assert composited is not None
+    assert composited[10, 30].tolist() == [0, 255, 0]
+    assert "render" in renderer.timer.snapshot()
+
+
+def test_renderer_skips_compositing_while_the_window_is_hidden(renderer):
+    overlay = Overlay()
+    overlay.rectangle((10, 10), (60, 50), (0, 255, 0))
+    renderer.set_visible(False)
+
+    frame = blank()
+    assert composite(renderer, frame, overlay, timeout=0.2) is None
+    assert not frame.any()
+    assert "render" not in renderer.timer.snapshot()
+
+    renderer.set_visible(True)
+    assert composite(renderer, blank(), overlay) is not None
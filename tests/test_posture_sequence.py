@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+from posture_sequence import (
+    ISSUES,
+    LandmarkWindow,
+    SequenceClassifier,
+    evaluate,
+    frame_features,
+    load_human_labels,
+    load_recordings,
+    make_windows,
+    save_recording,
+    window_features,
+)
+
+
+def upright(shift_x=0.0, shift_y=0.0, scale=1.0, head_forward=0.0, shoulder_drop=0.0):
+    """One (7, 3) frame: nose, ears, shoulders, hips, all fully visible."""
+    points = np.array([
+        [0.5 + head_forward, 0.20],
+        [0.45 + head_forward, 0.22],
+        [0.55 + head_forward, 0.22],
+        [0.4, 0.40],
+        [0.6, 0.40 + shoulder_drop],
+        [0.42, 0.80],
+        [0.58, 0.80],
+    ])
+    points = points * scale + [shift_x, shift_y]
+    return np.hstack([points, np.ones((7, 1))]).astype(np.float32)
+
+
+def recording(frames, **posture):
+    rng = np.random.default_rng(0)
+    return np.stack([upright(**posture) for _ in range(frames)]) + rng.normal(0, 0.002, (frames, 7, 3))
+
+
+def test_frame_features_ignore_position_and_scale():
+    base = frame_features(upright())
+
+    moved = frame_features(upright(shift_x=0.2, shift_y=-0.1, scale=1.5))
+
+    np.testing.assert_allclose(moved, base, atol=1e-4)
+
+
+def test_frame_features_track_shoulder_slope_and_head_position():
+    base = frame_features(upright())
+
+    dropped = frame_features(upright(shoulder_drop=0.05))
+    forward = frame_features(upright(head_forward=0.05))
+
+    assert base[0] == pytest.approx(0.0, abs=1e-6)
+    assert dropped[0] > 0.2
+    assert forward[1] > base[1] and forward[3] > base[3]
+
+
+def test_window_features_shape():
+    windows, _ = make_windows(recording(40), window_size=15)
+
+    assert window_features(windows).shape == (26, 32)
+
+
+def test_windows_take_the_label_of_their_last_frame():
+    labels = np.zeros((20, 3), dtype=np.uint8)
+    labels[14, 0] = 1
+    labels[17, 2] = 1
+
+    windows, window_labels = make_windows(recording(20), labels, window_size=15, stride=3)
+
+    assert windows.shape == (2, 15, 7, 3)
+    np.testing.assert_array_equal(window_labels, [[1, 0, 0], [0, 0, 1]])
+
+
+def test_landmark_window_returns_frames_in_time_order():
+    window = LandmarkWindow(window_size=3)
+    for i in range(5):
+        window.append(np.full((7, 3), i))
+
+    assert window.full()
+    assert window.window()[0, :, 0, 0].tolist() == [2, 3, 4]
+
+
+def test_classifier_learns_separable_postures_and_round_trips(tmp_path):
+    good, _ = make_windows(recording(60), window_size=10)
+    slumped, _ = make_windows(recording(60, head_forward=0.08, shoulder_drop=0.06), window_size=10)
+    windows = np.concatenate([good, slumped])
+    labels = np.zeros((len(windows), 3), dtype=np.uint8)
+    labels[len(good):, :2] = 1
+
+    model = SequenceClassifier(window_size=10).fit(windows, labels)
+    model.save(str(tmp_path / "model.npz"))
+    loaded = SequenceClassifier.load(str(tmp_path / "model.npz"))
+
+    np.testing.assert_array_equal(model.predict(windows), labels.astype(bool))
+    np.testing.assert_allclose(loaded.predict_proba(windows), model.predict_proba(windows))
+    assert loaded.window_size == 10
+
+
+def test_human_labels_replace_the_rule_verdicts(tmp_path):
+    rules = np.zeros((30, 3), dtype=np.uint8)
+    rules[:, 1] = 1
+    save_recording(str(tmp_path / "session.npz"), recording(30), rules)
+    (tmp_path / "labels.csv").write_text(
+        "recording,start,end,shoulders,neck,lean\n"
+        "session.npz,0,20,0,0,0\n"
+        "session.npz,20,25,1,0,0\n"
+    )
+
+    windows, labels, rule_labels = load_recordings(
+        [str(tmp_path / "*.npz")], window_size=10, human_labels=load_human_labels(str(tmp_path / "labels.csv")))
+
+    # Windows ending on frames 9-24 are labelled; the last five frames are not
+    assert len(windows) == 16
+    assert labels[:11].tolist() == [[0, 0, 0]] * 11
+    assert labels[11:].tolist() == [[1, 0, 0]] * 5
+    assert (rule_labels[:, 1] == 1).all()
+
+
+def test_evaluate_scores_the_rules_against_the_same_labels():
+    class Always:
+        def predict(self, windows):
+            return np.ones((len(windows), 3), dtype=bool)
+
+    labels = np.array([[1, 0, 1], [0, 0, 1]])
+    rules = np.array([[1, 1, 0], [0, 1, 0]])
+
+    report = evaluate(Always(), np.zeros((2, 15, 7, 3)), labels, rules)
+
+    assert [report[issue]["accuracy"] for issue in ISSUES] == [0.5, 0.0, 1.0]
+    assert [report["threshold_rules"][issue]["accuracy"] for issue in ISSUES] == [1.0, 0.0, 0.0]
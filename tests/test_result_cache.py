@@ -0,0 +1,47 @@
+import hashlib
+
+import pytest
+
+from result_cache import make_key
+
+IMAGE = hashlib.sha256(b"desk photo").hexdigest()
+
+
+def key(**changes):
+    args = {"image_hash": IMAGE, "tier": "standard", "references_version": "abc123", "stages": None,
+            "overlay": False, "detector_variant": "saved_model", **changes}
+    return make_key(**args)
+
+
+def test_key_is_stable_and_hex():
+    assert key() == key()
+    assert len(key()) == 32
+    int(key(), 16)
+
+
+@pytest.mark.parametrize("change", [
+    {"image_hash": hashlib.sha256(b"another photo").hexdigest()},
+    {"tier": "accurate"},
+    {"references_version": "def456"},
+    {"stages": ["lighting"]},
+    {"overlay": True},
+    {"detector_variant": "tflite-int8"},
+])
+def test_every_input_changes_the_key(change):
+    assert key(**change) != key()
+
+
+def test_runtimes_and_quantizations_get_their_own_keys():
+    variants = ["saved_model", "tflite-none", "tflite-dynamic", "tflite-float16", "tflite-int8"]
+
+    assert len({key(detector_variant=variant) for variant in variants}) == len(variants)
+
+
+def test_stage_order_does_not_matter():
+    assert key(stages=["pose", "lighting"]) == key(stages=["lighting", "pose"])
+
+
+def test_empty_stage_list_is_rejected():
+    # It assesses nothing, so it must never share the full assessment's key
+    with pytest.raises(ValueError):
+        key(stages=[])
@@ -0,0 +1,88 @@
+import io
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge, UnsupportedMediaType
+
+from upload_validation import HEADER_BYTES, ImageUploadBuffer
+
+
+def encode(fmt, width=640, height=480, **options):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (90, 120, 150)).save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def stream(data, chunk_size=4096, **limits):
+    """Write data the way Werkzeug does, in chunks, then finish."""
+    upload = ImageUploadBuffer(**limits)
+    for start in range(0, len(data), chunk_size):
+        upload.write(data[start:start + chunk_size])
+    return upload.finish()
+
+
+@pytest.mark.parametrize("fmt, name, options", [
+    ("JPEG", "jpeg", {}),
+    ("PNG", "png", {}),
+    ("BMP", "bmp", {}),
+    ("WEBP", "webp", {}),
+    ("WEBP", "webp", {"lossless": True}),
+])
+def test_accepts_images_the_engine_decodes(fmt, name, options):
+    data = encode(fmt, **options)
+
+    upload = stream(data)
+
+    assert (upload.format, upload.size) == (name, (640, 480))
+    assert upload.getvalue() == data
+    assert cv2.imdecode(np.frombuffer(upload.getvalue(), np.uint8), cv2.IMREAD_COLOR).shape == (480, 640, 3)
+
+
+def test_rejects_other_formats_after_the_first_bytes():
+    upload = ImageUploadBuffer()
+
+    with pytest.raises(UnsupportedMediaType):
+        upload.write(b"%PDF-1.7\n" + b"\0" * 4096)
+
+
+def test_rejects_oversized_bodies_while_they_stream():
+    data = encode("PNG") + b"\0" * 100_000
+    upload = ImageUploadBuffer(max_bytes=64 * 1024)
+
+    with pytest.raises(RequestEntityTooLarge):
+        for start in range(0, len(data), 4096):
+            upload.write(data[start:start + 4096])
+    assert upload.tell() <= 64 * 1024
+
+
+@pytest.mark.parametrize("width, height", [(16, 480), (640, 20)])
+def test_rejects_images_too_small_to_assess(width, height):
+    with pytest.raises(BadRequest):
+        stream(encode("JPEG", width, height))
+
+
+def test_rejects_too_many_pixels_from_the_header_alone():
+    header = encode("PNG", 4000, 3000)[:64]
+
+    with pytest.raises(RequestEntityTooLarge):
+        ImageUploadBuffer(max_pixels=10_000_000).write(header)
+
+
+def test_rejects_a_body_that_ends_before_its_header():
+    with pytest.raises(BadRequest):
+        stream(b"\xff\xd8\xff\xe0" + b"\0" * 20)
+
+
+def test_rejects_a_header_that_never_gives_the_dimensions():
+    upload = ImageUploadBuffer()
+    upload.write(b"\xff\xd8\xff\xe1" + b"\0" * 100)
+
+    with pytest.raises(BadRequest):
+        upload.write(b"\0" * HEADER_BYTES)
+
+
+def test_short_signature_is_judged_when_the_body_ends():
+    with pytest.raises(UnsupportedMediaType):
+        stream(b"GIF8")
@@ -0,0 +1,121 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from ergonomic_assessment import AssessmentPool
+from video_assessment import VideoAssessment
+
+
+class FakeEngine:
+    """Stands in for AdvancedErgonomicAssessment: finds a keyboard and counts detector runs."""
+
+    tracking_pose_used = False
+
+    def __init__(self):
+        self.detections = 0
+
+    def stage_sizes(self):
+        return {"detection": 64, "pose": 64}
+
+    def detect_objects(self, image_rgb, image_size=None):
+        self.detections += 1
+        return {"keyboard": {"confidence": 0.9, "bbox": [40, 80, 120, 100], "center": [80, 90],
+                             "dimensions": [80, 20]}}
+
+    def measure_posture(self, landmarks, width, height):
+        return None
+
+
+class FakePose:
+    def __init__(self):
+        self.resets = 0
+
+    def process(self, image_rgb):
+        return SimpleNamespace(pose_landmarks=None)
+
+    def reset(self):
+        self.resets += 1
+
+
+def frame(brightness):
+    return np.full((120, 160, 3), brightness, dtype=np.uint8)
+
+
+def assessment(**options):
+    options.setdefault("lighting_interval", 1)
+    return VideoAssessment(engine=FakeEngine(), pose=FakePose(), **options)
+
+
+def keyframes(video, frames):
+    return [video.process_frame(image, timestamp=float(i))["keyframe"] for i, image in enumerate(frames)]
+
+
+def test_detector_runs_every_keyframe_interval_frames():
+    video = assessment(keyframe_interval=3)
+
+    flags = keyframes(video, [frame(120)] * 8)
+
+    assert flags == [True, False, False, True, False, False, True, False]
+    assert video.engine.detections == 3
+
+
+def test_scene_change_triggers_a_keyframe():
+    video = assessment(keyframe_interval=100, scene_change_threshold=0.15)
+
+    flags = keyframes(video, [frame(120), frame(130), frame(220), frame(220)])
+
+    assert flags == [True, False, True, False]
+
+
+def test_losing_tracked_features_triggers_a_keyframe():
+    video = assessment(keyframe_interval=100, max_lost_features=0.5)
+    thumbnail = np.full((32, 32), 120, dtype=np.uint8)
+    video._keyframe_thumbnail = thumbnail
+
+    assert not video._is_keyframe(thumbnail, lost_features=0.5)
+    assert video._is_keyframe(thumbnail, lost_features=0.6)
+
+
+def test_issues_are_reported_once_they_hold_for_min_issue_share():
+    video = assessment(window_seconds=float("inf"), min_issue_share=0.5)
+    for i, brightness in enumerate([30] * 4 + [120] * 6):
+        video.process_frame(frame(brightness), timestamp=float(i))
+
+    assert video.summary()["issue_share"] == {"lighting_too_dim": 0.4}
+    assert video.summary()["issues"] == []
+
+    video.process_frame(frame(30), timestamp=10.0)
+    video.process_frame(frame(30), timestamp=11.0)
+
+    summary = video.summary()
+    assert summary["issue_share"] == {"lighting_too_dim": 0.5}
+    assert summary["issues"] == ["lighting_too_dim"]
+    assert "average brightness: 30.0" in summary["recommendations"][0]
+
+
+def test_window_only_keeps_the_last_window_seconds():
+    video = assessment(window_seconds=3.0)
+    for i, brightness in enumerate([30] * 5 + [120] * 4):
+        video.process_frame(frame(brightness), timestamp=float(i))
+
+    summary = video.summary()
+
+    assert summary["frames"] == 9
+    assert summary["window_frames"] == 4
+    assert summary["window_seconds"] == 3.0
+    assert summary["issues"] == []
+
+
+def test_pool_resets_the_tracking_graph_before_lending_the_engine_again():
+    pool = AssessmentPool(size=1, warmup=False, tier="fast")
+    pose = FakePose()
+
+    with pool.checkout() as engine:
+        engine._tracking_pose = pose
+        video = VideoAssessment(engine=engine)
+        assert video.pose is pose
+    with pool.checkout(timeout=5) as engine:
+        assert pose.resets == 1
+        assert not engine.tracking_pose_used
+    with pool.checkout(timeout=5):
+        assert pose.resets == 1